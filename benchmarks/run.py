@@ -0,0 +1,298 @@
+"""Benchmarks for the API and the policy pipeline, run against the stub LLM backend.
+
+    PYTHONPATH=src python benchmarks/run.py all --concurrency 16 --requests 200
+    PYTHONPATH=src python benchmarks/run.py compare old.json new.json
+"""
+
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Configure the service before it is imported: stubbed LLM, no caching, no rate budgets
+os.environ.setdefault("POLICY_FORGE_LLM_BACKEND", "stub")
+os.environ.setdefault("POLICY_FORGE_CACHE", "0")
+os.environ.setdefault("POLICY_FORGE_LLM_RPM", "0")
+os.environ.setdefault("POLICY_FORGE_LLM_TPM", "0")
+
+import httpx
+import typer
+
+from backend.main import app as api
+from policy_forge import formatters, prompts
+from policy_forge.backends import StubBackend
+from policy_forge.scheduler import count_tokens
+from policy_forge.schema import (
+    ExampleListResponse,
+    MachinePolicy,
+    ModeratorPolicy,
+    PublicPolicy,
+)
+
+cli = typer.Typer()
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_stub = StubBackend()
+
+
+def _sample(response_format, seed: str):
+    return _stub.build("bench", [{"role": "user", "content": seed}], response_format)
+
+
+def _payloads(i: int) -> Dict[str, dict]:
+    machine = _sample(MachinePolicy, f"machine-{i}").model_dump(mode="json")
+    examples = _sample(ExampleListResponse, f"examples-{i}").model_dump(mode="json")["examples"]
+    return {
+        "/policy/generate": {"intent": f"Benchmark intent #{i}"},
+        "/policy/generate/derived": {"machine": machine},
+        "/policy/refine": {"machine": machine, "reviewed_examples": examples},
+        "/examples/generate": {"policy": machine},
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    # Nearest-rank percentile
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+async def _track_rss(samples: List[float], interval: float = 0.05):
+    while True:
+        samples.append(current_rss_mb())
+        await asyncio.sleep(interval)
+
+
+async def bench_endpoint(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    rss: List[float] = [current_rss_mb()]
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            body = _payloads(i)[path]
+            start = time.perf_counter()
+            response = await client.post(f"/api{path}", json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    tracker = asyncio.create_task(_track_rss(rss))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    tracker.cancel()
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": max(latencies, default=0.0) * 1000,
+        },
+        "peak_rss_mb": max(rss),
+    }
+
+
+async def bench_api(requests: int, concurrency: int, endpoints: List[str]) -> Dict[str, dict]:
+    results = {}
+    transport = httpx.ASGITransport(app=api)
+    async with api.router.lifespan_context(api):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for path in endpoints:
+                # Warm up imports, pools and schema caches before measuring
+                await client.post(f"/api{path}", json=_payloads(-1)[path])
+                results[path] = await bench_endpoint(client, path, requests, concurrency)
+                typer.echo(_format_endpoint(path, results[path]), err=True)
+    return results
+
+
+def _time(fn: Callable[[], object], min_seconds: float = 0.5) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = max(3, int(min_seconds / max(timer.timeit(number) / number, 1e-9) / number))
+    per_call = min(timer.repeat(repeat=runs, number=number)) / number
+    return {"per_call_us": per_call * 1e6, "calls_per_s": 1 / per_call if per_call else 0.0}
+
+
+def bench_micro() -> Dict[str, dict]:
+    machine = _sample(MachinePolicy, "micro")
+    moderator = _sample(ModeratorPolicy, "micro")
+    public = _sample(PublicPolicy, "micro")
+    examples = _sample(ExampleListResponse, "micro")
+    machine_json = machine.model_dump_json()
+    examples_json = examples.model_dump_json()
+    machine_dict = machine.model_dump()
+
+    cases = {
+        "format_machine_policy_to_md": lambda: formatters.format_machine_policy_to_md(machine),
+        "format_moderator_policy_to_md": lambda: formatters.format_moderator_policy_to_md(moderator),
+        "format_public_policy_to_md": lambda: formatters.format_public_policy_to_md(public),
+        "MachinePolicy.model_validate_json": lambda: MachinePolicy.model_validate_json(machine_json),
+        "MachinePolicy.model_validate": lambda: MachinePolicy.model_validate(machine_dict),
+        "MachinePolicy.model_dump_json": lambda: machine.model_dump_json(),
+        "ExampleListResponse.model_validate_json": lambda: ExampleListResponse.model_validate_json(examples_json),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = _time(fn)
+        typer.echo(f"{name:45s} {results[name]['per_call_us']:10.2f} µs", err=True)
+    return results
+
+
+def bench_tokens(samples: int = 20) -> Dict[str, dict]:
+    # Prompt tokens spent embedding policies and examples: the old repr() interpolation vs prompts.render
+    cases = {
+        "MachinePolicy": [_sample(MachinePolicy, f"tokens-{i}") for i in range(samples)],
+        "reviewed_examples": [_sample(ExampleListResponse, f"tokens-{i}").examples for i in range(samples)],
+    }
+    results = {}
+    for name, values in cases.items():
+        before = sum(count_tokens(str(value)) for value in values) / samples
+        after = sum(count_tokens(prompts.render(value)) for value in values) / samples
+        results[name] = {"repr_tokens": before, "compact_tokens": after, "saved": 1 - after / before if before else 0.0}
+        typer.echo(f"{name:45s} {before:8.1f} -> {after:8.1f} tokens ({results[name]['saved']:.1%} saved)", err=True)
+    return results
+
+
+def _format_endpoint(path: str, result: dict) -> str:
+    latency = result["latency_ms"]
+    return (
+        f"{path:28s} p50 {latency['p50']:8.1f}ms  p95 {latency['p95']:8.1f}ms  p99 {latency['p99']:8.1f}ms  "
+        f"{result['throughput_rps']:8.1f} req/s  rss {result['peak_rss_mb']:7.1f}MB  errors {result['errors']}"
+    )
+
+
+def _metadata(config: dict) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "api_version": api.version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": os.environ["POLICY_FORGE_LLM_BACKEND"],
+        "stub_latency": os.getenv("POLICY_FORGE_STUB_LATENCY", "fixed:0"),
+        "config": config,
+    }
+
+
+def _save(results: dict, output: Optional[Path]) -> Path:
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}.json"
+    output.write_text(json.dumps(results, indent=2))
+    typer.echo(f"💾 Results saved to {output}", err=True)
+    return output
+
+
+ENDPOINTS = ["/policy/generate", "/policy/generate/derived", "/policy/refine", "/examples/generate"]
+
+
+@cli.command(name="all")
+def run_all(
+    requests: int = typer.Option(200, help="Requests per endpoint"),
+    concurrency: int = typer.Option(16, help="Concurrent clients per endpoint"),
+    endpoint: List[str] = typer.Option(ENDPOINTS, help="Endpoints to drive (repeatable)"),
+    output: Optional[Path] = typer.Option(None, help="Results file (default: benchmarks/results/<timestamp>.json)"),
+):
+    results = {"meta": _metadata({"requests": requests, "concurrency": concurrency})}
+    results["micro"] = bench_micro()
+    results["tokens"] = bench_tokens()
+    results["endpoints"] = asyncio.run(bench_api(requests, concurrency, endpoint))
+    _save(results, output)
+
+
+@cli.command(name="api")
+def run_api(
+    requests: int = typer.Option(200, help="Requests per endpoint"),
+    concurrency: int = typer.Option(16, help="Concurrent clients per endpoint"),
+    endpoint: List[str] = typer.Option(ENDPOINTS, help="Endpoints to drive (repeatable)"),
+    output: Optional[Path] = typer.Option(None),
+):
+    results = {"meta": _metadata({"requests": requests, "concurrency": concurrency})}
+    results["endpoints"] = asyncio.run(bench_api(requests, concurrency, endpoint))
+    _save(results, output)
+
+
+@cli.command(name="micro")
+def run_micro(output: Optional[Path] = typer.Option(None)):
+    results = {"meta": _metadata({}), "micro": bench_micro()}
+    _save(results, output)
+
+
+@cli.command(name="tokens")
+def run_tokens(output: Optional[Path] = typer.Option(None)):
+    results = {"meta": _metadata({}), "tokens": bench_tokens()}
+    _save(results, output)
+
+
+@cli.command()
+def compare(baseline: Path, candidate: Path):
+    old = json.loads(baseline.read_text())
+    new = json.loads(candidate.read_text())
+
+    def change(a: float, b: float) -> str:
+        return f"{(b - a) / a * 100:+7.1f}%" if a else "    n/a"
+
+    for path, result in new.get("endpoints", {}).items():
+        before = old.get("endpoints", {}).get(path)
+        if before is None:
+            continue
+        typer.echo(
+            f"{path:28s} p50 {change(before['latency_ms']['p50'], result['latency_ms']['p50'])}  "
+            f"p99 {change(before['latency_ms']['p99'], result['latency_ms']['p99'])}  "
+            f"throughput {change(before['throughput_rps'], result['throughput_rps'])}  "
+            f"rss {change(before['peak_rss_mb'], result['peak_rss_mb'])}"
+        )
+    for name, result in new.get("micro", {}).items():
+        before = old.get("micro", {}).get(name)
+        if before is not None:
+            typer.echo(f"{name:45s} {change(before['per_call_us'], result['per_call_us'])}")
+    for name, result in new.get("tokens", {}).items():
+        before = old.get("tokens", {}).get(name)
+        if before is not None:
+            typer.echo(f"{name + ' prompt tokens':45s} {change(before['compact_tokens'], result['compact_tokens'])}")
+
+
+if __name__ == "__main__":
+    cli()
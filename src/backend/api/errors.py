@@ -0,0 +1,19 @@
+import asyncio
+import math
+import openai
+from fastapi import HTTPException
+from policy_forge.scheduler import retry_after
+
+
+def to_http_exception(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, openai.RateLimitError):
+        wait = retry_after(e)
+        headers = {"Retry-After": str(math.ceil(wait))} if wait is not None else None
+        return HTTPException(status_code=429, detail="Upstream rate limit exceeded, retry later", headers=headers)
+    if isinstance(e, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return HTTPException(status_code=504, detail="Upstream model call timed out")
+    if isinstance(e, (openai.APIConnectionError, openai.InternalServerError)):
+        return HTTPException(status_code=502, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
@@ -3,6 +3,9 @@ from .health import router as health_router
 from .intent import router as intent_router
 from .policy import router as policy_router
 from .examples import router as examples_router
+from .jobs import router as jobs_router
+from .metrics import router as metrics_router
+from .policies import router as policies_router
 
 # Create main router
 router = APIRouter()
@@ -11,4 +14,7 @@ router = APIRouter()
 router.include_router(health_router)
 router.include_router(intent_router)
 router.include_router(policy_router)
-router.include_router(examples_router) 
\ No newline at end of file
+router.include_router(policies_router)
+router.include_router(examples_router)
+router.include_router(jobs_router)
+router.include_router(metrics_router)
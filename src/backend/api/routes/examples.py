@@ -1,27 +1,68 @@
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Query, Request
 from policy_forge import example_gen
+from policy_forge.dedup import policy_key
+from policy_forge.reviews import LabelAgreement, StoredReview
+from backend.api.errors import to_http_exception
+from backend.api.store import get_reviews, load_policy, resolve_machine
 from backend.api.schemas import (
     ExampleRequest,
     ExampleResponse,
     ExamplesReviewRequest,
+    ExamplesReviewResponse,
 )
 
 router = APIRouter(prefix="/examples", tags=["examples"])
 
 @router.post("/generate")
-def generate_synthetic_examples(request: ExampleRequest):
+async def generate_synthetic_examples(request: ExampleRequest, http_request: Request):
     try:
-        examples = example_gen.generate_examples(request.policy)
-        response = ExampleResponse(examples=examples.examples)
+        policy, _ = await resolve_machine(http_request, request.policy, request.policy_id, request.version)
+        if request.dedup == "off":
+            examples = await example_gen.generate_examples_async(policy)
+            return ExampleResponse(examples=examples.examples)
+        # Stored policies share one index across versions; inline policies are keyed by content
+        index = http_request.app.state.dedup.index(request.policy_id or policy_key(policy))
+        regenerations = example_gen.DEFAULT_REGENERATIONS if request.dedup == "regenerate" else 0
+        result = await example_gen.generate_unique_examples_async(policy, index, regenerations)
+        response = ExampleResponse(
+            examples=result.examples,
+            generated=result.generated,
+            duplicates=result.duplicates,
+            dedup_rate=result.dedup_rate,
+        )
         return response
     except Exception as e:
         print("Error generating examples: ", e)
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 @router.post("/review")
-def review_examples(request: ExamplesReviewRequest):
+async def review_examples(request: ExamplesReviewRequest, http_request: Request):
+    reviews = get_reviews(http_request)
     try:
-        # TODO: Implement example review processing logic
-        return {"status": "success", "message": f"Processed {len(request.examples)} reviewed examples"}
+        stored = await load_policy(http_request, request.policy_id, request.version)
+        count = await reviews.add(stored.id, stored.version, request.examples)
+        response = ExamplesReviewResponse(
+            policy_id=stored.id,
+            version=stored.version,
+            stored=count,
+            pending=await reviews.count_pending(stored.id),
+            agreement=await reviews.stats(stored.id),
+        )
+        return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise to_http_exception(e)
+
+@router.get("/review/pending")
+async def pending_reviews(
+    http_request: Request, policy_id: str, limit: Optional[int] = Query(default=None, ge=1)
+) -> List[StoredReview]:
+    """Reviews that no refinement has incorporated yet, oldest first."""
+    await load_policy(http_request, policy_id)
+    return await get_reviews(http_request).pending(policy_id, limit)
+
+@router.get("/review/stats")
+async def review_stats(http_request: Request, policy_id: str, version: Optional[int] = None) -> List[LabelAgreement]:
+    """How often reviewers approved the generated label, per label, for one version or across all of them."""
+    await load_policy(http_request, policy_id, version)
+    return await get_reviews(http_request).stats(policy_id, version) 
\ No newline at end of file
@@ -1,23 +1,17 @@
-from fastapi import APIRouter, HTTPException
-from backend.api.schemas import InitialIntent, EnrichedIntent
+from fastapi import APIRouter, HTTPException, Request
+from backend.api.schemas import InitialIntent, EnrichedIntent, FalseHitRequest
+from backend.api.store import get_semantic_cache, semantic_hit
+from policy_forge.intent_builder import format_intent
+from policy_forge.semantic_cache import SemanticCache
 
 router = APIRouter(prefix="/intent", tags=["intent"])
 
 
 @router.post("/submit")
-def submit_intent(request: InitialIntent):
+async def submit_intent(request: InitialIntent, http_request: Request):
     try:
         # Build the enriched intent using the same format as IntentBuilder
-        intent_text = f"""
-Platform Type: {request.platform_type}
-Industry: {request.industry}
-Target Behavior: {request.user_behavior}
-Real-World Concerns: {request.real_world_concerns}
-Moderation Approach: {request.moderation_style}
-Additional Context: {request.additional_context}
-
-The goal is to write policies that effectively detect and moderate the above behavior, taking into account platform norms, user expectations, and the need for clear guidance and automation.
-""".strip()
+        intent_text = format_intent(request.model_dump())
 
         # Create context dictionary with all relevant information
         context = {
@@ -40,6 +34,32 @@ The goal is to write policies that effectively detect and moderate the above beh
         enriched = EnrichedIntent(
             intent=intent_text, context=context, requirements=requirements
         )
+        match, stored = await semantic_hit(http_request, intent_text)
+        if match is not None:
+            enriched.semantic_match, enriched.machine = match, stored.machine
         return enriched
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _semantic_cache(http_request: Request) -> SemanticCache:
+    semantic = get_semantic_cache(http_request)
+    if semantic is None:
+        raise HTTPException(status_code=404, detail="Semantic caching is off (set POLICY_FORGE_SEMANTIC_CACHE=1)")
+    return semantic
+
+
+@router.post("/cache/false-hit")
+async def report_false_hit(request: FalseHitRequest, http_request: Request):
+    # Clients call this when a semantically matched policy didn't fit their intent
+    semantic = _semantic_cache(http_request)
+    if not await semantic.report_false_hit(request.match_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or already reported match {request.match_id}")
+    return semantic.stats()
+
+
+@router.get("/cache/stats")
+async def semantic_cache_stats(http_request: Request):
+    return _semantic_cache(http_request).stats()
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, HTTPException, Request
+from backend.api.schemas import JobCreatedResponse, JobRequest, JobStatusResponse
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.post("", status_code=202)
+async def create_job(request: JobRequest, http_request: Request):
+    job = await http_request.app.state.jobs.submit(request.kind, request.intent)
+    response = JobCreatedResponse(id=job.id, status=job.status)
+    return response
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, http_request: Request):
+    job = await http_request.app.state.jobs.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from policy_forge import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("")
+async def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,106 @@
+import asyncio
+import time
+import uuid
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from policy_forge.export import CATALOG_SEPARATOR, iter_catalog, policy_file_name
+from policy_forge.formatters import iter_policy_md
+from backend.api.errors import to_http_exception
+from backend.api.schemas import (
+    CatalogParams,
+    PolicyCreateRequest,
+    PolicyExportRequest,
+    PolicyExportResponse,
+    PolicySearchParams,
+)
+from backend.api.store import get_store, load_policy
+
+BUNDLE_EXTENSIONS = {"tar": "tar.gz", "zip": "zip", "jsonl": "jsonl"}
+
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
+
+PolicyType = Literal["machine", "public", "moderator"]
+
+# Stored policies loaded per page while streaming a catalog
+CATALOG_PAGE_SIZE = 100
+
+router = APIRouter(prefix="/policies", tags=["policies"])
+
+@router.post("", status_code=201)
+async def create_policy(request: PolicyCreateRequest, http_request: Request):
+    return await get_store(http_request).create(request.machine, request.public, request.moderator)
+
+@router.get("")
+async def list_policies(params: Annotated[PolicySearchParams, Query()], http_request: Request):
+    return await get_store(http_request).find(**params.model_dump())
+
+@router.post("/export")
+async def export_policies(request: PolicyExportRequest, http_request: Request):
+    policies = await asyncio.gather(*(load_policy(http_request, policy_id) for policy_id in request.policy_ids))
+    name = f"exports/{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.{BUNDLE_EXTENSIONS[request.kind]}"
+    try:
+        path = await http_request.app.state.exporter.export_bundle(policies, name, request.kind, request.formats)
+        response = PolicyExportResponse(path=str(path), count=len(policies))
+        return response
+    except Exception as e:
+        raise to_http_exception(e)
+
+@router.get("/catalog")
+async def download_catalog(
+    params: Annotated[CatalogParams, Query()],
+    http_request: Request,
+):
+    """Every matching policy in one Markdown document, streamed a page of policies at a time."""
+    store = get_store(http_request)
+    policy_type = params.policy_type
+    search = params.model_dump(exclude={"limit", "offset", "policy_type"})
+
+    async def chunks():
+        offset, remaining, started = params.offset, params.limit, False
+        while remaining > 0:
+            page = await store.find(**search, limit=min(CATALOG_PAGE_SIZE, remaining), offset=offset)
+            if not page:
+                return
+            loaded = await asyncio.gather(*(store.get(summary.id) for summary in page))
+            policies = [policy for policy in loaded if policy is not None and getattr(policy, policy_type) is not None]
+            # iter_catalog separates documents within a page; this separates pages
+            if policies and started:
+                yield CATALOG_SEPARATOR
+            for chunk in iter_catalog(policies, policy_type):
+                yield chunk
+            started = started or bool(policies)
+            offset += len(page)
+            remaining -= len(page)
+
+    return StreamingResponse(
+        chunks(),
+        media_type=MARKDOWN_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{policy_type}-catalog.md"'},
+    )
+
+@router.get("/{policy_id}/download")
+async def download_policy(
+    policy_id: str,
+    http_request: Request,
+    version: Optional[int] = None,
+    policy_type: PolicyType = "machine",
+):
+    stored = await load_policy(http_request, policy_id, version)
+    policy = getattr(stored, policy_type)
+    if policy is None:
+        raise HTTPException(status_code=404, detail=f"Policy {policy_id} version {stored.version} has no {policy_type} policy")
+    return StreamingResponse(
+        iter_policy_md(policy),
+        media_type=MARKDOWN_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{policy_file_name(stored, policy_type)}"'},
+    )
+
+@router.get("/{policy_id}")
+async def get_policy(policy_id: str, http_request: Request, version: Optional[int] = None):
+    return await load_policy(http_request, policy_id, version)
+
+@router.get("/{policy_id}/versions")
+async def list_policy_versions(policy_id: str, http_request: Request):
+    await load_policy(http_request, policy_id)
+    return await get_store(http_request).versions(policy_id)
@@ -1,9 +1,24 @@
-from fastapi import APIRouter, HTTPException
-from policy_forge import policy_writer, refiner
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from policy_forge import classifier, pipeline, policy_writer, prefilter, preview, refiner
+from policy_forge.intent_builder import format_intent
+from backend.api import sse
+from backend.api.errors import to_http_exception
+from backend.api.store import get_reviews, get_store, load_policy, remember_intent, resolve_machine, semantic_hit
 from backend.api.schemas import (
+    BatchGenerateRequest,
+    ClassifyRequest,
+    ClassifyResponse,
+    ClassifyResult,
+    DerivedPoliciesRequest,
     GenerateRequest,
     PolicyResponse,
     RefinementRequest,
+    IncrementalRefinementRequest,
+    IncrementalRefinementResponse,
+    PolicyPreviewRequest,
     PolicyPreviewResponse,
     MachinePolicyResponse,
 )
@@ -11,57 +26,206 @@ from backend.api.schemas import (
 router = APIRouter(prefix="/policy", tags=["policy"])
 
 @router.post("/generate/initial")
-def generate_initial_policy(request: GenerateRequest):
+async def generate_initial_policy(request: GenerateRequest, http_request: Request):
     try:
-        machine = policy_writer.generate_initial_policy(request.intent)
-        response = MachinePolicyResponse(machine=machine)
+        match, stored = await semantic_hit(http_request, request.intent)
+        if match is not None:
+            return MachinePolicyResponse(
+                machine=stored.machine, policy_id=stored.id, version=stored.version, semantic_match=match
+            )
+        machine = await policy_writer.generate_initial_policy_async(request.intent)
+        stored = await get_store(http_request).create(machine, source="generate")
+        await remember_intent(http_request, request.intent, stored)
+        response = MachinePolicyResponse(machine=machine, policy_id=stored.id, version=stored.version)
         return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 @router.post("/generate/derived")
-def generate_derived_policies(request: MachinePolicyResponse):
+async def generate_derived_policies(request: DerivedPoliciesRequest, http_request: Request):
     try:
-        public, moderator = policy_writer.generate_derived_policies(request.machine)
+        machine, stored = await resolve_machine(http_request, request.machine, request.policy_id, request.version)
+        public, moderator = await policy_writer.generate_derived_policies_async(machine)
         response = PolicyResponse(
             public=public,
             moderator=moderator,
-            machine=request.machine,
+            machine=machine,
         )
+        if stored is not None:
+            # Pairs the derived policies with the machine policy they were written from, even for an older version
+            stored = await get_store(http_request).add_version(
+                stored.id, machine=machine, public=public, moderator=moderator, source="derive"
+            )
+            response.policy_id, response.version = stored.id, stored.version
         return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
 
 @router.post("/refine")
-def refine_policy(request: RefinementRequest):
+async def refine_policy(request: RefinementRequest, http_request: Request):
     try:
-        machine_refined = refiner.refine_machine_policy(request.machine, request.reviewed_examples)
+        machine, stored = await resolve_machine(http_request, request.machine, request.policy_id, request.version)
+        machine_refined = await refiner.refine_machine_policy_async(machine, request.reviewed_examples)
         response = MachinePolicyResponse(machine=machine_refined)
+        if stored is not None:
+            stored = await get_store(http_request).add_version(stored.id, machine=machine_refined, source="refine")
+            response.policy_id, response.version = stored.id, stored.version
+        return response
+    except Exception as e:
+        raise to_http_exception(e)
+
+@router.post("/refine/incremental")
+async def refine_policy_incremental(request: IncrementalRefinementRequest, http_request: Request):
+    try:
+        machine, stored = await resolve_machine(http_request, request.machine, request.policy_id, request.version)
+        history = request.history or refiner.RefinementHistory.start(machine)
+        latest = history.latest
+        queued = await get_reviews(http_request).pending(stored.id) if request.from_review_queue else []
+        examples = [*request.reviewed_examples, *(review.example() for review in queued)]
+        version = await refiner.refine_incremental_async(history, examples)
+        response = IncrementalRefinementResponse(history=history)
+        if stored is not None:
+            if version is not latest:
+                stored = await get_store(http_request).add_version(
+                    stored.id, machine=version.policy, source="refine_incremental"
+                )
+            if queued:
+                await get_reviews(http_request).mark_incorporated([review.id for review in queued], stored.version)
+            response.policy_id, response.version = stored.id, stored.version
         return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
+
+@router.post("/classify")
+async def classify_texts(request: ClassifyRequest, http_request: Request):
+    try:
+        machine, _ = await resolve_machine(http_request, request.machine, request.policy_id, request.version)
+        if request.prefilter:
+            outcomes = await prefilter.classify_routed_async(machine, request.texts)
+        else:
+            outcomes = await classifier.classify_many_async(machine, request.texts)
+        results = [
+            ClassifyResult(error=str(outcome))
+            if isinstance(outcome, Exception)
+            else ClassifyResult(**{"path": "llm", **outcome.model_dump()})
+            for outcome in outcomes
+        ]
+        paths = [result.path for result in results if result.path is not None]
+        routes = {path: paths.count(path) / len(results) for path in prefilter.PATHS}
+        response = ClassifyResponse(results=results, routes=routes)
+        return response
+    except Exception as e:
+        raise to_http_exception(e)
+
+def _stream_policies(http_request: Request, intent: str) -> StreamingResponse:
+    async def events():
+        policies = {}
+        try:
+            async for policy_type, field, value in policy_writer.stream_policy_async(intent):
+                if field is None:
+                    policies[policy_type] = value
+                    yield sse.format_event(policy_type, value.model_dump(mode="json"))
+                else:
+                    yield sse.format_event(f"{policy_type}.field", {"field": field, "value": value})
+            # Stored as a non-streamed generation is, so the final event carries the same policy_id and version
+            stored = await get_store(http_request).create(
+                policies["machine"], policies["public"], policies["moderator"], source="generate"
+            )
+            await remember_intent(http_request, intent, stored)
+            response = PolicyResponse(**policies, policy_id=stored.id, version=stored.version)
+            yield sse.format_event("policy", response.model_dump(mode="json"))
+        except Exception as e:
+            yield sse.format_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        sse.with_heartbeat(events()),
+        media_type="text/event-stream",
+        headers=sse.SSE_HEADERS,
+    )
+
+@router.post("/generate/stream")
+async def stream_policies(request: GenerateRequest, http_request: Request):
+    return _stream_policies(http_request, request.intent)
 
 @router.post("/generate")
-def generate_policies(request: GenerateRequest):
+async def generate_policies(request: GenerateRequest, http_request: Request):
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        return _stream_policies(http_request, request.intent)
     try:
-        public, moderator, machine = policy_writer.generate_policy(request.intent)
+        match, stored = await semantic_hit(http_request, request.intent, derived=True)
+        if match is not None:
+            return PolicyResponse(
+                public=stored.public,
+                moderator=stored.moderator,
+                machine=stored.machine,
+                policy_id=stored.id,
+                version=stored.version,
+                semantic_match=match,
+            )
+        public, moderator, machine = await policy_writer.generate_policy_async(request.intent)
+        stored = await get_store(http_request).create(machine, public, moderator, source="generate")
+        await remember_intent(http_request, request.intent, stored)
         response = PolicyResponse(
             public=public,
             moderator=moderator,
             machine=machine,
+            policy_id=stored.id,
+            version=stored.version,
         )
         return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
+
+@router.post("/generate/batch")
+async def generate_policies_batch(request: BatchGenerateRequest):
+    intents = [format_intent(intent.model_dump()) for intent in request.intents]
+
+    async def results():
+        async for result in pipeline.run_batch(intents, concurrency=request.concurrency):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+def _not_modified(http_request: Request, tag: str) -> bool:
+    header = http_request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in tags or tag in tags
+
+def _preview_headers(tag: str) -> dict:
+    # Clients keep the preview but revalidate it with If-None-Match on every use
+    return {"ETag": tag, "Cache-Control": "no-cache"}
+
+def _preview(http_request: Request, policy, tag: str) -> Response:
+    if _not_modified(http_request, tag):
+        return Response(status_code=304, headers=_preview_headers(tag))
+    response = PolicyPreviewResponse(markdown=preview.render_preview(policy), json=policy.model_dump(mode="json"))
+    return JSONResponse(response.model_dump(mode="json"), headers=_preview_headers(tag))
 
 @router.get("/preview")
-def preview_policies():
+async def preview_stored_policy(
+    policy_id: str,
+    http_request: Request,
+    version: Optional[int] = None,
+    policy_type: Literal["machine", "public", "moderator"] = "machine",
+):
+    # Stored versions never change, so a pinned version can be revalidated without loading it
+    if version is not None and _not_modified(http_request, f'"{policy_id}-{version}-{policy_type}"'):
+        return Response(status_code=304, headers=_preview_headers(f'"{policy_id}-{version}-{policy_type}"'))
+    stored = await load_policy(http_request, policy_id, version)
+    policy = getattr(stored, policy_type)
+    if policy is None:
+        raise HTTPException(status_code=404, detail=f"Policy {policy_id} version {stored.version} has no {policy_type} policy")
+    return _preview(http_request, policy, f'"{stored.id}-{stored.version}-{policy_type}"')
+
+@router.post("/preview")
+async def preview_policy(request: PolicyPreviewRequest, http_request: Request):
+    tag = preview.etag(request.policy_type, request.policy)
+    if _not_modified(http_request, tag):
+        return Response(status_code=304, headers=_preview_headers(tag))
     try:
-        # TODO: Implement policy preview generation logic
-        preview = PolicyPreviewResponse(
-            markdown="# Policy Preview\n\nThis is a sample markdown preview",
-            json={"sample": "json preview"}
-        )
-        return preview
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        policy = preview.POLICY_TYPES[request.policy_type].model_validate(request.policy)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    return _preview(http_request, policy, tag)
@@ -1,55 +1,164 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Literal, Optional
 from policy_forge.schema import (
+    InitialIntent,
     ModeratorPolicy,
     MachinePolicy,
     SyntheticExample,
+    ReviewedExample,
     PublicPolicy,
 )
+from policy_forge.pipeline import DEFAULT_BATCH_CONCURRENCY, PipelineResult
+from policy_forge.refiner import RefinementHistory
+from policy_forge.reviews import LabelAgreement
+from policy_forge.semantic_cache import SemanticMatch
+from policy_forge.export import BundleKind, ExportFormat
+from policy_forge.store import Severity
 
 
-class InitialIntent(BaseModel):
-    platform_type: str
-    industry: str
-    user_behavior: str
-    real_world_concerns: str
-    moderation_style: str
-    additional_context: Optional[str] = None
+def _require_one(model: BaseModel, *fields: str):
+    if all(getattr(model, field) is None for field in fields):
+        raise ValueError(f"One of {', '.join(fields)} is required")
+    return model
+
 
 class EnrichedIntent(BaseModel):
     intent: str
     context: dict
     requirements: List[str]
+    # A policy already generated from a near-identical intent, when semantic caching is on
+    semantic_match: Optional[SemanticMatch] = None
+    machine: Optional[MachinePolicy] = None
+
+class FalseHitRequest(BaseModel):
+    match_id: str
+
+class BatchGenerateRequest(BaseModel):
+    intents: List[InitialIntent]
+    concurrency: int = Field(default=DEFAULT_BATCH_CONCURRENCY, ge=1, le=32)
+
+class JobRequest(BaseModel):
+    intent: str
+    kind: Literal["generate", "pipeline"] = "generate"
+
+class JobCreatedResponse(BaseModel):
+    id: str
+    status: str
+
+class JobStatusResponse(BaseModel):
+    # What clients polling a job see; the lease and its owner token stay internal to the workers
+    id: str
+    kind: str
+    status: str
+    timings: Dict[str, float]
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int
+    result: Optional[PipelineResult] = None
+    error: Optional[str] = None
 
 class MachinePolicyRequest(BaseModel):
     intent: str
 
+class PolicyReference(BaseModel):
+    # Lets a request name a stored policy instead of sending the whole thing
+    policy_id: Optional[str] = None
+    version: Optional[int] = Field(default=None, description="Stored version to use; defaults to the latest")
+
 class MachinePolicyResponse(BaseModel):
     machine: MachinePolicy
+    policy_id: Optional[str] = None
+    version: Optional[int] = None
+    semantic_match: Optional[SemanticMatch] = None
 
-class RefinementRequest(BaseModel):
-    machine: MachinePolicy
+class RefinementRequest(PolicyReference):
+    machine: Optional[MachinePolicy] = None
     reviewed_examples: List[SyntheticExample]
 
-class DerivedPoliciesRequest(BaseModel):
-    machine: MachinePolicy
+    @model_validator(mode="after")
+    def _policy_given(self):
+        return _require_one(self, "machine", "policy_id")
+
+class IncrementalRefinementRequest(PolicyReference):
+    # Start a history from `machine` or a stored policy, or continue the one returned by the previous round
+    history: Optional[RefinementHistory] = None
+    machine: Optional[MachinePolicy] = None
+    reviewed_examples: List[SyntheticExample] = Field(default_factory=list)
+    from_review_queue: bool = Field(
+        default=False, description="Also fold in reviews posted to /api/examples/review that no version has incorporated yet"
+    )
+
+    @model_validator(mode="after")
+    def _policy_given(self):
+        if self.from_review_queue and self.policy_id is None:
+            raise ValueError("from_review_queue requires policy_id")
+        return _require_one(self, "history", "machine", "policy_id")
+
+class IncrementalRefinementResponse(BaseModel):
+    history: RefinementHistory
+    policy_id: Optional[str] = None
+    version: Optional[int] = None
+
+class DerivedPoliciesRequest(PolicyReference):
+    machine: Optional[MachinePolicy] = None
+
+    @model_validator(mode="after")
+    def _policy_given(self):
+        return _require_one(self, "machine", "policy_id")
 
 class DerivedPoliciesResponse(BaseModel):
     public: PublicPolicy
     moderator: ModeratorPolicy
 
-class ExampleRequest(BaseModel):
-    policy: MachinePolicy
+class ExampleRequest(PolicyReference):
+    policy: Optional[MachinePolicy] = None
+    # "drop" removes near-duplicates of earlier examples for the policy; "regenerate" also asks for replacements
+    dedup: Literal["off", "drop", "regenerate"] = "regenerate"
+
+    @model_validator(mode="after")
+    def _policy_given(self):
+        return _require_one(self, "policy", "policy_id")
+
+class ClassifyRequest(PolicyReference):
+    machine: Optional[MachinePolicy] = None
+    texts: List[str] = Field(..., min_length=1, max_length=1000)
+    prefilter: bool = Field(default=True, description="Settle clear-cut texts with rules extracted from the policy")
+
+    @model_validator(mode="after")
+    def _policy_given(self):
+        return _require_one(self, "machine", "policy_id")
+
+class ClassifyResult(BaseModel):
+    label: Optional[str] = None
+    confidence: Optional[float] = None
+    path: Optional[str] = Field(default=None, description="rule or llm")
+    error: Optional[str] = None
+
+class ClassifyResponse(BaseModel):
+    results: List[ClassifyResult]
+    routes: Dict[str, float] = Field(..., description="Fraction of these texts handled by each path")
 
 class ExampleResponse(BaseModel):
     examples: List[SyntheticExample]
+    generated: Optional[int] = None
+    duplicates: Optional[int] = None
+    dedup_rate: Optional[float] = None
+
+class ExamplesReviewRequest(PolicyReference):
+    # Reviews are stored against a policy version: the one given, or the latest
+    examples: List[ReviewedExample] = Field(..., max_length=10_000)
 
-class ReviewedExample(SyntheticExample):
-    is_approved: bool
-    feedback: Optional[str] = None
+    @model_validator(mode="after")
+    def _policy_given(self):
+        return _require_one(self, "policy_id")
 
-class ExamplesReviewRequest(BaseModel):
-    examples: List[ReviewedExample]
+class ExamplesReviewResponse(BaseModel):
+    policy_id: str
+    version: int
+    stored: int
+    pending: int
+    agreement: List[LabelAgreement]
 
 # Keep these for backward compatibility
 class GenerateRequest(BaseModel):
@@ -59,6 +168,39 @@ class PolicyResponse(BaseModel):
     public: PublicPolicy
     moderator: ModeratorPolicy
     machine: MachinePolicy
+    policy_id: Optional[str] = None
+    version: Optional[int] = None
+    semantic_match: Optional[SemanticMatch] = None
+
+class PolicyCreateRequest(BaseModel):
+    machine: MachinePolicy
+    public: Optional[PublicPolicy] = None
+    moderator: Optional[ModeratorPolicy] = None
+
+class PolicyExportRequest(BaseModel):
+    policy_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    kind: BundleKind = "zip"
+    formats: List[ExportFormat] = Field(default=["markdown"], min_length=1)
+
+class PolicyExportResponse(BaseModel):
+    path: str
+    count: int
+
+class PolicySearchParams(BaseModel):
+    slug: Optional[str] = None
+    severity: Optional[Severity] = None
+    created_after: Optional[float] = Field(default=None, description="Unix timestamp")
+    created_before: Optional[float] = Field(default=None, description="Unix timestamp")
+    limit: int = Field(default=50, ge=1, le=500)
+    offset: int = Field(default=0, ge=0)
+
+class CatalogParams(PolicySearchParams):
+    limit: int = Field(default=10_000, ge=1, le=1_000_000)
+    policy_type: Literal["machine", "public", "moderator"] = "public"
+
+class PolicyPreviewRequest(BaseModel):
+    policy_type: Literal["machine", "public", "moderator"] = "machine"
+    policy: dict
 
 class PolicyPreviewResponse(BaseModel):
     markdown: str
@@ -0,0 +1,43 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def with_heartbeat(events: AsyncIterator[str], interval: float = 15.0) -> AsyncIterator[str]:
+    # Emit SSE comments while waiting so idle-timeout proxies keep the connection open
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+        finally:
+            await queue.put(finished)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), interval)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is finished:
+                break
+            yield event
+        await task
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
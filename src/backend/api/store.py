@@ -0,0 +1,57 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request
+from policy_forge.schema import MachinePolicy
+from policy_forge.reviews import ReviewStore
+from policy_forge.semantic_cache import SemanticCache, SemanticMatch
+from policy_forge.store import PolicyStore, StoredPolicy
+
+
+def get_store(http_request: Request) -> PolicyStore:
+    return http_request.app.state.store
+
+
+def get_reviews(http_request: Request) -> ReviewStore:
+    return http_request.app.state.reviews
+
+
+def get_semantic_cache(http_request: Request) -> Optional[SemanticCache]:
+    return http_request.app.state.semantic_cache
+
+
+async def load_policy(http_request: Request, policy_id: str, version: Optional[int] = None) -> StoredPolicy:
+    policy = await get_store(http_request).get(policy_id, version)
+    if policy is None:
+        suffix = f" version {version}" if version is not None else ""
+        raise HTTPException(status_code=404, detail=f"Policy {policy_id}{suffix} not found")
+    return policy
+
+
+async def resolve_machine(
+    http_request: Request,
+    machine: Optional[MachinePolicy],
+    policy_id: Optional[str],
+    version: Optional[int] = None,
+) -> Tuple[MachinePolicy, Optional[StoredPolicy]]:
+    # A request carries either the policy itself or a reference to a stored one
+    if policy_id is None:
+        return machine, None
+    stored = await load_policy(http_request, policy_id, version)
+    return stored.machine, stored
+
+
+async def semantic_hit(
+    http_request: Request, intent: str, derived: bool = False
+) -> Tuple[Optional[SemanticMatch], Optional[StoredPolicy]]:
+    # The stored policy generated from a near-identical earlier intent, when semantic caching is on
+    semantic = get_semantic_cache(http_request)
+    match = await semantic.lookup(intent, derived) if semantic is not None else None
+    if match is None:
+        return None, None
+    return match, await load_policy(http_request, match.policy_id, match.version)
+
+
+async def remember_intent(http_request: Request, intent: str, stored: StoredPolicy):
+    semantic = get_semantic_cache(http_request)
+    if semantic is not None:
+        derived = stored.public is not None and stored.moderator is not None
+        await semantic.add(intent, stored.id, stored.version, derived)
@@ -0,0 +1,485 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Literal, Optional, Protocol
+
+from pydantic import BaseModel, Field
+
+from policy_forge import pipeline, scheduler, shared
+
+JobKind = Literal["generate", "pipeline"]
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+# Running jobs are requeued once their worker has stopped renewing the lease for this long
+DEFAULT_JOB_LEASE = float(os.getenv("POLICY_FORGE_JOB_LEASE", "60"))
+# Finished jobs the in-memory queue keeps for status lookups, and for how many seconds
+DEFAULT_KEEP_FINISHED = int(os.getenv("POLICY_FORGE_JOBS_KEEP", "1000"))
+DEFAULT_FINISHED_TTL = float(os.getenv("POLICY_FORGE_JOBS_TTL", "86400"))
+
+logger = logging.getLogger(__name__)
+
+RUNNERS = {
+    "generate": pipeline.run_generate,
+    "pipeline": pipeline.run_pipeline,
+}
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    kind: JobKind = "generate"
+    intent: str
+    status: JobStatus = "queued"
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each finished stage")
+    created_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    lease_until: Optional[float] = None
+    # Token of the claim running the job; saves made under any other claim are refused
+    owner: Optional[str] = None
+    result: Optional[pipeline.PipelineResult] = None
+    error: Optional[str] = None
+
+
+class JobQueue(Protocol):
+    async def put(self, job: Job) -> None: ...
+
+    async def claim(self, lease: float = DEFAULT_JOB_LEASE) -> Optional[Job]: ...
+
+    async def save(self, job: Job) -> bool: ...
+
+    async def get(self, job_id: str) -> Optional[Job]: ...
+
+    async def recover(self) -> int: ...
+
+
+def _start(job: Job, lease: float):
+    job.status = "running"
+    job.started_at = time.time()
+    job.lease_until = job.started_at + lease
+    job.attempts += 1
+    job.owner = uuid.uuid4().hex
+
+
+def _requeue(job: Job):
+    job.status = "queued"
+    # Fences off the worker whose lease lapsed: its saves no longer match
+    job.owner = None
+
+
+def _expired(job: Job, now: float) -> bool:
+    # Jobs saved before leases existed have none, and were always requeued on startup
+    return job.status == "running" and (job.lease_until is None or job.lease_until < now)
+
+
+class MemoryJobQueue:
+    """Jobs held in process memory. As in the shared queues, only the claim that owns a job can save it.
+
+    Finished jobs stay readable until `finished_ttl` seconds after they finish, or until
+    `max_finished` newer ones have finished, whichever comes first.
+    """
+
+    def __init__(self, max_finished: int = DEFAULT_KEEP_FINISHED, finished_ttl: Optional[float] = DEFAULT_FINISHED_TTL):
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._queued: List[str] = []
+        # Finished job ID -> when it finished, oldest first
+        self._finished: OrderedDict[str, float] = OrderedDict()
+
+    def _prune(self):
+        cutoff = time.time() - self.finished_ttl if self.finished_ttl else None
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and (cutoff is None or finished_at >= cutoff):
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    async def put(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._queued.append(job.id)
+
+    async def claim(self, lease: float = DEFAULT_JOB_LEASE) -> Optional[Job]:
+        if not self._queued:
+            return None
+        job = self._jobs[self._queued.pop(0)]
+        _start(job, lease)
+        return job.model_copy(deep=True)
+
+    async def save(self, job: Job) -> bool:
+        stored = self._jobs.get(job.id)
+        if stored is None or stored.owner != job.owner:
+            return False
+        self._jobs[job.id] = job.model_copy(deep=True)
+        if job.status in ("succeeded", "failed"):
+            self._finished[job.id] = job.finished_at or time.time()
+            self._prune()
+        return True
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        job = self._jobs.get(job_id)
+        return job.model_copy(deep=True) if job else None
+
+    async def recover(self) -> int:
+        return 0
+
+
+class SQLiteJobQueue:
+    """Persistent queue that any number of worker processes on one node can share.
+
+    Claims take the database write lock, so each job goes to one worker. A running job's
+    lease is renewed while it runs; jobs whose worker died are requeued once it lapses.
+    Saves are conditional on the claim's owner token, so a worker whose lease lapsed can't
+    overwrite the job once another worker has claimed it.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                owner TEXT,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        # Databases created before claims had owners
+        if "owner" not in {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)")
+        self._lock = threading.Lock()
+
+    def _write(self, job: Job):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, status, created_at, owner, data) VALUES (?, ?, ?, ?, ?)",
+            (job.id, job.status, job.created_at, job.owner, job.model_dump_json()),
+        )
+
+    def _claim(self, lease: float) -> Optional[Job]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                job = Job.model_validate_json(row[0])
+                _start(job, lease)
+                self._write(job)
+                self._conn.execute("COMMIT")
+                return job
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _put(self, job: Job):
+        with self._lock:
+            self._write(job)
+
+    def _save(self, job: Job) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, data = ? WHERE id = ? AND owner = ?",
+                (job.status, job.model_dump_json(), job.id, job.owner),
+            )
+        return cursor.rowcount == 1
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def _recover(self) -> int:
+        now = time.time()
+        recovered = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT data FROM jobs WHERE status = 'running'").fetchall()
+                for (data,) in rows:
+                    job = Job.model_validate_json(data)
+                    if _expired(job, now):
+                        _requeue(job)
+                        self._write(job)
+                        recovered += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return recovered
+
+    async def put(self, job: Job) -> None:
+        await asyncio.to_thread(self._put, job)
+
+    async def claim(self, lease: float = DEFAULT_JOB_LEASE) -> Optional[Job]:
+        return await asyncio.to_thread(self._claim, lease)
+
+    async def save(self, job: Job) -> bool:
+        return await asyncio.to_thread(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def recover(self) -> int:
+        return await asyncio.to_thread(self._recover)
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisJobQueue:
+    """Queue shared by every worker and node using the same Redis.
+
+    Jobs are JSON strings, waiting IDs a list, and running IDs a sorted set scored by lease
+    expiry. Claims, requeues and saves are WATCH/MULTI transactions, so each job goes to one
+    worker, a lapsed lease is requeued once, whichever worker notices first, and only the
+    claim that owns a job can save it.
+    """
+
+    def __init__(self, client, prefix: str = shared.DEFAULT_REDIS_PREFIX):
+        self._client = client
+        self._prefix = f"{prefix}jobs:"
+        self._queued = f"{self._prefix}queued"
+        self._running = f"{self._prefix}running"
+
+    def _key(self, job_id: str) -> str:
+        return f"{self._prefix}{job_id}"
+
+    def _put(self, job: Job):
+        with self._client.pipeline() as pipe:
+            pipe.set(self._key(job.id), job.model_dump_json())
+            pipe.rpush(self._queued, job.id)
+            pipe.execute()
+
+    def _claim(self, lease: float) -> Optional[Job]:
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._queued)
+                    job_id = pipe.lindex(self._queued, 0)
+                    if job_id is None:
+                        pipe.unwatch()
+                        return None
+                    data = pipe.get(self._key(job_id.decode("utf-8")))
+                    if data is None:
+                        # The job's key was deleted from under the queue; drop its ID and claim the next
+                        pipe.multi()
+                        pipe.lpop(self._queued)
+                        pipe.execute()
+                        continue
+                    job = Job.model_validate_json(data)
+                    _start(job, lease)
+                    pipe.multi()
+                    pipe.lpop(self._queued)
+                    pipe.set(self._key(job.id), job.model_dump_json())
+                    pipe.zadd(self._running, {job.id: job.lease_until})
+                    pipe.execute()
+                    return job
+                except shared.redis.WatchError:
+                    # Another worker claimed the head of the queue first
+                    continue
+
+    def _save(self, job: Job) -> bool:
+        name = self._key(job.id)
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(name)
+                    data = pipe.get(name)
+                    if data is None or Job.model_validate_json(data).owner != job.owner:
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.set(name, job.model_dump_json())
+                    if job.status == "running":
+                        pipe.zadd(self._running, {job.id: job.lease_until})
+                    else:
+                        pipe.zrem(self._running, job.id)
+                    pipe.execute()
+                    return True
+                except shared.redis.WatchError:
+                    # Requeued or claimed meanwhile; check the owner again
+                    continue
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        data = self._client.get(self._key(job_id))
+        return Job.model_validate_json(data) if data is not None else None
+
+    def _recover(self) -> int:
+        now = time.time()
+        recovered = 0
+        for job_id in self._client.zrangebyscore(self._running, "-inf", now):
+            job_id = job_id.decode("utf-8")
+            with self._client.pipeline() as pipe:
+                try:
+                    pipe.watch(self._key(job_id))
+                    data = pipe.get(self._key(job_id))
+                    job = Job.model_validate_json(data) if data is not None else None
+                    if job is None or not _expired(job, now):
+                        pipe.unwatch()
+                        continue
+                    _requeue(job)
+                    pipe.multi()
+                    pipe.set(self._key(job_id), job.model_dump_json())
+                    pipe.zrem(self._running, job_id)
+                    pipe.rpush(self._queued, job_id)
+                    pipe.execute()
+                    recovered += 1
+                except shared.redis.WatchError:
+                    # Its worker renewed the lease, or another worker requeued it, meanwhile
+                    continue
+        return recovered
+
+    async def put(self, job: Job) -> None:
+        await asyncio.to_thread(self._put, job)
+
+    async def claim(self, lease: float = DEFAULT_JOB_LEASE) -> Optional[Job]:
+        return await asyncio.to_thread(self._claim, lease)
+
+    async def save(self, job: Job) -> bool:
+        return await asyncio.to_thread(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def recover(self) -> int:
+        return await asyncio.to_thread(self._recover)
+
+
+class JobWorkerPool:
+    def __init__(
+        self, queue: JobQueue, workers: int = 4, poll_interval: float = 1.0, lease: float = DEFAULT_JOB_LEASE
+    ):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def submit(self, kind: JobKind, intent: str) -> Job:
+        job = Job(kind=kind, intent=intent)
+        await self.queue.put(job)
+        self._wakeup.set()
+        return job
+
+    async def start(self):
+        await self.queue.recover()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self):
+        # Cancelled jobs stay "running" in a persistent queue until their lease lapses and recover() requeues them
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self.queue.claim(self.lease)
+            except Exception:
+                # e.g. the database or Redis is unreachable; the worker waits a poll interval and tries again
+                logger.exception("Failed to claim a job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except Exception:
+                # Only saving the outcome can fail here; the lease lapses and another worker reruns the job
+                logger.exception("Failed to save job %s", job.id)
+
+    async def _recover(self):
+        # Other workers' jobs too: whichever process notices a lapsed lease first requeues it
+        while True:
+            await asyncio.sleep(self.lease / 2)
+            try:
+                await self.queue.recover()
+            except Exception:
+                logger.exception("Failed to requeue jobs with lapsed leases")
+
+    async def _run(self, job: Job):
+        saves: List[asyncio.Task] = []
+        lost = False
+
+        def persist():
+            # Persist progress without blocking the pipeline, keeping saves in order
+            snapshot = job.model_copy(deep=True)
+            previous = saves[-1] if saves else None
+
+            async def save():
+                nonlocal lost
+                if previous is not None:
+                    await asyncio.gather(previous, return_exceptions=True)
+                if not await self.queue.save(snapshot) and not lost:
+                    # The lease lapsed and another worker claimed the job; its run is the one that counts
+                    lost = True
+                    work.cancel()
+
+            saves.append(asyncio.create_task(save()))
+
+        def on_stage(name: str, seconds: float):
+            job.timings[name] = seconds
+            persist()
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(self.lease / 3)
+                job.lease_until = time.time() + self.lease
+                persist()
+
+        # Nobody is waiting on the connection, so interactive requests go first
+        with scheduler.priority(scheduler.BATCH):
+            work = asyncio.create_task(RUNNERS[job.kind](job.intent, on_stage=on_stage))
+        renewal = asyncio.create_task(heartbeat())
+        try:
+            result = await work
+            job.status = "succeeded"
+            job.result = result
+        except asyncio.CancelledError:
+            # Cancelled by a lost lease rather than by stop(), there's nothing left to save
+            if not lost or asyncio.current_task().cancelling():
+                raise
+            logger.warning("Job %s was claimed by another worker; abandoning this run", job.id)
+            return
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            renewal.cancel()
+        job.lease_until = None
+        job.finished_at = time.time()
+        await asyncio.gather(*saves, return_exceptions=True)
+        if not await self.queue.save(job):
+            logger.warning("Job %s was claimed by another worker; dropping this run's outcome", job.id)
+
+
+def queue_from_env() -> JobQueue:
+    # In-memory by default; set POLICY_FORGE_JOBS_DB to keep jobs across restarts, or use Redis to share them between nodes
+    client = shared.redis_from_env()
+    if client is not None:
+        return RedisJobQueue(client)
+    path = os.getenv("POLICY_FORGE_JOBS_DB")
+    return SQLiteJobQueue(path) if path else MemoryJobQueue()
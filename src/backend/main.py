@@ -1,19 +1,55 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.api.routes import router as api_router
 from fastapi.middleware.cors import CORSMiddleware
+from backend.middleware import CacheControlMiddleware, MetricsMiddleware
+from backend.jobs import JobWorkerPool, queue_from_env
+from policy_forge import llm
+from policy_forge.dedup import DedupRegistry
+from policy_forge.export import Exporter
+from policy_forge.reviews import reviews_from_env
+from policy_forge.semantic_cache import semantic_cache_from_env
+from policy_forge.store import store_from_env
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled upstream client for every request handled by this process
+    await llm.startup(llm.LLMSettings.from_env())
+    app.state.jobs = JobWorkerPool(
+        queue_from_env(),
+        workers=int(os.getenv("POLICY_FORGE_JOB_WORKERS", "4")),
+    )
+    await app.state.jobs.start()
+    app.state.store = store_from_env()
+    app.state.reviews = reviews_from_env()
+    app.state.exporter = Exporter()
+    app.state.dedup = DedupRegistry(threshold=float(os.getenv("POLICY_FORGE_DEDUP_THRESHOLD", "0.7")))
+    app.state.semantic_cache = semantic_cache_from_env()
+    yield
+    await app.state.jobs.stop()
+    app.state.store.close()
+    app.state.reviews.close()
+    await llm.shutdown()
+
 
 app = FastAPI(
     title="Policy Forge API",
     description="API for generating and refining content moderation policies",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix="/api")
 
+app.add_middleware(CacheControlMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:5173"], 
+    allow_origins=["http://localhost:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
@@ -0,0 +1,51 @@
+import time
+
+from policy_forge import cache, metrics
+
+
+class CacheControlMiddleware:
+    """Lets clients skip the response cache with `Cache-Control: no-cache`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = dict(scope["headers"])
+            directives = headers.get(b"cache-control", b"").decode("latin-1").lower()
+            if "no-cache" in directives or "no-store" in directives:
+                with cache.bypass():
+                    return await self.app(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """Records request latency per route template and the number of requests in flight."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            with metrics.HTTP_IN_FLIGHT.track():
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            route = scope.get("route")
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
@@ -1,13 +1,23 @@
+import json
+import sys
+from pathlib import Path
+from typing import Optional
 import typer
 from dotenv import load_dotenv
 from policy_forge import (
+    bulk,
+    classifier,
+    evaluation,
+    llm,
+    pipeline,
     policy_writer,
     example_gen,
     reviewer,
     refiner,
     writer,
 )
-from policy_forge.intent_builder import IntentBuilder
+from policy_forge.intent_builder import IntentBuilder, format_intent
+from policy_forge.schema import InitialIntent, MachinePolicy
 
 app = typer.Typer()
 load_dotenv()
@@ -54,6 +64,126 @@ def new():
         return
 
     typer.echo("💾 Saving policies to markdown...")
-    writer.save_policies_to_markdown(public, moderator, machine_refined)
+    paths = writer.save_policies_to_markdown(public, moderator, machine_refined)
 
-    typer.echo("🎉 Done! Your policies have been saved to output/")
+    typer.echo(f"🎉 Done! Your policies have been saved to {paths[0].parent}/")
+
+
+def _read_intents(path: Path) -> list[str]:
+    intents = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = InitialIntent.model_validate_json(line)
+            except ValueError as e:
+                raise typer.BadParameter(f"line {line_no}: {e}", param_hint="INTENTS")
+            intents.append(format_intent(record.model_dump()))
+    return intents
+
+
+@app.command()
+def batch(
+    intents_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="JSONL file of InitialIntent records"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write results here instead of stdout"),
+    concurrency: int = typer.Option(pipeline.DEFAULT_BATCH_CONCURRENCY, min=1, help="Intents processed at once"),
+):
+    intents = _read_intents(intents_file)
+    typer.echo(f"⚙️ Running {len(intents)} intents with concurrency {concurrency}...", err=True)
+
+    async def run():
+        failed = 0
+        out = open(output, "w") if output else sys.stdout
+        try:
+            async for result in pipeline.run_batch(intents, concurrency=concurrency):
+                failed += result.status == "error"
+                out.write(result.model_dump_json() + "\n")
+                out.flush()
+        finally:
+            if output:
+                out.close()
+        return failed
+
+    failed = llm.run(run)
+    typer.echo(f"🎉 Done! {len(intents) - failed} succeeded, {failed} failed.", err=True)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command(name="bulk")
+def bulk_generate(
+    intents_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="JSONL file of InitialIntent records"),
+    workdir: Path = typer.Option(Path("bulk"), help="Where request, state and result files are kept; rerun to resume"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write results here instead of stdout"),
+    poll_interval: float = typer.Option(60.0, help="Seconds between batch status checks"),
+    local: bool = typer.Option(False, "--local", help="Answer batches offline with the stub backend"),
+):
+    intents = _read_intents(intents_file)
+    if local:
+        client = bulk.LocalBatchClient(workdir / "local-batches", bulk.stub_responder())
+    else:
+        client = bulk.OpenAIBatchClient()
+    typer.echo(f"📦 Submitting {len(intents)} intents to the Batch API (workdir: {workdir})...", err=True)
+    results = bulk.run_bulk(intents, client, workdir, poll_interval=poll_interval)
+
+    out = open(output, "w") if output else sys.stdout
+    try:
+        for result in results:
+            out.write(result.model_dump_json() + "\n")
+    finally:
+        if output:
+            out.close()
+
+    failed = sum(1 for result in results if result.errors)
+    typer.echo(f"🎉 Done! {len(results) - failed} complete, {failed} with errors.", err=True)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def evaluate(
+    policy_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="Machine policy as JSON"),
+    dataset: Path = typer.Argument(..., exists=True, dir_okay=False, help="JSONL file of SyntheticExample records"),
+    checkpoint: Optional[Path] = typer.Option(None, help="Save predictions here as they finish; rerun to resume"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Write the report here instead of stdout"),
+    concurrency: int = typer.Option(evaluation.DEFAULT_EVAL_CONCURRENCY, min=1, help="Batches classified at once"),
+    max_batch: int = typer.Option(
+        classifier.DEFAULT_MAX_BATCH_ITEMS, min=1, help="Records packed into one call; 1 sends each on its own"
+    ),
+    batch_tokens: int = typer.Option(classifier.DEFAULT_BATCH_TOKENS, min=1, help="Token budget for one call's records"),
+    prefilter: bool = typer.Option(False, "--prefilter", help="Settle clear-cut records with rules extracted from the policy"),
+):
+    try:
+        policy = MachinePolicy.model_validate_json(policy_file.read_text())
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="POLICY_FILE")
+    typer.echo(f"🧪 Evaluating {policy.name} on {dataset} with concurrency {concurrency}...", err=True)
+
+    def progress(done: int, errors: int):
+        typer.echo(f"  {done} records scored, {errors} failed", err=True)
+
+    report = evaluation.evaluate(
+        policy,
+        dataset,
+        checkpoint=checkpoint,
+        concurrency=concurrency,
+        on_progress=progress,
+        batch_tokens=batch_tokens,
+        max_batch=max_batch,
+        prefilter=prefilter,
+    )
+    if output:
+        output.write_text(report.model_dump_json(indent=2))
+    else:
+        typer.echo(report.model_dump_json(indent=2))
+    accuracy = f"{report.accuracy:.1%}" if report.accuracy is not None else "n/a"
+    typer.echo(
+        f"🎉 Done! Accuracy {accuracy} over {report.total} records, {report.throughput:.1f} records/s.", err=True
+    )
+    if prefilter:
+        shares = ", ".join(f"{path} {count / report.total:.1%}" for path, count in report.routes.items())
+        typer.echo(f"🔀 Records by path: {shares}", err=True)
+    if report.errors:
+        typer.echo(f"⚠️ {report.errors} records failed; rerun with the same --checkpoint to retry them.", err=True)
+        raise typer.Exit(code=1)
@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import types
+import typing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Generic, List, Literal, Optional, Protocol, Tuple, Type, TypeVar, Union
+
+import httpx
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from policy_forge import metrics
+from policy_forge.prompts import prefix_key
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cached_ratio(self) -> float:
+        """Fraction of prompt tokens served from the provider's prompt-prefix cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+@dataclass
+class Completion(Generic[T]):
+    parsed: T
+    usage: Optional[Usage] = None
+
+
+class LLMBackend(Protocol):
+    name: str
+
+    async def parse(self, model: str, messages: list, response_format: Type[T]) -> Completion[T]: ...
+
+    def stream(
+        self, model: str, messages: list, response_format: Type[T]
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        """Yield (field, value) as each top-level field completes, then (None, Completion)."""
+        ...
+
+    async def aclose(self) -> None: ...
+
+
+def _usage(raw) -> Optional[Usage]:
+    if raw is None:
+        return None
+    details = getattr(raw, "prompt_tokens_details", None)
+    return Usage(
+        prompt_tokens=raw.prompt_tokens,
+        completion_tokens=raw.completion_tokens,
+        cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details else 0,
+    )
+
+
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self, settings):
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(settings.request_timeout, connect=settings.connect_timeout),
+        )
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=http_client,
+            # Retries are owned by the scheduler so they count against the rate budgets
+            max_retries=0,
+        )
+
+    async def parse(self, model: str, messages: list, response_format: Type[T]) -> Completion[T]:
+        raw = await self.client.beta.chat.completions.with_raw_response.parse(
+            model=model,
+            messages=messages,
+            response_format=response_format,
+            # Sent as a raw body field: the pinned client predates a prompt_cache_key parameter
+            extra_body={"prompt_cache_key": prefix_key(messages, response_format)},
+        )
+        # Parsed separately from the request so JSON decoding and validation can be timed on their own
+        with metrics.LLM_PARSE_SECONDS.time(response_format=response_format.__name__):
+            response = raw.parse()
+        return Completion(parsed=response.choices[0].message.parsed, usage=_usage(response.usage))
+
+    async def stream(
+        self, model: str, messages: list, response_format: Type[T]
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        emitted: list[str] = []
+        async with self.client.beta.chat.completions.stream(
+            model=model,
+            messages=messages,
+            response_format=response_format,
+            extra_body={"prompt_cache_key": prefix_key(messages, response_format)},
+            stream_options={"include_usage": True},
+        ) as stream:
+            async for event in stream:
+                if event.type != "content.delta" or not isinstance(event.parsed, dict):
+                    continue
+                # Fields arrive in order, so a field is complete once the next one starts
+                keys = list(event.parsed)
+                for key in keys[len(emitted) : -1]:
+                    emitted.append(key)
+                    yield key, event.parsed[key]
+            response = await stream.get_final_completion()
+        parsed = response.choices[0].message.parsed
+        for key, value in parsed.model_dump(mode="json").items():
+            if key not in emitted:
+                yield key, value
+        yield None, Completion(parsed=parsed, usage=_usage(response.usage))
+
+    async def aclose(self):
+        await self.client.close()
+
+
+@dataclass
+class LatencyModel:
+    """Seconds of simulated upstream latency per call.
+
+    `kind` is "fixed" (a), "uniform" (a to b), "normal" (mean a, stddev b) or
+    "lognormal" (median a, sigma b).
+    """
+
+    kind: Literal["fixed", "uniform", "normal", "lognormal"] = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        # e.g. "fixed:0.5", "uniform:0.2,1.5", "lognormal:2.0,0.4"
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v.strip()]
+        return cls(kind, *values)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.a, self.b))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        raise ValueError(f"Unknown latency distribution: {self.kind}")
+
+
+_WORDS = (
+    "policy content user platform review context harassment community safety signal report "
+    "threshold pattern message account behavior intent moderation evidence escalation label"
+).split()
+
+
+class StubBackend:
+    """Returns schema-valid objects without touching the network.
+
+    Output is a pure function of (model, messages, schema), so repeated runs are comparable.
+    Only the simulated latency is random, drawn from a seeded generator. Usage reports
+    cached tokens the way OpenAI's prompt caching does: the longest previously seen prompt
+    prefix, in 128-token blocks, once it reaches 1024 tokens.
+    """
+
+    name = "stub"
+
+    CACHE_BLOCK_TOKENS = 128
+    CACHE_MIN_TOKENS = 1024
+
+    def __init__(self, latency: Optional[LatencyModel] = None, seed: int = 0, list_length: int = 5):
+        self.latency = latency or LatencyModel()
+        self.list_length = list_length
+        self._latency_rng = random.Random(seed)
+        self._seen_prefixes: set = set()
+
+    def build(self, model: str, messages: list, response_format: Type[T]) -> T:
+        digest = hashlib.sha256(
+            json.dumps([model, messages, response_format.__name__], sort_keys=True, default=str).encode()
+        ).digest()
+        rng = random.Random(digest)
+        value = self._value(response_format, rng, response_format.__name__)
+        with metrics.LLM_PARSE_SECONDS.time(response_format=response_format.__name__):
+            return response_format.model_validate(value)
+
+    def _value(self, annotation: Any, rng: random.Random, name: str) -> Any:
+        origin = typing.get_origin(annotation)
+        args = typing.get_args(annotation)
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return {
+                field_name: self._value(field.annotation, rng, field_name)
+                for field_name, field in annotation.model_fields.items()
+            }
+        if origin is Literal:
+            return rng.choice(args)
+        if origin in (Union, types.UnionType):
+            options = [arg for arg in args if arg is not type(None)]
+            return self._value(options[0], rng, name)
+        if origin in (list, List):
+            return [self._value(args[0], rng, name) for _ in range(self.list_length)]
+        if annotation is bool:
+            return rng.random() < 0.5
+        if annotation is int:
+            return rng.randint(0, 100)
+        if annotation is float:
+            return round(rng.random(), 3)
+        if annotation is str:
+            words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 18)))
+            return f"{name.replace('_', ' ')}: {words}"
+        raise TypeError(f"StubBackend cannot generate values for {annotation!r}")
+
+    def _cached_tokens(self, text: str) -> int:
+        block_chars = self.CACHE_BLOCK_TOKENS * 4
+        digest = hashlib.sha256()
+        cached = 0
+        for start in range(0, len(text) - block_chars + 1, block_chars):
+            digest.update(text[start : start + block_chars].encode())
+            key = digest.copy().hexdigest()
+            if key in self._seen_prefixes and cached == start // 4:
+                cached += self.CACHE_BLOCK_TOKENS
+            self._seen_prefixes.add(key)
+        return cached if cached >= self.CACHE_MIN_TOKENS else 0
+
+    def _usage(self, model: str, messages: list, response_format: Type[BaseModel], parsed: BaseModel) -> Usage:
+        # The schema is billed as part of the prompt, ahead of the messages; tokens are estimated at 4 chars each
+        text = json.dumps([model, response_format.model_json_schema(), messages], default=str)
+        return Usage(
+            prompt_tokens=len(text) // 4,
+            completion_tokens=len(parsed.model_dump_json()) // 4 + 1,
+            cached_tokens=self._cached_tokens(text),
+        )
+
+    async def _sleep(self, fraction: float = 1.0):
+        delay = self.latency.sample(self._latency_rng) * fraction
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def parse(self, model: str, messages: list, response_format: Type[T]) -> Completion[T]:
+        await self._sleep()
+        parsed = self.build(model, messages, response_format)
+        return Completion(parsed=parsed, usage=self._usage(model, messages, response_format, parsed))
+
+    async def stream(
+        self, model: str, messages: list, response_format: Type[T]
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        parsed = self.build(model, messages, response_format)
+        fields = parsed.model_dump(mode="json")
+        total = self.latency.sample(self._latency_rng)
+        for key, value in fields.items():
+            if total > 0:
+                await asyncio.sleep(total / len(fields))
+            yield key, value
+        yield None, Completion(parsed=parsed, usage=self._usage(model, messages, response_format, parsed))
+
+    async def aclose(self):
+        pass
+
+
+def backend_from_env(settings) -> LLMBackend:
+    name = os.getenv("POLICY_FORGE_LLM_BACKEND", "openai").lower()
+    if name == "openai":
+        return OpenAIBackend(settings)
+    if name == "stub":
+        return StubBackend(
+            latency=LatencyModel.parse(os.getenv("POLICY_FORGE_STUB_LATENCY", "fixed:0")),
+            seed=int(os.getenv("POLICY_FORGE_STUB_SEED", "0")),
+        )
+    raise ValueError(f"Unknown POLICY_FORGE_LLM_BACKEND: {name!r} (expected 'openai' or 'stub')")
@@ -0,0 +1,297 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Type, Union
+
+import openai
+from openai import OpenAI
+from pydantic import BaseModel, Field, ValidationError
+
+from policy_forge import llm
+from policy_forge.backends import StubBackend
+from policy_forge.example_gen import example_messages
+from policy_forge.policy_writer import machine_messages, moderator_messages, public_messages
+from policy_forge.prompts import prefix_key
+from policy_forge.schema import (
+    ExampleListResponse,
+    MachinePolicy,
+    ModeratorPolicy,
+    PublicPolicy,
+)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+RESPONSE_FORMATS: Dict[str, Type[BaseModel]] = {
+    model.__name__: model for model in (MachinePolicy, ExampleListResponse, ModeratorPolicy, PublicPolicy)
+}
+
+
+class BulkError(Exception):
+    pass
+
+
+class BulkResult(BaseModel):
+    index: int
+    intent: str
+    machine: Optional[MachinePolicy] = None
+    examples: Optional[ExampleListResponse] = None
+    public: Optional[PublicPolicy] = None
+    moderator: Optional[ModeratorPolicy] = None
+    errors: Dict[str, str] = Field(default_factory=dict)
+
+
+def response_format_param(response_format: Type[BaseModel]) -> dict:
+    """The `response_format` body field for a structured-output request, as `parse` sends it.
+
+    The strict schema comes from the SDK's public `pydantic_function_tool`, which applies the
+    same transformation (every property required, no additional properties) as `parse`.
+    """
+    function = openai.pydantic_function_tool(response_format)["function"]
+    return {
+        "type": "json_schema",
+        "json_schema": {"schema": function["parameters"], "name": function["name"], "strict": True},
+    }
+
+
+def build_request(custom_id: str, messages: list, response_format: Type[BaseModel], model: str = llm.DEFAULT_MODEL) -> dict:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": messages,
+            "response_format": response_format_param(response_format),
+            "prompt_cache_key": prefix_key(messages, response_format),
+        },
+    }
+
+
+def write_requests(path: Union[str, Path], requests: Iterable[dict]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+    return path
+
+
+def parse_results(lines: Iterable[str], formats: Dict[str, Type[BaseModel]]) -> Dict[str, Union[BaseModel, BulkError]]:
+    # Maps custom_id to the parsed object, or to the error that stopped it parsing
+    parsed: Dict[str, Union[BaseModel, BulkError]] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record["custom_id"]
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            parsed[custom_id] = BulkError(json.dumps(record.get("error") or response.get("body")))
+            continue
+        message = response["body"]["choices"][0]["message"]
+        if message.get("refusal"):
+            parsed[custom_id] = BulkError(f"refused: {message['refusal']}")
+            continue
+        try:
+            parsed[custom_id] = formats[custom_id].model_validate_json(message["content"])
+        except (ValidationError, KeyError, TypeError) as e:
+            parsed[custom_id] = BulkError(str(e))
+    for custom_id in formats:
+        parsed.setdefault(custom_id, BulkError("no result returned"))
+    return parsed
+
+
+class BatchClient(Protocol):
+    def submit(self, requests_path: Path) -> str: ...
+
+    def status(self, batch_id: str) -> str: ...
+
+    def results(self, batch_id: str) -> Iterator[str]: ...
+
+
+class OpenAIBatchClient:
+    def __init__(self, client: Optional[OpenAI] = None):
+        self.client = client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def submit(self, requests_path: Path) -> str:
+        with open(requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[str]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                yield from self.client.files.content(file_id).text.splitlines()
+
+
+class LocalBatchClient:
+    """File-backed stand-in for the Batch API.
+
+    `responder` receives each request body and returns the assistant message content.
+    Batches complete on the first status check.
+    """
+
+    def __init__(self, root: Union[str, Path], responder: Callable[[dict], str]):
+        self.root = Path(root)
+        self.responder = responder
+
+    def submit(self, requests_path: Path) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex}"
+        batch_dir = self.root / batch_id
+        batch_dir.mkdir(parents=True)
+        shutil.copy(requests_path, batch_dir / "input.jsonl")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch_dir = self.root / batch_id
+        if not (batch_dir / "output.jsonl").exists():
+            self._process(batch_dir)
+        return "completed"
+
+    def results(self, batch_id: str) -> Iterator[str]:
+        with open(self.root / batch_id / "output.jsonl") as f:
+            yield from f
+
+    def _process(self, batch_dir: Path):
+        with open(batch_dir / "input.jsonl") as src, open(batch_dir / "output.jsonl", "w") as out:
+            for line in src:
+                request = json.loads(line)
+                try:
+                    content = self.responder(request["body"])
+                    record = {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {
+                                "model": request["body"]["model"],
+                                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                            },
+                        },
+                        "error": None,
+                    }
+                except Exception as e:
+                    record = {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"code": "responder_error", "message": str(e)},
+                    }
+                out.write(json.dumps(record) + "\n")
+
+
+def stub_responder(backend: Optional[StubBackend] = None) -> Callable[[dict], str]:
+    # Lets LocalBatchClient answer requests offline with schema-valid stub output
+    backend = backend or StubBackend()
+
+    def respond(body: dict) -> str:
+        response_format = RESPONSE_FORMATS[body["response_format"]["json_schema"]["name"]]
+        return backend.build(body["model"], body["messages"], response_format).model_dump_json()
+
+    return respond
+
+
+def wait_for_batch(client: BatchClient, batch_id: str, poll_interval: float = 60.0, timeout: Optional[float] = None) -> str:
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        status = client.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            if status != "completed":
+                raise BulkError(f"batch {batch_id} ended with status {status}")
+            return status
+        if deadline is not None and time.monotonic() > deadline:
+            raise BulkError(f"timed out waiting for batch {batch_id} (last status {status})")
+        time.sleep(poll_interval)
+
+
+def _run_stage(
+    client: BatchClient,
+    workdir: Path,
+    stage: str,
+    requests: List[dict],
+    formats: Dict[str, Type[BaseModel]],
+    poll_interval: float,
+    timeout: Optional[float],
+) -> Dict[str, Union[BaseModel, BulkError]]:
+    # Submitted batch IDs are recorded so an interrupted run resumes polling instead of resubmitting
+    state_path = workdir / f"{stage}.batch"
+    if state_path.exists():
+        batch_id = state_path.read_text().strip()
+    else:
+        requests_path = write_requests(workdir / f"{stage}.requests.jsonl", requests)
+        batch_id = client.submit(requests_path)
+        state_path.write_text(batch_id)
+    wait_for_batch(client, batch_id, poll_interval=poll_interval, timeout=timeout)
+    results_path = workdir / f"{stage}.results.jsonl"
+    with open(results_path, "w") as f:
+        for line in client.results(batch_id):
+            f.write(line.rstrip("\n") + "\n")
+    with open(results_path) as f:
+        return parse_results(f, formats)
+
+
+def run_bulk(
+    intents: List[str],
+    client: BatchClient,
+    workdir: Union[str, Path],
+    poll_interval: float = 60.0,
+    timeout: Optional[float] = None,
+    model: str = llm.DEFAULT_MODEL,
+) -> List[BulkResult]:
+    """Generate machine, example, public and moderator outputs for many intents via two batches.
+
+    The first batch drafts every machine policy; the second derives examples and both
+    derived policies from them.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    results = [BulkResult(index=i, intent=intent) for i, intent in enumerate(intents)]
+
+    machine_formats = {f"machine-{r.index}": MachinePolicy for r in results}
+    machine_requests = [
+        build_request(f"machine-{r.index}", machine_messages(r.intent), MachinePolicy, model) for r in results
+    ]
+    machine_parsed = _run_stage(client, workdir, "machine", machine_requests, machine_formats, poll_interval, timeout)
+
+    derived_requests = []
+    derived_formats: Dict[str, Type[BaseModel]] = {}
+    for result in results:
+        parsed = machine_parsed[f"machine-{result.index}"]
+        if isinstance(parsed, BulkError):
+            result.errors["machine"] = str(parsed)
+            continue
+        result.machine = parsed
+        for stage, messages, response_format in (
+            ("examples", example_messages(parsed), ExampleListResponse),
+            ("moderator", moderator_messages(parsed), ModeratorPolicy),
+            ("public", public_messages(parsed), PublicPolicy),
+        ):
+            custom_id = f"{stage}-{result.index}"
+            derived_formats[custom_id] = response_format
+            derived_requests.append(build_request(custom_id, messages, response_format, model))
+
+    if derived_requests:
+        derived_parsed = _run_stage(client, workdir, "derived", derived_requests, derived_formats, poll_interval, timeout)
+        for custom_id, parsed in derived_parsed.items():
+            stage, index = custom_id.rsplit("-", 1)
+            result = results[int(index)]
+            if isinstance(parsed, BulkError):
+                result.errors[stage] = str(parsed)
+            else:
+                setattr(result, stage, parsed)
+
+    return results
@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol, Type
+
+from pydantic import BaseModel, ValidationError
+
+from policy_forge import metrics, shared
+
+# Response formats by qualified name, for decoding what RedisCache stores; every format a
+# worker looks up passes through `cache_key` first
+_formats: Dict[str, Type[BaseModel]] = {}
+
+
+def _format_name(response_format: Type[BaseModel]) -> str:
+    return f"{response_format.__module__}.{response_format.__qualname__}"
+
+
+def cache_key(model: str, messages: list, response_format: Type[BaseModel], namespace: str = "openai") -> str:
+    _formats.setdefault(_format_name(response_format), response_format)
+    payload = json.dumps(
+        {
+            # Keeps e.g. stub-backend output from ever being served as a real response
+            "namespace": namespace,
+            "model": model,
+            "messages": messages,
+            "schema": response_format.model_json_schema(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(Protocol):
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryCache:
+    """LRU cache of parsed response objects, held in process memory."""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache tier. Values are pickled, so hits are not re-validated.
+
+    Only point this at a file you trust: loading a pickle can run arbitrary code.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Every worker process on the node writes to the same file
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, blob, expires_at, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisCache:
+    """Cache tier shared by every worker and node using the same Redis.
+
+    A shared server isn't trusted the way a local file is, so values are stored as JSON rather
+    than pickled: a response as its format's name and `model_dump_json()`, anything else as
+    plain JSON. Hits are re-validated, and one that no longer fits its format is a miss.
+    Entries expire through Redis TTLs; size is bounded by the server's maxmemory policy.
+    """
+
+    def __init__(self, client, ttl: Optional[float] = None, prefix: str = shared.DEFAULT_REDIS_PREFIX):
+        self.ttl = ttl
+        self._client = client
+        self._prefix = f"{prefix}cache:"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(self._prefix + key)
+        if value is None:
+            return None
+        name, _, data = value.decode("utf-8").partition("\n")
+        if not name:
+            return json.loads(data)
+        response_format = _formats.get(name)
+        if response_format is None:
+            return None
+        try:
+            return response_format.model_validate_json(data)
+        except ValidationError:
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        if isinstance(value, BaseModel):
+            blob = f"{_format_name(type(value))}\n{value.model_dump_json()}"
+        else:
+            blob = "\n" + json.dumps(value)
+        self._client.set(self._prefix + key, blob, px=int(self.ttl * 1000) if self.ttl else None)
+
+    def clear(self) -> None:
+        names = list(self._client.scan_iter(match=f"{self._prefix}*", count=1000))
+        for start in range(0, len(names), 1000):
+            self._client.delete(*names[start : start + 1000])
+
+
+class TieredCache:
+    """Checks each tier in order and back-fills faster tiers on a hit."""
+
+    def __init__(self, tiers: List[ResponseCache]):
+        self.tiers = tiers
+
+    def get(self, key: str) -> Optional[Any]:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    if os.getenv("POLICY_FORGE_CACHE", "1").lower() in ("0", "false", "off", "no"):
+        return None
+    ttl = float(os.getenv("POLICY_FORGE_CACHE_TTL", 24 * 60 * 60)) or None
+    tiers: List[ResponseCache] = [
+        MemoryCache(max_entries=int(os.getenv("POLICY_FORGE_CACHE_SIZE", 256)), ttl=ttl)
+    ]
+    path = os.getenv("POLICY_FORGE_CACHE_PATH")
+    if path:
+        tiers.append(
+            SQLiteCache(path, max_entries=int(os.getenv("POLICY_FORGE_CACHE_DISK_SIZE", 10_000)), ttl=ttl)
+        )
+    client = shared.redis_from_env()
+    if client is not None:
+        tiers.append(RedisCache(client, ttl=ttl))
+    return TieredCache(tiers) if len(tiers) > 1 else tiers[0]
+
+
+_UNSET = object()
+_cache: Any = _UNSET
+_locks: Any = _UNSET
+_bypass: ContextVar[bool] = ContextVar("policy_forge_cache_bypass", default=False)
+
+
+def get_cache() -> Optional[ResponseCache]:
+    global _cache
+    if _cache is _UNSET:
+        _cache = cache_from_env()
+    return _cache
+
+
+def set_cache(cache: Optional[ResponseCache]):
+    global _cache
+    _cache = cache
+
+
+def get_locks() -> shared.KeyLocks:
+    global _locks
+    if _locks is _UNSET:
+        _locks = shared.locks_from_env()
+    return _locks
+
+
+def set_locks(locks: shared.KeyLocks):
+    global _locks
+    _locks = locks
+
+
+@contextmanager
+def bypass():
+    """Skip cache lookups for calls made inside this block. Fresh results are still stored."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def is_bypassed() -> bool:
+    return _bypass.get()
+
+
+def _copy(value: Any) -> Any:
+    # Callers are free to mutate what they get back (the CLI reviewer relabels examples)
+    if isinstance(value, BaseModel):
+        return value.model_copy(deep=True)
+    return value
+
+
+async def aget(key: str) -> Optional[Any]:
+    cache = get_cache()
+    if cache is None:
+        return None
+    if is_bypassed():
+        metrics.CACHE_REQUESTS.inc(result="bypass")
+        return None
+    if isinstance(cache, MemoryCache):
+        value = cache.get(key)
+    else:
+        value = await asyncio.to_thread(cache.get, key)
+    metrics.CACHE_REQUESTS.inc(result="miss" if value is None else "hit")
+    return _copy(value)
+
+
+async def aset(key: str, value: Any):
+    cache = get_cache()
+    if cache is None or value is None:
+        return
+    value = _copy(value)
+    if isinstance(cache, MemoryCache):
+        cache.set(key, value)
+    else:
+        await asyncio.to_thread(cache.set, key, value)
+
+
+@asynccontextmanager
+async def single_flight(key: str) -> AsyncIterator[Optional[Any]]:
+    """Run the block as the only generator of `key`, across every worker sharing the cache.
+
+    Callers check the cache first and enter this on a miss. Whoever waited for the lock gets
+    the value its holder cached meanwhile; otherwise None, and the block should generate the
+    value and `aset` it before leaving. Bypassed lookups neither wait nor coalesce.
+    """
+    cache = get_cache()
+    if cache is None or is_bypassed():
+        yield None
+        return
+    async with shared.hold(get_locks(), key):
+        value = cache.get(key) if isinstance(cache, MemoryCache) else await asyncio.to_thread(cache.get, key)
+        if value is not None:
+            metrics.CACHE_REQUESTS.inc(result="coalesced")
+        yield _copy(value)
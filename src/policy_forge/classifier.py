@@ -0,0 +1,167 @@
+import asyncio
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, TypeVar, Union
+
+import openai
+from pydantic import BaseModel, Field, ValidationError
+
+from policy_forge import llm, metrics, prompts
+from policy_forge.scheduler import count_tokens
+from policy_forge.schema import MachinePolicy, OutputFormat
+
+# Prompt tokens of content per batched call, plus the output reserved for each item's result
+DEFAULT_BATCH_TOKENS = int(os.getenv("POLICY_FORGE_CLASSIFY_BATCH_TOKENS", "4000"))
+DEFAULT_MAX_BATCH_ITEMS = int(os.getenv("POLICY_FORGE_CLASSIFY_MAX_BATCH", "50"))
+
+# Roughly what one `{"index": .., "label": .., "confidence": ..}` result costs, plus the item's index prefix
+RESULT_TOKENS = 20
+
+T = TypeVar("T")
+
+# A batch response that can't be read is retried in smaller batches: a truncated or filtered answer,
+# or one that doesn't fit the schema, is a property of the batch. Upstream errors, such as auth
+# failures, rate limits that outlasted their retries and timeouts, would fail every split the same way.
+MALFORMED_BATCH_ERRORS = (ValidationError, openai.LengthFinishReasonError, openai.ContentFilterFinishReasonError)
+
+
+class Classification(BaseModel):
+    label: Literal["violation", "non-violation"]
+    confidence: Optional[float] = Field(default=None, description="Confidence in the label, from 0 to 1")
+
+
+class IndexedClassification(Classification):
+    index: int = Field(..., description="Index of the item this result is for")
+
+
+class BatchClassification(BaseModel):
+    results: List[IndexedClassification] = Field(..., description="One result per item, in any order")
+
+
+class ClassifierPolicy(BaseModel):
+    # The parts of a machine policy a classifier applies; the long description is left out of every call
+    name: str
+    scope: str
+    violation_criteria: List[str]
+    edge_case_guidance: List[str]
+    output_format: OutputFormat
+
+
+def classifier_text(policy: MachinePolicy) -> str:
+    return prompts.render(ClassifierPolicy.model_validate(policy.model_dump(include=set(ClassifierPolicy.model_fields))))
+
+
+async def classify_async(policy_text: str, text: str) -> Classification:
+    """Classify one piece of content. `policy_text` comes from `classifier_text`, rendered once per policy."""
+    return await llm.parse(prompts.CLASSIFY.messages(policy_text, text), Classification)
+
+
+def item_tokens(text: str) -> int:
+    return count_tokens(text) + RESULT_TOKENS
+
+
+def pack(
+    items: Iterable[T],
+    text: Callable[[T], str] = str,
+    token_budget: int = DEFAULT_BATCH_TOKENS,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+) -> Iterator[List[T]]:
+    """Group items into batches that fit `token_budget`, lazily and in order.
+
+    Short texts share a call many to a batch; a text over budget on its own still gets a batch to itself.
+    """
+    batch: List[T] = []
+    used = 0
+    for item in items:
+        tokens = item_tokens(text(item))
+        if batch and (used + tokens > token_budget or len(batch) >= max_items):
+            yield batch
+            batch, used = [], 0
+        batch.append(item)
+        used += tokens
+    if batch:
+        yield batch
+
+
+def _numbered(texts: Sequence[str]) -> str:
+    # One item per line, so the model can't mistake where one ends and the next begins
+    return "\n".join(f"{index}. {' '.join(text.split())}" for index, text in enumerate(texts))
+
+
+async def _classify_batch(policy_text: str, texts: Sequence[str], labels: Sequence[str]) -> Dict[int, Classification]:
+    parsed = await llm.parse(prompts.CLASSIFY_BATCH.messages(policy_text, _numbered(texts)), BatchClassification)
+    results: Dict[int, Classification] = {}
+    if parsed is None:  # refused
+        return results
+    for result in parsed.results:
+        # Out-of-range, repeated and off-policy results are dropped, and their items retried
+        if 0 <= result.index < len(texts) and result.index not in results and result.label in labels:
+            results[result.index] = Classification(label=result.label, confidence=result.confidence)
+    return results
+
+
+async def _classify_split(
+    policy_text: str, texts: Sequence[str], labels: Sequence[str], retried: bool
+) -> List[Union[Classification, Exception]]:
+    # `retried` is set below the first split, whose items were already counted as retried
+    if len(texts) == 1:
+        try:
+            return [await classify_async(policy_text, texts[0])]
+        except Exception as e:
+            return [e]
+    try:
+        results: Dict[int, Union[Classification, Exception]] = dict(await _classify_batch(policy_text, texts, labels))
+    except MALFORMED_BATCH_ERRORS:
+        results = {}
+    except Exception as e:
+        metrics.CLASSIFY_ITEMS.inc(len(texts), result="failed")
+        return [e] * len(texts)
+    missing = [index for index in range(len(texts)) if index not in results]
+    metrics.CLASSIFY_ITEMS.inc(len(texts) - len(missing), result="batched")
+    if missing:
+        if not retried:
+            metrics.CLASSIFY_ITEMS.inc(len(missing), result="retried")
+        middle = (len(missing) + 1) // 2
+        # One half after the other, so a split batch never makes more calls at once than the slot it was given
+        for half in (missing[:middle], missing[middle:]):
+            if half:
+                outcomes = await _classify_split(policy_text, [texts[index] for index in half], labels, retried=True)
+                results.update(zip(half, outcomes))
+    return [results[index] for index in range(len(texts))]
+
+
+@metrics.timed("classify_batch")
+async def classify_batch_async(
+    policy_text: str, texts: Sequence[str], labels: Sequence[str] = ("violation", "non-violation")
+) -> List[Union[Classification, Exception]]:
+    """Classify `texts` in one structured call, returning a result or error for each, in order.
+
+    Items the model left out or answered invalidly are split into two halves and retried in
+    turn, as is a whole batch whose response was malformed; a single item falls back to
+    `classify_async`. Any other error is the outcome of every item in the batch, without a retry.
+    """
+    return await _classify_split(policy_text, texts, labels, retried=False)
+
+
+async def classify_many_async(
+    policy: MachinePolicy,
+    texts: Sequence[str],
+    token_budget: int = DEFAULT_BATCH_TOKENS,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+    concurrency: int = 4,
+) -> List[Union[Classification, Exception]]:
+    """Classify many texts against `policy`, packing them into as few calls as the token budget allows."""
+    policy_text = classifier_text(policy)
+    labels = policy.output_format.labels
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(batch: List[int]) -> List[Union[Classification, Exception]]:
+        async with semaphore:
+            return await classify_batch_async(policy_text, [texts[index] for index in batch], labels)
+
+    batches = list(pack(range(len(texts)), texts.__getitem__, token_budget, max_items))
+    outcomes = await asyncio.gather(*(run(batch) for batch in batches))
+    return [outcome for batch_outcomes in outcomes for outcome in batch_outcomes]
+
+
+def classify_many(policy: MachinePolicy, texts: Sequence[str], **kwargs) -> List[Union[Classification, Exception]]:
+    return llm.run(classify_many_async, policy, texts, **kwargs)
@@ -0,0 +1,155 @@
+import hashlib
+import random
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from policy_forge.cache import MemoryCache
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 5) -> FrozenSet[int]:
+    """Hashed character n-grams of the normalized text.
+
+    Case, punctuation and spacing are ignored, so trivially reworded copies share most of
+    their shingles. Characters rather than words, because examples are only a sentence or three.
+    """
+    normalized = " ".join(_WORD.findall(text.lower()))
+    if len(normalized) <= size:
+        grams = [normalized]
+    else:
+        grams = [normalized[i : i + size] for i in range(len(normalized) - size + 1)]
+    return frozenset(
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big") for gram in grams
+    )
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures over 64-bit shingle hashes.
+
+    Each permutation XORs the hashes with a random mask. That family is weaker than
+    (a*x + b) mod p, but the shingles are already uniformly hashed, it evaluates in C via
+    `map`, and LSH candidates are confirmed by exact Jaccard anyway.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def signature(self, hashes: FrozenSet[int]) -> Tuple[int, ...]:
+        if not hashes:
+            return (0,) * self.num_perm
+        return tuple(min(map(mask.__xor__, hashes)) for mask in self._masks)
+
+
+class DedupStats(BaseModel):
+    checked: int = 0
+    duplicates: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.duplicates / self.checked if self.checked else 0.0
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of texts already seen, answering "is this a near-copy of one of them?".
+
+    Signatures are split into `bands`; texts sharing any band are candidates, and candidates
+    are confirmed by exact shingle Jaccard similarity against `threshold`. With the defaults,
+    pairs above roughly 0.5 similarity become candidates, so lookups cost a handful of
+    comparisons instead of one per stored text.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16, hasher: Optional[MinHasher] = None):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = num_perm // bands
+        self._hasher = hasher or MinHasher(num_perm)
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._shingles: List[FrozenSet[int]] = []
+        self._texts: List[str] = []
+        self._lock = threading.Lock()
+        self.stats = DedupStats()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _bands(self, hashes: FrozenSet[int]) -> List[Tuple[int, ...]]:
+        signature = self._hasher.signature(hashes)
+        return [signature[i * self._rows : (i + 1) * self._rows] for i in range(self.bands)]
+
+    def _match(self, hashes: FrozenSet[int], bands: List[Tuple[int, ...]]) -> Optional[str]:
+        candidates = set()
+        for buckets, band in zip(self._buckets, bands):
+            candidates.update(buckets.get(band, ()))
+        for index in sorted(candidates):
+            if jaccard(hashes, self._shingles[index]) >= self.threshold:
+                return self._texts[index]
+        return None
+
+    def find(self, text: str) -> Optional[str]:
+        """The stored text `text` nearly duplicates, if any."""
+        hashes = shingles(text)
+        with self._lock:
+            return self._match(hashes, self._bands(hashes))
+
+    def add(self, text: str) -> bool:
+        """Index `text` unless it nearly duplicates a stored text. Returns whether it was new."""
+        hashes = shingles(text)
+        bands = self._bands(hashes)
+        with self._lock:
+            self.stats.checked += 1
+            if self._match(hashes, bands) is not None:
+                self.stats.duplicates += 1
+                return False
+            index = len(self._texts)
+            self._texts.append(text)
+            self._shingles.append(hashes)
+            for buckets, band in zip(self._buckets, bands):
+                buckets.setdefault(band, []).append(index)
+            return True
+
+    def filter(self, examples: Iterable) -> Tuple[list, list]:
+        """Split examples (anything with `.text`) into (unique, duplicates), indexing the unique ones."""
+        unique, duplicates = [], []
+        for example in examples:
+            (unique if self.add(example.text) else duplicates).append(example)
+        return unique, duplicates
+
+
+class DedupRegistry:
+    """One index per policy, so examples are compared with everything generated for that policy before.
+
+    Least recently used policies are evicted beyond `max_policies`.
+    """
+
+    def __init__(self, max_policies: int = 1024, threshold: float = 0.7):
+        self.threshold = threshold
+        self._indexes = MemoryCache(max_entries=max_policies)
+        self._hasher = MinHasher()
+        self._lock = threading.Lock()
+
+    def index(self, policy_key: str) -> NearDuplicateIndex:
+        with self._lock:
+            index = self._indexes.get(policy_key)
+            if index is None:
+                index = NearDuplicateIndex(self.threshold, hasher=self._hasher)
+                self._indexes.set(policy_key, index)
+            return index
+
+
+def policy_key(policy: BaseModel) -> str:
+    # For policies that aren't stored; stored ones are keyed by their ID
+    return hashlib.sha256(policy.model_dump_json().encode("utf-8")).hexdigest()
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from pydantic import BaseModel, Field, ValidationError
+
+from policy_forge import llm, metrics, scheduler
+from policy_forge.classifier import (
+    DEFAULT_BATCH_TOKENS,
+    DEFAULT_MAX_BATCH_ITEMS,
+    classifier_text,
+    classify_batch_async,
+    pack,
+)
+from policy_forge.dedup import policy_key
+from policy_forge.export import atomic_write
+from policy_forge.prefilter import compile_prefilter_async
+from policy_forge.schema import MachinePolicy, SyntheticExample
+
+DEFAULT_EVAL_CONCURRENCY = int(os.getenv("POLICY_FORGE_EVAL_CONCURRENCY", "8"))
+
+# Predictions buffered between checkpoint writes; at most this many are redone after a crash
+DEFAULT_CHECKPOINT_EVERY = 100
+
+
+class Prediction(BaseModel):
+    index: int
+    expected: str
+    label: str
+    confidence: Optional[float] = None
+    path: str = Field(default="llm", description="What decided the label: prefilter rules or the LLM")
+
+
+class LabelScores(BaseModel):
+    precision: Optional[float]
+    recall: Optional[float]
+    f1: Optional[float]
+    support: int
+
+
+class EvaluationReport(BaseModel):
+    total: int = Field(..., description="Records scored, including those restored from the checkpoint")
+    evaluated: int = Field(..., description="Records classified in this run")
+    resumed: int = Field(..., description="Records restored from the checkpoint")
+    errors: int = Field(..., description="Records whose classification failed; a resumed run retries them")
+    confusion: Dict[str, Dict[str, int]] = Field(..., description="Counts by expected label, then predicted label")
+    labels: Dict[str, LabelScores]
+    accuracy: Optional[float]
+    routes: Dict[str, int] = Field(default_factory=dict, description="Records scored by each path, rule or llm")
+    elapsed_seconds: float
+    throughput: float = Field(..., description="Records classified per second in this run")
+
+
+def _ratio(numerator: int, denominator: int) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+class ConfusionMatrix:
+    """Running counts of (expected, predicted) label pairs.
+
+    Expected labels the policy can't predict, such as "borderline", are counted but not scored.
+    """
+
+    def __init__(self, labels: Iterable[str]):
+        self.labels = list(labels)
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def add(self, expected: str, predicted: str):
+        row = self.counts.setdefault(expected, {})
+        row[predicted] = row.get(predicted, 0) + 1
+
+    def __len__(self) -> int:
+        return sum(sum(row.values()) for row in self.counts.values())
+
+    def scores(self) -> Tuple[Dict[str, LabelScores], Optional[float]]:
+        scored = {expected: row for expected, row in self.counts.items() if expected in self.labels}
+        correct = sum(row.get(expected, 0) for expected, row in scored.items())
+        scores = {}
+        for label in self.labels:
+            true_positive = scored.get(label, {}).get(label, 0)
+            predicted = sum(row.get(label, 0) for row in scored.values())
+            support = sum(scored.get(label, {}).values())
+            precision, recall = _ratio(true_positive, predicted), _ratio(true_positive, support)
+            if precision is None or recall is None:
+                f1 = None
+            else:
+                f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            scores[label] = LabelScores(precision=precision, recall=recall, f1=f1, support=support)
+        return scores, _ratio(correct, sum(sum(row.values()) for row in scored.values()))
+
+
+def read_dataset(path: Union[str, Path]) -> Iterator[Tuple[int, SyntheticExample]]:
+    """Yield (line index, record) from a JSONL file of SyntheticExample records, lazily."""
+    with open(path) as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                yield index, SyntheticExample.model_validate_json(line)
+            except ValidationError as e:
+                raise ValueError(f"{path} line {index + 1}: {e}") from e
+
+
+class Checkpoint:
+    """Append-only JSONL of predictions, headed by the key of the policy being evaluated.
+
+    Appends are flushed and fsynced, and a line torn by a crash is ignored on load, so the
+    file always describes a consistent set of finished records.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def load(self, key: str) -> Iterator[Prediction]:
+        """Yield the saved predictions, starting a new checkpoint for `key` if there is none."""
+        if self.path.exists():
+            with open(self.path) as f:
+                header = f.readline()
+                if header.endswith("\n"):
+                    if json.loads(header).get("policy") != key:
+                        raise ValueError(f"Checkpoint {self.path} was written for a different policy")
+                    for line in f:
+                        try:
+                            yield Prediction.model_validate_json(line)
+                        except ValidationError:
+                            continue
+                    return
+        # Missing, or torn before its header was complete
+        atomic_write(self.path, json.dumps({"policy": key}) + "\n")
+
+    def append(self, predictions: List[Prediction]):
+        with open(self.path, "ab+") as f:
+            f.seek(-1, os.SEEK_END)
+            # Start on a fresh line if the last write was torn
+            lines = [b""] if f.read(1) != b"\n" else []
+            lines.extend(prediction.model_dump_json().encode("utf-8") for prediction in predictions)
+            f.write(b"\n".join(lines) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def _classify_all(
+    policy_text: str,
+    labels: Sequence[str],
+    batches: Iterator[List[Tuple[int, SyntheticExample]]],
+    concurrency: int,
+) -> AsyncIterator[Union[Prediction, Exception]]:
+    # Workers pull batches from the shared iterator, so at most `concurrency` batches are in memory at once
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    finished = object()
+
+    async def worker():
+        try:
+            for batch in batches:
+                with scheduler.priority(scheduler.BATCH):
+                    outcomes = await classify_batch_async(policy_text, [example.text for _, example in batch], labels)
+                for (index, example), outcome in zip(batch, outcomes):
+                    if isinstance(outcome, Exception):
+                        await results.put(outcome)
+                        continue
+                    await results.put(
+                        Prediction(index=index, expected=example.label, label=outcome.label, confidence=outcome.confidence)
+                    )
+        finally:
+            await results.put(finished)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            item = await results.get()
+            if item is finished:
+                remaining -= 1
+                continue
+            yield item
+        # A worker only stops early when reading the dataset failed
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+@metrics.timed("evaluate")
+async def evaluate_async(
+    policy: MachinePolicy,
+    dataset: Union[str, Path],
+    checkpoint: Optional[Union[str, Path]] = None,
+    concurrency: int = DEFAULT_EVAL_CONCURRENCY,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    max_batch: int = DEFAULT_MAX_BATCH_ITEMS,
+    prefilter: bool = False,
+) -> EvaluationReport:
+    """Classify every record of a JSONL dataset with `policy` and score the predictions.
+
+    Records are packed into batched calls of up to `max_batch` records and `batch_tokens`
+    tokens; `max_batch=1` classifies each record in its own call. With `prefilter`, records
+    the policy's lexical rules settle never reach the LLM.
+
+    With a `checkpoint`, finished predictions are appended as the run goes, and a rerun with
+    the same policy skips the records already in it. `on_progress(done, errors)` is called
+    after each checkpoint write.
+    """
+    key = policy_key(policy)
+    store = Checkpoint(checkpoint) if checkpoint is not None else None
+    matrix = ConfusionMatrix(policy.output_format.labels)
+    routes: Dict[str, int] = {}
+    done: Set[int] = set()
+    for prediction in store.load(key) if store is not None else ():
+        if prediction.index not in done:
+            done.add(prediction.index)
+            matrix.add(prediction.expected, prediction.label)
+            routes[prediction.path] = routes.get(prediction.path, 0) + 1
+    resumed = len(done)
+    records = ((index, example) for index, example in read_dataset(dataset) if index not in done)
+
+    # Records the rules settle are parked here as the workers read past them
+    settled: List[Prediction] = []
+    if prefilter:
+        rules = await compile_prefilter_async(policy)
+
+        def route(records):
+            for index, example in records:
+                label = rules.check(example.text)
+                if label is None:
+                    yield index, example
+                else:
+                    settled.append(Prediction(index=index, expected=example.label, label=label, path="rule"))
+
+        records = route(records)
+    batches = pack(records, lambda record: record[1].text, batch_tokens, max_batch)
+
+    policy_text = classifier_text(policy)
+    buffer: List[Prediction] = []
+    routed: Dict[str, int] = {}
+    evaluated = errors = 0
+    started = time.perf_counter()
+
+    def score(prediction: Prediction):
+        nonlocal evaluated
+        evaluated += 1
+        matrix.add(prediction.expected, prediction.label)
+        routes[prediction.path] = routes.get(prediction.path, 0) + 1
+        routed[prediction.path] = routed.get(prediction.path, 0) + 1
+        buffer.append(prediction)
+        if len(buffer) >= checkpoint_every:
+            flush()
+
+    def score_settled():
+        while settled:
+            score(settled.pop())
+
+    def flush():
+        if store is not None and buffer:
+            store.append(buffer)
+        buffer.clear()
+        if on_progress is not None:
+            on_progress(resumed + evaluated, errors)
+
+    try:
+        async for result in _classify_all(policy_text, policy.output_format.labels, batches, concurrency):
+            score_settled()
+            if isinstance(result, Exception):
+                errors += 1
+            else:
+                score(result)
+        score_settled()
+    finally:
+        # Also on cancellation, so an interrupted run keeps everything it finished
+        flush()
+
+    elapsed = time.perf_counter() - started
+    if prefilter:
+        for path, count in routed.items():
+            rules.record(path, count)
+    scores, accuracy = matrix.scores()
+    return EvaluationReport(
+        total=len(matrix),
+        evaluated=evaluated,
+        resumed=resumed,
+        errors=errors,
+        confusion=matrix.counts,
+        labels=scores,
+        accuracy=accuracy,
+        routes=routes,
+        elapsed_seconds=round(elapsed, 3),
+        throughput=round(evaluated / elapsed, 3) if elapsed > 0 else 0.0,
+    )
+
+
+def evaluate(policy: MachinePolicy, dataset: Union[str, Path], **kwargs) -> EvaluationReport:
+    return llm.run(evaluate_async, policy, dataset, **kwargs)
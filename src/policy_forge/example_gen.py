@@ -1,66 +1,64 @@
-import os
-from openai import OpenAI
-from policy_forge.schema import ExampleListResponse
+from typing import List, Optional
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from pydantic import BaseModel
 
+from policy_forge import llm, metrics, prompts
+from policy_forge.dedup import NearDuplicateIndex
+from policy_forge.schema import ExampleListResponse, SyntheticExample
+
+DEFAULT_REGENERATIONS = 2
+
+
+def example_messages(policy_text: str) -> list:
+    return prompts.EXAMPLES.messages(policy_text)
 
-def generate_examples(policy_text: str) -> ExampleListResponse:
-    response = client.beta.chat.completions.parse(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a senior trust and safety expert with extensive experience in content moderation and policy enforcement. "
-                    "Your expertise includes analyzing user-generated content across various platforms and understanding how policies "
-                    "are applied in real-world scenarios. You excel at identifying subtle policy violations, edge cases, and "
-                    "culturally contextual content. Your examples should reflect the diversity of real user behavior, including "
-                    "different communication styles, cultural contexts, and platform-specific patterns."
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"""
-Based on the following policy:
 
-{policy_text}
+@metrics.timed("generate_examples")
+async def generate_examples_async(policy_text: str) -> ExampleListResponse:
+    return await llm.parse(example_messages(policy_text), ExampleListResponse)
+
+
+def generate_examples(policy_text: str) -> ExampleListResponse:
+    return llm.run(generate_examples_async, policy_text)
 
-Generate exactly 8 high-quality examples of user content that would be encountered on a modern social platform. These examples 
-should test the policy's boundaries and effectiveness across different scenarios.
 
-Distribution of examples:
-- 4 clear **violations** (including both obvious and subtle cases)
-- 3 clear **non-violations** (including edge cases that should be allowed)
-- 1 **borderline case** that tests policy boundaries
+class UniqueExamples(BaseModel):
+    examples: List[SyntheticExample]
+    generated: int
+    duplicates: int
+    regenerations: int = 0
 
-For each example, provide:
-- `text`: Realistic user-generated content (1-3 sentences)
-- `label`: One of `"violation"`, `"non-violation"`, or `"borderline"`
-- `context`: Brief explanation of why this example was classified as such
-- `variation_type`: One of:
-  * "explicit" - Direct, obvious policy violation/non-violation
-  * "implicit" - Indirect or subtle policy violation/non-violation
-  * "contextual" - Depends heavily on surrounding context
-  * "cultural" - Involves cultural or regional considerations
-  * "satirical" - Uses humor, parody, or satire
-  * "technical" - Involves technical or platform-specific elements
+    @property
+    def dedup_rate(self) -> float:
+        return self.duplicates / self.generated if self.generated else 0.0
 
-Ensure diversity across:
-- Communication styles (formal, casual, slang, emoji usage)
-- Cultural contexts and regional variations
-- Platform-specific patterns (hashtags, mentions, etc.)
-- Content types (text, links, references to media)
-- User intentions (malicious, accidental, satirical)
-- Language complexity and sophistication
 
-Return only a JSON object with a field `"examples"` containing a list of 8 example objects.
+@metrics.timed("generate_unique_examples")
+async def generate_unique_examples_async(
+    policy_text: str, index: NearDuplicateIndex, regenerations: int = DEFAULT_REGENERATIONS
+) -> UniqueExamples:
+    """Generate examples, dropping near-duplicates of each other and of everything already in `index`.
 
-Note: Examples should be realistic but avoid extreme or harmful content. Focus on testing policy boundaries while maintaining 
-platform-appropriate content standards.
-""",
-            },
-        ],
-        response_format=ExampleListResponse,
-    )
-    return response.choices[0].message.parsed
+    While fewer than a full batch survive, up to `regenerations` more calls ask for replacements,
+    showing the model what it already produced. Pass 0 to only drop.
+    """
+    batch = (await generate_examples_async(policy_text)).examples
+    target = len(batch)
+    examples, duplicates = index.filter(batch)
+    generated, dropped, rounds = len(batch), len(duplicates), 0
+    seen = list(batch)
+    while len(examples) < target and rounds < regenerations:
+        rounds += 1
+        batch = (await llm.parse(prompts.EXAMPLES_AVOIDING.messages(policy_text, seen), ExampleListResponse)).examples
+        seen += batch
+        for example in batch:
+            if len(examples) == target:
+                break
+            generated += 1
+            if index.add(example.text):
+                examples.append(example)
+            else:
+                dropped += 1
+    metrics.EXAMPLES_DEDUP.inc(generated - dropped, result="unique")
+    metrics.EXAMPLES_DEDUP.inc(dropped, result="duplicate")
+    return UniqueExamples(examples=examples, generated=generated, duplicates=dropped, regenerations=rounds)
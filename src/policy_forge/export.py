@@ -0,0 +1,229 @@
+import asyncio
+import io
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple, Union
+
+from pydantic import BaseModel
+from slugify import slugify
+
+from policy_forge.formatters import (
+    format_machine_policy_to_md,
+    format_moderator_policy_to_md,
+    format_public_policy_to_md,
+    iter_policy_md,
+)
+from policy_forge.schema import MachinePolicy, ModeratorPolicy, PublicPolicy
+
+try:
+    import yaml
+except ImportError:  # optional: only the YAML renderer needs PyYAML
+    yaml = None
+
+ExportFormat = Literal["markdown", "json", "yaml"]
+BundleKind = Literal["tar", "zip", "jsonl"]
+
+DEFAULT_OUTPUT_DIR = os.getenv("POLICY_FORGE_OUTPUT_DIR", "output")
+
+# File name suffix for each policy type, as save_policies_to_markdown has always named them
+POLICY_TYPES = {"public": "public", "moderator": "moderator", "machine": "machine_policy"}
+
+_MARKDOWN: Dict[type, Callable[[BaseModel], str]] = {
+    PublicPolicy: format_public_policy_to_md,
+    ModeratorPolicy: format_moderator_policy_to_md,
+    MachinePolicy: format_machine_policy_to_md,
+}
+
+
+def render_markdown(policy: BaseModel) -> str:
+    return _MARKDOWN[type(policy)](policy)
+
+
+def render_json(policy: BaseModel) -> str:
+    return policy.model_dump_json(indent=2) + "\n"
+
+
+def render_yaml(policy: BaseModel) -> str:
+    if yaml is None:
+        raise RuntimeError("YAML export requires PyYAML (pip install pyyaml)")
+    return yaml.safe_dump(policy.model_dump(mode="json"), sort_keys=False, allow_unicode=True)
+
+
+RENDERERS: Dict[str, Tuple[Callable[[BaseModel], str], str]] = {
+    "markdown": (render_markdown, "md"),
+    "json": (render_json, "json"),
+    "yaml": (render_yaml, "yaml"),
+}
+
+
+class PolicySet(BaseModel):
+    """The documents exported for one policy. Stored policies (`store.StoredPolicy`) fit this shape."""
+
+    name: str
+    machine: MachinePolicy
+    public: Optional[PublicPolicy] = None
+    moderator: Optional[ModeratorPolicy] = None
+
+
+def render_chunks(policy: BaseModel, fmt: str) -> Iterator[str]:
+    # Markdown streams section by section; the structured formats are small enough to render whole
+    if fmt == "markdown":
+        return iter_policy_md(policy)
+    return iter([RENDERERS[fmt][0](policy)])
+
+
+def policy_file_name(entry: Union[PolicySet, BaseModel], policy_type: str, fmt: str = "markdown") -> str:
+    return f"{slugify(entry.name)}_{POLICY_TYPES[policy_type]}.{RENDERERS[fmt][1]}"
+
+
+def policy_files(
+    entry: Union[PolicySet, BaseModel], formats: Sequence[str] = ("markdown",)
+) -> Iterator[Tuple[str, Iterator[str]]]:
+    """Yield (file name, content chunks) for each document of a policy in each format."""
+    for policy_type in POLICY_TYPES:
+        policy = getattr(entry, policy_type)
+        if policy is None:
+            continue
+        for fmt in formats:
+            yield policy_file_name(entry, policy_type, fmt), render_chunks(policy, fmt)
+
+
+CATALOG_SEPARATOR = "\n\n---\n\n"
+
+
+def iter_catalog(
+    entries: Iterable[Union[PolicySet, BaseModel]], policy_type: str = "public", chunk_size: int = 64 * 1024
+) -> Iterator[str]:
+    """Stream one Markdown document holding the `policy_type` policy of every entry, separated by rules."""
+    first = True
+    for entry in entries:
+        policy = getattr(entry, policy_type)
+        if policy is None:
+            continue
+        if not first:
+            yield CATALOG_SEPARATOR
+        first = False
+        yield from iter_policy_md(policy, chunk_size)
+
+
+@contextmanager
+def atomic_open(path: Union[str, Path], mode: str = "w") -> Iterator[io.IOBase]:
+    """Write to a temp file beside `path` and rename it into place only once writing succeeds.
+
+    Readers see either the old file or the complete new one, never a partial write.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def atomic_write(path: Union[str, Path], content: str) -> Path:
+    return stream_to_file(path, [content])
+
+
+def stream_to_file(path: Union[str, Path], chunks: Iterable[str]) -> Path:
+    """Write chunks as they are produced, atomically, without holding the whole document in memory."""
+    with atomic_open(path) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return Path(path)
+
+
+def _bundle_files(
+    entries: Iterable[Union[PolicySet, BaseModel]], formats: Sequence[str]
+) -> Iterator[Tuple[str, Iterator[str]]]:
+    # One directory per policy, so policies that share a name don't overwrite each other
+    for index, entry in enumerate(entries):
+        directory = getattr(entry, "id", None) or f"{index:05d}"
+        for name, chunks in policy_files(entry, formats):
+            yield f"{directory}/{name}", chunks
+
+
+def _add_to_tar(archive: tarfile.TarFile, name: str, content: str):
+    data = content.encode("utf-8")
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(data))
+
+
+class Exporter:
+    """Writes policy documents and bundles under `root`, atomically and off the event loop."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_OUTPUT_DIR):
+        self.root = Path(root)
+
+    def _resolve(self, path: Union[str, Path]) -> Path:
+        path = self.root / path
+        if not path.resolve().is_relative_to(self.root.resolve()):
+            raise ValueError(f"Export path {path} is outside the output root {self.root}")
+        return path
+
+    def write_policies(self, entry: Union[PolicySet, BaseModel], formats: Sequence[str] = ("markdown",)) -> List[Path]:
+        return [stream_to_file(self._resolve(name), chunks) for name, chunks in policy_files(entry, formats)]
+
+    def write_catalog(
+        self, entries: Iterable[Union[PolicySet, BaseModel]], path: Union[str, Path], policy_type: str = "public"
+    ) -> Path:
+        return stream_to_file(self._resolve(path), iter_catalog(entries, policy_type))
+
+    def write_bundle(
+        self,
+        entries: Iterable[Union[PolicySet, BaseModel]],
+        path: Union[str, Path],
+        kind: BundleKind = "tar",
+        formats: Sequence[str] = ("markdown",),
+    ) -> Path:
+        """Write many policies into one tar.gz, zip or JSONL file. JSONL holds one policy object per line."""
+        path = self._resolve(path)
+        if kind == "jsonl":
+            with atomic_open(path) as f:
+                for entry in entries:
+                    f.write(entry.model_dump_json() + "\n")
+        elif kind == "tar":
+            with atomic_open(path, "wb") as f, tarfile.open(fileobj=f, mode="w:gz") as archive:
+                for name, chunks in _bundle_files(entries, formats):
+                    # tar headers need the size up front, so each document is rendered whole
+                    _add_to_tar(archive, name, "".join(chunks))
+        elif kind == "zip":
+            with atomic_open(path, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as archive:
+                for name, chunks in _bundle_files(entries, formats):
+                    with archive.open(name, "w") as member:
+                        for chunk in chunks:
+                            member.write(chunk.encode("utf-8"))
+        else:
+            raise ValueError(f"Unknown bundle kind: {kind!r} (expected 'tar', 'zip' or 'jsonl')")
+        return path
+
+    async def export_policies(
+        self, entry: Union[PolicySet, BaseModel], formats: Sequence[str] = ("markdown",)
+    ) -> List[Path]:
+        return await asyncio.to_thread(self.write_policies, entry, formats)
+
+    async def export_catalog(
+        self, entries: Iterable[Union[PolicySet, BaseModel]], path: Union[str, Path], policy_type: str = "public"
+    ) -> Path:
+        return await asyncio.to_thread(self.write_catalog, entries, path, policy_type)
+
+    async def export_bundle(
+        self,
+        entries: Iterable[Union[PolicySet, BaseModel]],
+        path: Union[str, Path],
+        kind: BundleKind = "tar",
+        formats: Sequence[str] = ("markdown",),
+    ) -> Path:
+        return await asyncio.to_thread(self.write_bundle, list(entries), path, kind, formats)
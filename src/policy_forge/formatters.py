@@ -1,80 +1,126 @@
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Tuple
 from policy_forge.schema import PublicPolicy, ModeratorPolicy, MachinePolicy
 
 
+class Section(NamedTuple):
+    """One part of a Markdown document, rendered only from `fields` of the policy.
+
+    A document is its non-empty sections joined with newlines, so a section can be
+    cached or re-rendered on its own when just those fields change.
+    """
+
+    name: str
+    fields: Tuple[str, ...]
+    render: Callable[[Any], Iterable[str]]
+
+
+def _bullets(title: str, items: Iterable[str]) -> Iterator[str]:
+    # A generator, so streaming a section with a huge list never materializes all of it
+    yield f"\n## {title}"
+    for item in items:
+        yield f"- {item}"
+
+
+PUBLIC_SECTIONS = (
+    Section("header", ("name", "summary", "rationale", "scope"), lambda p: [
+        f"# {p.name}\n",
+        f"**Summary:** {p.summary}",
+        f"**Rationale:** {p.rationale}",
+        f"**Scope:** {p.scope}",
+    ]),
+    Section("violation_examples", ("violation_examples",), lambda p: _bullets("Violation Examples", p.violation_examples)),
+    Section("non_violation_examples", ("non_violation_examples",), lambda p: _bullets("Non-Violation Examples", p.non_violation_examples)),
+    Section("faq", ("faq",), lambda p: _bullets("Frequently Asked Questions", p.faq) if p.faq else []),
+)
+
+MODERATOR_SECTIONS = (
+    Section("header", ("name", "description", "scope", "rationale", "severity"), lambda p: [
+        f"# {p.name}\n",
+        f"**Description:** {p.description}",
+        f"**Scope:** {p.scope}",
+        *([f"**Rationale:** {p.rationale}"] if p.rationale else []),
+        f"**Severity:** {p.severity.capitalize()}",
+    ]),
+    Section("violation_examples", ("violation_examples",), lambda p: _bullets("Violation Examples", p.violation_examples)),
+    Section("non_violation_examples", ("non_violation_examples",), lambda p: _bullets("Non-Violation Examples", p.non_violation_examples)),
+    Section("edge_case_notes", ("edge_case_notes",), lambda p: _bullets("Edge Case Notes", p.edge_case_notes)),
+    Section("enforcement_guidance", ("enforcement_guidance",), lambda p: (
+        _bullets("Enforcement Guidance", p.enforcement_guidance) if p.enforcement_guidance else []
+    )),
+)
+
+MACHINE_SECTIONS = (
+    Section("header", ("name", "description", "scope"), lambda p: [
+        f"# {p.name}\n",
+        f"**Description:** {p.description}",
+        f"**Scope:** {p.scope}",
+    ]),
+    Section("violation_criteria", ("violation_criteria",), lambda p: _bullets("Violation Criteria", p.violation_criteria)),
+    Section("non_violation_examples", ("non_violation_examples",), lambda p: _bullets("Non-Violation Examples", p.non_violation_examples)),
+    Section("edge_case_guidance", ("edge_case_guidance",), lambda p: _bullets("Edge Case Guidance", p.edge_case_guidance)),
+    Section("output_format", ("output_format",), lambda p: [
+        "\n## Output Format",
+        f"- Type: `{p.output_format.type}`",
+        f"- Labels: `{', '.join(p.output_format.labels)}`",
+        f"- Confidence Required: `{p.output_format.confidence_required}`",
+    ]),
+)
+
+SECTIONS = {
+    PublicPolicy: PUBLIC_SECTIONS,
+    ModeratorPolicy: MODERATOR_SECTIONS,
+    MachinePolicy: MACHINE_SECTIONS,
+}
+
+
+def render_sections(policy, sections) -> str:
+    return "\n".join(text for text in ("\n".join(section.render(policy)) for section in sections) if text)
+
+
+def iter_sections(policy, sections, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield the document in chunks of roughly `chunk_size` characters.
+
+    The chunks concatenate to exactly what `render_sections` returns.
+    """
+    buffer = []
+    size = 0
+    first = True
+    for section in sections:
+        for line in section.render(policy):
+            text = line if first else "\n" + line
+            first = False
+            buffer.append(text)
+            size += len(text)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
 def format_public_policy_to_md(policy: PublicPolicy) -> str:
-    lines = [
-        f"# {policy.name}\n",
-        f"**Summary:** {policy.summary}",
-        f"**Rationale:** {policy.rationale}",
-        f"**Scope:** {policy.scope}",
-        "\n## Violation Examples",
-    ]
-    for ex in policy.violation_examples:
-        lines.append(f"- {ex}")
+    return render_sections(policy, PUBLIC_SECTIONS)
 
-    lines.append("\n## Non-Violation Examples")
-    for ex in policy.non_violation_examples:
-        lines.append(f"- {ex}")
 
-    if policy.faq:
-        lines.append("\n## Frequently Asked Questions")
-        for qa in policy.faq:
-            lines.append(f"- {qa}")
+def format_moderator_policy_to_md(policy: ModeratorPolicy) -> str:
+    return render_sections(policy, MODERATOR_SECTIONS)
 
-    return "\n".join(lines)
 
+def format_machine_policy_to_md(policy: MachinePolicy) -> str:
+    return render_sections(policy, MACHINE_SECTIONS)
 
-def format_moderator_policy_to_md(policy: ModeratorPolicy) -> str:
-    lines = [
-        f"# {policy.name}\n",
-        f"**Description:** {policy.description}",
-        f"**Scope:** {policy.scope}",
-    ]
-    if policy.rationale:
-        lines.append(f"**Rationale:** {policy.rationale}")
-    lines.append(f"**Severity:** {policy.severity.capitalize()}")
 
-    lines.append("\n## Violation Examples")
-    for ex in policy.violation_examples:
-        lines.append(f"- {ex}")
+def iter_public_policy_md(policy: PublicPolicy, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    return iter_sections(policy, PUBLIC_SECTIONS, chunk_size)
 
-    lines.append("\n## Non-Violation Examples")
-    for ex in policy.non_violation_examples:
-        lines.append(f"- {ex}")
 
-    lines.append("\n## Edge Case Notes")
-    for note in policy.edge_case_notes:
-        lines.append(f"- {note}")
+def iter_moderator_policy_md(policy: ModeratorPolicy, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    return iter_sections(policy, MODERATOR_SECTIONS, chunk_size)
 
-    if policy.enforcement_guidance:
-        lines.append("\n## Enforcement Guidance")
-        for tip in policy.enforcement_guidance:
-            lines.append(f"- {tip}")
 
-    return "\n".join(lines)
+def iter_machine_policy_md(policy: MachinePolicy, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    return iter_sections(policy, MACHINE_SECTIONS, chunk_size)
 
 
-def format_machine_policy_to_md(policy: MachinePolicy) -> str:
-    lines = [
-        f"# {policy.name}\n",
-        f"**Description:** {policy.description}",
-        f"**Scope:** {policy.scope}",
-        "\n## Violation Criteria",
-    ]
-    for rule in policy.violation_criteria:
-        lines.append(f"- {rule}")
-
-    lines.append("\n## Non-Violation Examples")
-    for ex in policy.non_violation_examples:
-        lines.append(f"- {ex}")
-
-    lines.append("\n## Edge Case Guidance")
-    for guidance in policy.edge_case_guidance:
-        lines.append(f"- {guidance}")
-
-    lines.append("\n## Output Format")
-    lines.append(f"- Type: `{policy.output_format.type}`")
-    lines.append(f"- Labels: `{', '.join(policy.output_format.labels)}`")
-    lines.append(f"- Confidence Required: `{policy.output_format.confidence_required}`")
-
-    return "\n".join(lines)
+def iter_policy_md(policy, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    return iter_sections(policy, SECTIONS[type(policy)], chunk_size)
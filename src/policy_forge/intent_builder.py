@@ -32,13 +32,17 @@ class IntentBuilder:
         )
 
     def build_intent(self) -> str:
-        return f"""
-Platform Type: {self.answers["platform_type"]}
-Industry: {self.answers["industry"]}
-Target Behavior: {self.answers["user_behavior"]}
-Real-World Concerns: {self.answers["real_world_concerns"]}
-Moderation Approach: {self.answers["moderation_style"]}
-Additional Context: {self.answers["additional_context"]}
+        return format_intent(self.answers)
+
+
+def format_intent(answers: Dict[str, str]) -> str:
+    return f"""
+Platform Type: {answers["platform_type"]}
+Industry: {answers["industry"]}
+Target Behavior: {answers["user_behavior"]}
+Real-World Concerns: {answers["real_world_concerns"]}
+Moderation Approach: {answers["moderation_style"]}
+Additional Context: {answers.get("additional_context")}
 
 The goal is to write policies that effectively detect and moderate the above behavior, taking into account platform norms, user expectations, and the need for clear guidance and automation.
 """.strip()
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional, Tuple, Type, TypeVar
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from policy_forge import cache, metrics
+from policy_forge.backends import Completion, LLMBackend, backend_from_env
+from policy_forge.scheduler import RateLimitScheduler, SchedulerSettings
+
+load_dotenv()
+
+T = TypeVar("T", bound=BaseModel)
+
+DEFAULT_MODEL = os.getenv("POLICY_FORGE_MODEL", "gpt-4o")
+
+
+@dataclass
+class LLMSettings:
+    model: str = DEFAULT_MODEL
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+    request_timeout: float = 180.0
+    # Cap on upstream calls in flight at once, across every caller sharing the pool
+    max_concurrency: int = 32
+
+    @classmethod
+    def from_env(cls) -> "LLMSettings":
+        defaults = cls()
+        return cls(
+            model=os.getenv("POLICY_FORGE_MODEL", defaults.model),
+            max_connections=int(os.getenv("POLICY_FORGE_LLM_MAX_CONNECTIONS", defaults.max_connections)),
+            max_keepalive_connections=int(
+                os.getenv("POLICY_FORGE_LLM_MAX_KEEPALIVE", defaults.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(os.getenv("POLICY_FORGE_LLM_KEEPALIVE_EXPIRY", defaults.keepalive_expiry)),
+            connect_timeout=float(os.getenv("POLICY_FORGE_LLM_CONNECT_TIMEOUT", defaults.connect_timeout)),
+            request_timeout=float(os.getenv("POLICY_FORGE_LLM_REQUEST_TIMEOUT", defaults.request_timeout)),
+            max_concurrency=int(os.getenv("POLICY_FORGE_LLM_MAX_CONCURRENCY", defaults.max_concurrency)),
+        )
+
+
+def _total_tokens(completion: Completion) -> Optional[int]:
+    return completion.usage.total_tokens if completion.usage is not None else None
+
+
+def _record_usage(completion: Completion, format_name: str):
+    if completion.usage is None:
+        return
+    metrics.LLM_TOKENS.inc(completion.usage.prompt_tokens, kind="prompt", response_format=format_name)
+    metrics.LLM_TOKENS.inc(completion.usage.completion_tokens, kind="completion", response_format=format_name)
+    metrics.LLM_TOKENS.inc(completion.usage.cached_tokens, kind="cached", response_format=format_name)
+    metrics.LLM_CACHED_RATIO.observe(completion.usage.cached_ratio, response_format=format_name)
+
+
+class LLMPool:
+    """An LLM backend plus the concurrency cap and rate-limit scheduler shared by its callers.
+
+    Must be created and used inside a single event loop.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[LLMSettings] = None,
+        scheduler_settings: Optional[SchedulerSettings] = None,
+        backend: Optional[LLMBackend] = None,
+    ):
+        self.settings = settings or LLMSettings.from_env()
+        self.backend = backend or backend_from_env(self.settings)
+        self.semaphore = asyncio.Semaphore(self.settings.max_concurrency)
+        self.scheduler = RateLimitScheduler(scheduler_settings)
+
+    async def parse(
+        self,
+        messages: list,
+        response_format: Type[T],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Completion[T]:
+        model = model or self.settings.model
+        format_name = response_format.__name__
+        queued_at = time.perf_counter()
+
+        async def call():
+            async with self.semaphore:
+                metrics.LLM_QUEUE_SECONDS.observe(time.perf_counter() - queued_at, response_format=format_name)
+                start = time.perf_counter()
+                outcome = "error"
+                with metrics.LLM_IN_FLIGHT.track(), metrics.span(
+                    "policy_forge.llm.parse", model=model, response_format=format_name
+                ):
+                    try:
+                        completion = await asyncio.wait_for(
+                            self.backend.parse(model, messages, response_format), timeout
+                        )
+                        outcome = "ok"
+                        return completion
+                    finally:
+                        metrics.LLM_REQUEST_SECONDS.observe(
+                            time.perf_counter() - start,
+                            backend=self.backend.name,
+                            model=model,
+                            response_format=format_name,
+                            outcome=outcome,
+                        )
+
+        completion = await self.scheduler.run(call, messages, used_tokens=_total_tokens)
+        _record_usage(completion, format_name)
+        return completion
+
+    async def stream(
+        self,
+        messages: list,
+        response_format: Type[T],
+        model: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        """Yield (field, value) as each top-level field completes, then (None, Completion)."""
+        model = model or self.settings.model
+
+        async def open_stream():
+            # Admitted by the scheduler first, like parse, so a call waiting on rate budget holds no slot
+            await self.semaphore.acquire()
+            # Retry until the first event arrives; after that a failure is the caller's to handle
+            events = self.backend.stream(model, messages, response_format)
+            try:
+                return events, await events.__anext__()
+            except BaseException:
+                await events.aclose()
+                self.semaphore.release()
+                raise
+
+        start = time.perf_counter()
+        events, item = await self.scheduler.run(open_stream, messages)
+        outcome = "error"
+        # The slot is held until the stream is closed
+        try:
+            with metrics.LLM_IN_FLIGHT.track():
+                yield item
+                async for item in events:
+                    yield item
+            outcome = "ok"
+        finally:
+            await events.aclose()
+            self.semaphore.release()
+            metrics.LLM_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                backend=self.backend.name,
+                model=model,
+                response_format=response_format.__name__,
+                outcome=outcome,
+            )
+            if outcome == "error":
+                # Failed or abandoned mid-way: the prompt was spent, but not the output it reserved
+                self.scheduler.refund(self.scheduler.settings.expected_output_tokens)
+        completion = item[1]
+        _record_usage(completion, response_format.__name__)
+        used = _total_tokens(completion)
+        if used is not None:
+            self.scheduler.refund(self.scheduler.reservation(messages) - used)
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+
+_default_pool: Optional[LLMPool] = None
+_scoped_pool: ContextVar[Optional[LLMPool]] = ContextVar("policy_forge_llm_pool", default=None)
+
+
+async def startup(settings: Optional[LLMSettings] = None) -> LLMPool:
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = LLMPool(settings)
+    return _default_pool
+
+
+async def shutdown():
+    global _default_pool
+    if _default_pool is not None:
+        await _default_pool.aclose()
+        _default_pool = None
+
+
+def get_pool() -> LLMPool:
+    global _default_pool
+    pool = _scoped_pool.get()
+    if pool is not None:
+        return pool
+    if _default_pool is None:
+        _default_pool = LLMPool()
+    return _default_pool
+
+
+async def parse(
+    messages: list,
+    response_format: Type[T],
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> T:
+    pool = get_pool()
+    model = model or pool.settings.model
+    key = cache.cache_key(model, messages, response_format, namespace=pool.backend.name)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached
+    async with cache.single_flight(key) as cached:
+        # Another worker generated it while this one waited for the lock
+        if cached is not None:
+            return cached
+        completion = await pool.parse(messages, response_format, model=model, timeout=timeout)
+        await cache.aset(key, completion.parsed)
+    return completion.parsed
+
+
+async def stream(
+    messages: list,
+    response_format: Type[T],
+    model: Optional[str] = None,
+) -> AsyncIterator[Tuple[Optional[str], Any]]:
+    """Yield (field, value) as each top-level field completes, then (None, parsed).
+
+    Unlike `parse`, identical streams aren't coalesced: the single-flight lock would stay held
+    while each event waits on the reader, so one slow client would stall every identical call.
+    """
+    pool = get_pool()
+    model = model or pool.settings.model
+    key = cache.cache_key(model, messages, response_format, namespace=pool.backend.name)
+    cached = await cache.aget(key)
+    if cached is not None:
+        for field, value in cached.model_dump(mode="json").items():
+            yield field, value
+        yield None, cached
+        return
+    async for field, value in pool.stream(messages, response_format, model=model):
+        if field is None:
+            await cache.aset(key, value.parsed)
+            value = value.parsed
+        yield field, value
+
+
+def run(fn, *args, **kwargs):
+    """Run an async pipeline function from synchronous code.
+
+    Every call gets its own event loop, so it also gets its own pool.
+    """
+
+    async def runner():
+        pool = LLMPool()
+        token = _scoped_pool.set(pool)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _scoped_pool.reset(token)
+            await pool.aclose()
+
+    return asyncio.run(runner())
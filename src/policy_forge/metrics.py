@@ -0,0 +1,297 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:  # optional: spans are a no-op without opentelemetry-api
+    _otel_trace = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, float("inf"))
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != float("inf"):
+            self.buckets += (float("inf"),)
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_DURATION = REGISTRY.register(
+    Histogram("policy_forge_stage_duration_seconds", "Wall time of each pipeline stage", ["stage", "outcome"])
+)
+STAGE_IN_FLIGHT = REGISTRY.register(
+    Gauge("policy_forge_stage_in_flight", "Pipeline stages currently running", ["stage"])
+)
+LLM_QUEUE_SECONDS = REGISTRY.register(
+    Histogram(
+        "policy_forge_llm_queue_seconds",
+        "Time an LLM call waited for rate budget and a concurrency slot",
+        ["response_format"],
+    )
+)
+LLM_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "policy_forge_llm_request_seconds",
+        "Upstream LLM call latency, per attempt",
+        ["backend", "model", "response_format", "outcome"],
+    )
+)
+LLM_PARSE_SECONDS = REGISTRY.register(
+    Histogram(
+        "policy_forge_llm_parse_seconds",
+        "Time spent parsing and validating LLM responses into schema objects",
+        ["response_format"],
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, float("inf")),
+    )
+)
+LLM_IN_FLIGHT = REGISTRY.register(Gauge("policy_forge_llm_in_flight", "Upstream LLM calls in flight"))
+LLM_QUEUED = REGISTRY.register(Gauge("policy_forge_llm_queued", "LLM calls waiting for rate budget"))
+LLM_TOKENS = REGISTRY.register(
+    Counter("policy_forge_llm_tokens_total", "Tokens used by LLM calls", ["kind", "response_format"])
+)
+LLM_CACHED_RATIO = REGISTRY.register(
+    Histogram(
+        "policy_forge_llm_cached_token_ratio",
+        "Fraction of each call's prompt tokens served from the provider prompt cache",
+        ["response_format"],
+        buckets=(0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0, float("inf")),
+    )
+)
+LLM_RETRIES = REGISTRY.register(
+    Counter("policy_forge_llm_retries_total", "LLM call attempts that were retried", ["error"])
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter("policy_forge_cache_requests_total", "Response cache lookups", ["result"])
+)
+EXAMPLES_DEDUP = REGISTRY.register(
+    Counter("policy_forge_examples_dedup_total", "Generated examples kept or dropped as near-duplicates", ["result"])
+)
+CLASSIFY_ITEMS = REGISTRY.register(
+    Counter(
+        "policy_forge_classify_items_total",
+        "Items answered by a batched classification call, split off and retried, or failed with their batch",
+        ["result"],
+    )
+)
+PREFILTER_ROUTES = REGISTRY.register(
+    Counter("policy_forge_prefilter_routes_total", "Classified items settled by prefilter rules or sent to the LLM", ["path"])
+)
+SEMANTIC_CACHE = REGISTRY.register(
+    Counter("policy_forge_semantic_cache_requests_total", "Semantic intent cache lookups and reported false hits", ["result"])
+)
+SEMANTIC_CACHE_SIMILARITY = REGISTRY.register(
+    Histogram(
+        "policy_forge_semantic_cache_similarity",
+        "Similarity of the closest prior intent at each semantic cache lookup",
+        buckets=(0.2, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0),
+    )
+)
+PREVIEW_SECTIONS = REGISTRY.register(
+    Counter("policy_forge_preview_sections_total", "Preview sections served from memo or re-rendered", ["result"])
+)
+HTTP_REQUEST_SECONDS = REGISTRY.register(
+    Histogram("policy_forge_http_request_seconds", "API request latency", ["method", "route", "status"])
+)
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("policy_forge_http_requests_in_flight", "API requests in flight"))
+
+
+def _tracer():
+    if _otel_trace is None or os.getenv("POLICY_FORGE_OTEL", "0").lower() not in ("1", "true", "on", "yes"):
+        return None
+    return _otel_trace.get_tracer("policy_forge")
+
+
+def span(name: str, **attributes):
+    """An OpenTelemetry span when enabled with POLICY_FORGE_OTEL=1, otherwise a no-op."""
+    tracer = _tracer()
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def timed(stage: str):
+    """Record the duration, outcome and in-flight count of an async pipeline stage."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            with STAGE_IN_FLIGHT.track(stage=stage), span(f"policy_forge.{stage}"):
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    STAGE_DURATION.observe(time.perf_counter() - start, stage=stage, outcome=outcome)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from policy_forge import example_gen, policy_writer, refiner, scheduler
+from policy_forge.schema import (
+    MachinePolicy,
+    ModeratorPolicy,
+    PublicPolicy,
+    SyntheticExample,
+)
+
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("POLICY_FORGE_BATCH_CONCURRENCY", "4"))
+
+STAGES = ("machine", "examples", "refine", "derive")
+
+
+class PipelineResult(BaseModel):
+    index: int = 0
+    intent: str
+    status: Literal["ok", "error"] = "ok"
+    error: Optional[str] = None
+    machine: Optional[MachinePolicy] = None
+    examples: List[SyntheticExample] = Field(default_factory=list)
+    refined: Optional[MachinePolicy] = None
+    public: Optional[PublicPolicy] = None
+    moderator: Optional[ModeratorPolicy] = None
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each stage")
+
+
+def _stage_timer(result: PipelineResult, on_stage: Optional[Callable[[str, float], None]]):
+    async def stage(name, coro):
+        start = time.perf_counter()
+        value = await coro
+        result.timings[name] = time.perf_counter() - start
+        if on_stage is not None:
+            on_stage(name, result.timings[name])
+        return value
+
+    return stage
+
+
+async def run_generate(
+    intent: str,
+    index: int = 0,
+    on_stage: Optional[Callable[[str, float], None]] = None,
+) -> PipelineResult:
+    # Same chain as policy_writer.generate_policy, with per-stage timings
+    result = PipelineResult(index=index, intent=intent)
+    stage = _stage_timer(result, on_stage)
+    result.machine = await stage("machine", policy_writer.generate_initial_policy_async(intent))
+    result.public, result.moderator = await stage(
+        "derive", policy_writer.generate_derived_policies_async(result.machine)
+    )
+    return result
+
+
+async def run_pipeline(
+    intent: str,
+    index: int = 0,
+    on_stage: Optional[Callable[[str, float], None]] = None,
+) -> PipelineResult:
+    # Unattended version of `policyforge new`: generated examples are taken as reviewed
+    result = PipelineResult(index=index, intent=intent)
+    stage = _stage_timer(result, on_stage)
+    result.machine = await stage("machine", policy_writer.generate_initial_policy_async(intent))
+    examples = await stage("examples", example_gen.generate_examples_async(result.machine))
+    result.examples = examples.examples
+    result.refined = await stage(
+        "refine", refiner.refine_machine_policy_async(result.machine, result.examples)
+    )
+    result.public, result.moderator = await stage(
+        "derive", policy_writer.generate_derived_policies_async(result.refined)
+    )
+    return result
+
+
+async def run_batch(
+    intents: Iterable[str],
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+) -> AsyncIterator[PipelineResult]:
+    """Run the pipeline for every intent, yielding results in completion order.
+
+    A failing intent yields an error result rather than aborting the batch.
+    """
+    pending = iter(enumerate(intents))
+    results: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def worker():
+        try:
+            for index, intent in pending:
+                try:
+                    with scheduler.priority(scheduler.BATCH):
+                        result = await run_pipeline(intent, index=index)
+                except Exception as e:
+                    result = PipelineResult(index=index, intent=intent, status="error", error=str(e))
+                await results.put(result)
+        finally:
+            await results.put(finished)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            item = await results.get()
+            if item is finished:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,230 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+from policy_forge import llm, metrics, prompts
+from policy_forge.cache import MemoryCache
+from policy_forge.classifier import Classification, classify_many_async
+from policy_forge.dedup import policy_key
+from policy_forge.schema import MachinePolicy
+
+# Longer patterns are where catastrophic backtracking and over-fitted rules come from
+MAX_PATTERN_LENGTH = 200
+
+# Longer texts go to the LLM, which bounds the worst case of any backtracking the checks below miss
+MAX_TEXT_LENGTH = 10_000
+
+PATHS = ("rule", "llm")
+
+
+class LexicalRule(BaseModel):
+    criterion: int = Field(..., description="Number of the violation criterion this rule implements; 0 for non-violation rules")
+    kind: Literal["keyword", "regex"]
+    pattern: str = Field(..., description="A word or phrase for keyword rules, or a Python regular expression")
+    verdict: Literal["violation", "non-violation"] = Field(..., description="What content matching the rule always is")
+
+
+class RuleSet(BaseModel):
+    rules: List[LexicalRule]
+
+
+def _safe_regex(pattern: str) -> bool:
+    """Whether `pattern` is free of backreferences, conditionals and nested unbounded quantifiers.
+
+    Backreferences and conditionals count groups, so they change meaning once the pattern sits
+    in an alternation with other rules. A repeated group that itself holds an unbounded
+    quantifier, like `(a+)+`, backtracks exponentially on a near miss.
+    """
+    # Per open group, whether it holds an unbounded quantifier; the same for the group just closed
+    groups = [False]
+    closed = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        quantifier = re.match(r"[*+]|\{(?=[\d,])\d*(,?)(\d*)\}", pattern[i:])
+        if char == "\\":
+            if pattern[i + 1 : i + 2] in tuple("123456789"):
+                return False
+            i += 2
+        elif char == "[":
+            # Skip the class; a `]` straight after the opening (or its `^`) is a literal
+            i += 2 if pattern.startswith("[^", i) else 1
+            i += 1 if pattern.startswith("]", i) else 0
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char == "(":
+            if pattern.startswith(("(?(", "(?P="), i):
+                return False
+            groups.append(False)
+            i += 1
+        elif char == ")" and len(groups) > 1:
+            closed = groups.pop()
+            groups[-1] = groups[-1] or closed
+            i += 1
+            continue
+        elif quantifier:
+            if closed:
+                return False
+            unbounded = quantifier.group() in ("*", "+") or (quantifier.group(1) and not quantifier.group(2))
+            groups[-1] = groups[-1] or bool(unbounded)
+            i += len(quantifier.group())
+        else:
+            i += 1
+        closed = False
+    return True
+
+
+def _valid_regex(pattern: str) -> bool:
+    if not _safe_regex(pattern):
+        return False
+    try:
+        # Compiled as it will sit in the alternation, which rejects e.g. inline global flags
+        compiled = re.compile(f"(?:{pattern})", re.IGNORECASE)
+    except re.error:
+        return False
+    return not compiled.groupindex and compiled.search("") is None
+
+
+def _normalize(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def _trie(keywords: Iterable[str]) -> str:
+    """One regex matching any of `keywords`, factored by shared prefix.
+
+    A flat alternation makes `re` try every keyword at every position; a trie rejects most
+    positions on their first character, which is what makes hundreds of keywords cheap.
+    Longer keywords win over their prefixes, and spaces match any run of whitespace.
+    """
+    root: dict = {}
+    for keyword in keywords:
+        node = root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child) for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = f"(?:{'|'.join(branches)})"
+        return group + "?" if "" in node else group
+
+    return build(root)
+
+
+class Prefilter:
+    """Rules compiled into one regex automaton per verdict that settles clear-cut content without the LLM.
+
+    Keywords share a prefix trie, and each regex rule gets a named group. Content is decided
+    locally only when the rules it matches agree: violation rules only (violation) or
+    non-violation rules only (non-violation). Content matching both, or none, is escalated.
+    Each verdict is scanned on its own, so a match of one can't hide an overlapping match of the other.
+    """
+
+    def __init__(self, rules: Sequence[LexicalRule]):
+        self.keywords: Dict[str, LexicalRule] = {}
+        self.regexes: List[LexicalRule] = []
+        for rule in rules:
+            if not rule.pattern.strip() or len(rule.pattern) > MAX_PATTERN_LENGTH:
+                continue
+            if rule.kind == "keyword":
+                self.keywords.setdefault(_normalize(rule.pattern), rule)
+            elif _valid_regex(rule.pattern):
+                self.regexes.append(rule)
+        self.rules = [*self.keywords.values(), *self.regexes]
+        self.dropped = len(rules) - len(self.rules)
+        self._automata: Dict[str, re.Pattern] = {}
+        for verdict in ("violation", "non-violation"):
+            groups = [f"(?P<r{i}>{rule.pattern})" for i, rule in enumerate(self.regexes) if rule.verdict == verdict]
+            keywords = [keyword for keyword, rule in self.keywords.items() if rule.verdict == verdict]
+            if keywords:
+                # Not `\b`, which needs a word character on one side and so never matches around e.g. `$$$`
+                groups.append(rf"(?P<kw>(?<!\w){_trie(keywords)}(?!\w))")
+            if groups:
+                self._automata[verdict] = re.compile("|".join(groups), re.IGNORECASE)
+        self._lock = threading.Lock()
+        self.routes: Dict[str, int] = dict.fromkeys(PATHS, 0)
+
+    def _rule(self, found: re.Match) -> LexicalRule:
+        # Each rule's pattern sits in its own named group, which closes last, so `lastgroup` names it
+        if found.lastgroup == "kw":
+            return self.keywords[_normalize(found.group())]
+        return self.regexes[int(found.lastgroup[1:])]
+
+    def match(self, text: str) -> List[LexicalRule]:
+        return [self._rule(found) for automaton in self._automata.values() for found in automaton.finditer(text)]
+
+    def check(self, text: str) -> Optional[str]:
+        """The label for clear-cut content, or None when it needs the LLM.
+
+        Doesn't count toward `routes`; callers `record` each path's share in bulk.
+        """
+        if len(text) > MAX_TEXT_LENGTH:
+            return None
+        verdicts = [verdict for verdict, automaton in self._automata.items() if automaton.search(text)]
+        return verdicts[0] if len(verdicts) == 1 else None
+
+    def record(self, path: str, count: int = 1):
+        with self._lock:
+            self.routes[path] += count
+        metrics.PREFILTER_ROUTES.inc(count, path=path)
+
+    def fractions(self) -> Dict[str, float]:
+        with self._lock:
+            total = sum(self.routes.values())
+            return {path: count / total if total else 0.0 for path, count in self.routes.items()}
+
+
+_compiled = MemoryCache(max_entries=256)
+
+
+@metrics.timed("compile_prefilter")
+async def compile_prefilter_async(policy: MachinePolicy) -> Prefilter:
+    """Extract lexical rules from `policy` with one LLM call and compile them.
+
+    Compiled prefilters are kept per policy content, so each version is extracted once per
+    process; the extraction call itself also goes through the response cache.
+    """
+    key = policy_key(policy)
+    prefilter = _compiled.get(key)
+    if prefilter is None:
+        rules = await llm.parse(prompts.RULES.messages(prompts.render(policy, numbered=True)), RuleSet)
+        prefilter = Prefilter(rules.rules)
+        _compiled.set(key, prefilter)
+    return prefilter
+
+
+class RoutedClassification(Classification):
+    path: Literal["rule", "llm"]
+
+
+async def classify_routed_async(
+    policy: MachinePolicy, texts: Sequence[str], prefilter: Optional[Prefilter] = None
+) -> List[Union[RoutedClassification, Exception]]:
+    """Classify texts, settling clear-cut ones with the prefilter and sending the rest to the LLM in batches."""
+    prefilter = prefilter or await compile_prefilter_async(policy)
+    results: Dict[int, Union[RoutedClassification, Exception]] = {}
+    escalated: List[Tuple[int, str]] = []
+    for index, text in enumerate(texts):
+        label = prefilter.check(text)
+        if label is None:
+            escalated.append((index, text))
+        else:
+            results[index] = RoutedClassification(label=label, path="rule")
+    prefilter.record("rule", len(texts) - len(escalated))
+    prefilter.record("llm", len(escalated))
+    if escalated:
+        outcomes = await classify_many_async(policy, [text for _, text in escalated])
+        for (index, _), outcome in zip(escalated, outcomes):
+            results[index] = (
+                outcome if isinstance(outcome, Exception) else RoutedClassification(**outcome.model_dump(), path="llm")
+            )
+    return [results[index] for index in range(len(texts))]
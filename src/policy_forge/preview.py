@@ -0,0 +1,54 @@
+import hashlib
+import json
+from typing import Dict, Type
+
+from pydantic import BaseModel
+
+from policy_forge import metrics
+from policy_forge.cache import MemoryCache
+from policy_forge.formatters import SECTIONS
+from policy_forge.schema import MachinePolicy, ModeratorPolicy, PublicPolicy
+
+POLICY_TYPES: Dict[str, Type[BaseModel]] = {
+    "machine": MachinePolicy,
+    "public": PublicPolicy,
+    "moderator": ModeratorPolicy,
+}
+
+
+class PreviewRenderer:
+    """Renders policy Markdown section by section, memoizing each section by a hash of its fields.
+
+    While a policy is being edited, only the sections whose fields changed are re-rendered.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self._sections = MemoryCache(max_entries=max_entries)
+
+    def render(self, policy: BaseModel) -> str:
+        texts = []
+        for section in SECTIONS[type(policy)]:
+            fields = policy.model_dump_json(include=set(section.fields))
+            key = hashlib.sha256(f"{type(policy).__name__}\0{section.name}\0{fields}".encode("utf-8")).hexdigest()
+            text = self._sections.get(key)
+            metrics.PREVIEW_SECTIONS.inc(result="miss" if text is None else "hit")
+            if text is None:
+                text = "\n".join(section.render(policy))
+                self._sections.set(key, text)
+            if text:
+                texts.append(text)
+        return "\n".join(texts)
+
+
+def etag(policy_type: str, data: dict) -> str:
+    # Computed from the submitted fields, so an unchanged preview is answered without validating or rendering
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(f"{policy_type}\0{payload}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+_renderer = PreviewRenderer()
+
+
+def render_preview(policy: BaseModel) -> str:
+    return _renderer.render(policy)
@@ -0,0 +1,417 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Tuple, Type
+
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt whose static text always comes first and whose inputs come last.
+
+    Providers cache prompts by exact prefix, so every call built from one template
+    shares the system message and instructions as a cacheable prefix. Only the inputs
+    appended after `instructions` vary.
+    """
+
+    name: str
+    system: str
+    instructions: str
+    # One heading per input, in the order the inputs are passed to `messages`
+    inputs: Tuple[str, ...]
+
+    def messages(self, *values) -> list:
+        if len(values) != len(self.inputs):
+            raise ValueError(f"{self.name} prompt takes {len(self.inputs)} input(s), got {len(values)}")
+        variable = "\n".join(
+            f'{heading}\n\n"""{render(value)}"""\n' for heading, value in zip(self.inputs, values)
+        )
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": f"{self.instructions}\n{variable}"},
+        ]
+
+
+def _line(value: Any) -> str:
+    # List items and inline fields must stay on one line to keep the layout unambiguous
+    return " ".join(str(value).split())
+
+
+def _inline(model: BaseModel) -> str:
+    return "; ".join(
+        f"{key}={','.join(map(_line, value)) if isinstance(value, list) else _line(value)}"
+        for key, value in model.model_dump(exclude_none=True).items()
+    )
+
+
+def _example(example: Any) -> str:
+    # e.g. "- [violation] text (is_approved=False; feedback=...)"
+    fields = example.model_dump(exclude_none=True) if isinstance(example, BaseModel) else dict(example)
+    label, text = fields.pop("label", "?"), fields.pop("text", "")
+    extra = "; ".join(f"{key}={_line(value)}" for key, value in fields.items() if value is not None)
+    return f"- [{label}] {_line(text)}" + (f" ({extra})" if extra else "")
+
+
+def render(value: Any, numbered: bool = False) -> str:
+    """Compact, deterministic text for a schema object embedded in a prompt.
+
+    Models render as one `field: value` line per field, with list fields as `- item`
+    lines (`1. item` when `numbered`), instead of the much longer repr. Lists of examples
+    render one per line.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return "\n".join(_example(item) for item in value)
+    if not isinstance(value, BaseModel):
+        return str(value)
+    lines = []
+    for key in type(value).model_fields:
+        field = getattr(value, key)
+        if field is None or field == []:
+            continue
+        if isinstance(field, list):
+            lines.append(f"{key}:")
+            lines.extend(
+                f"{f'{i}.' if numbered else '-'} {_line(item)}" for i, item in enumerate(field, 1)
+            )
+        elif isinstance(field, BaseModel):
+            lines.append(f"{key}: {_inline(field)}")
+        else:
+            lines.append(f"{key}: {_line(field)}")
+    return "\n".join(lines)
+
+
+def prefix_key(messages: list, response_format: Type[BaseModel]) -> str:
+    """Identifies calls sharing a static prefix, so the provider can route them to the same cache."""
+    digest = hashlib.sha256(f"{response_format.__name__}\0{messages[0]['content']}".encode("utf-8"))
+    return f"policy-forge-{digest.hexdigest()[:16]}"
+
+
+POLICY_EXPERT_SYSTEM = (
+    "You are a senior trust and safety policy expert with extensive experience at major social platforms. "
+    "Your expertise spans policy development, enforcement operations, and machine learning systems. "
+    "You are responsible for drafting comprehensive moderation policies that balance user safety, platform integrity, "
+    "and operational efficiency. Your policies should be detailed enough to serve as reference documentation "
+    "for teams across the organization. "
+    "Your tone should be authoritative yet accessible, similar to policy guidelines published by Meta, YouTube, "
+    "or Reddit. Be thorough and precise, avoiding unnecessary legalese while maintaining professional rigor. "
+    "Each policy section should be substantial (300-500 words) to provide adequate context and guidance."
+)
+
+MACHINE = PromptTemplate(
+    name="machine",
+    system=POLICY_EXPERT_SYSTEM,
+    instructions="""
+You are a Trust & Safety policy architect writing a **machine-readable policy** for an LLM-based moderation system.
+
+This policy will be used in both fine-tuning and prompt-based classification contexts. The goal is to capture the target
+behavior as precisely and programmatically as possible, while accounting for edge cases and contextual nuances.
+
+Based on the structured intent provided by the platform administrator at the end of this message,
+please return a JSON object using the following schema:
+
+- **name**: Clear, technical identifier for the policy
+- **description**: Detailed specification (200-300 words) covering:
+  * Detection objectives
+  * Technical requirements
+  * Performance expectations
+  * Integration considerations
+- **scope**: Comprehensive coverage of:
+  * Content types and formats
+  * Platform contexts
+  * Technical limitations
+  * Integration points
+- **violation_criteria**: A detailed list of:
+  * Atomic, testable rules
+  * Pattern recognition requirements
+  * Context evaluation criteria
+  * Confidence thresholds
+- **non_violation_examples**: At least 5 examples covering:
+  * Clear non-violations
+  * Edge cases to avoid false positives
+  * Cultural exceptions
+  * Context-dependent cases
+- **edge_case_guidance**: Detailed notes on:
+  * Handling ambiguity
+  * Cultural variation
+  * Satire and parody detection
+  * Context interpretation
+  * Confidence scoring
+- **output_format**: One of \"binary\", \"multiclass\", or \"score_range\" with:
+  * Clear definition of output classes
+  * Confidence thresholds
+  * Escalation criteria
+  * Integration requirements
+
+Tone: Technical, precise, and system-oriented.
+Audience: LLMs, engineers, and data scientists building detection systems.
+""",
+    inputs=("Here is the structured intent provided by the platform administrator:",),
+)
+
+MODERATOR = PromptTemplate(
+    name="moderator",
+    system=POLICY_EXPERT_SYSTEM,
+    instructions="""
+You are a Trust & Safety operations lead writing **moderator-facing policy guidance** for internal enforcement teams.
+
+Based on the machine-readable policy at the end of this message, which defines the core rules and logic, write a
+comprehensive moderator guidance that provides operational clarity and supports consistent enforcement.
+This guidance will be used by trained moderators and trust & safety analysts for enforcement decisions.
+
+Return a JSON object using the following schema:
+
+- **name**: Clear, descriptive title of the policy (2-5 words)
+- **description**: A detailed description (100-200 words) covering:
+  * Core purpose and objectives
+  * Key enforcement principles
+  * Operational context
+  * Expected outcomes
+- **scope**: Comprehensive coverage of:
+  * Content types and formats
+  * Platform contexts and features
+  * Geographic and cultural considerations
+  * Temporal aspects (if relevant)
+- **violation_examples**: At least 5 realistic examples covering:
+  * Clear-cut violations
+  * Subtle or nuanced violations
+  * Context-dependent violations
+- **non_violation_examples**: At least 3 examples covering:
+  * Edge cases that should be allowed
+  * Content that might seem risky but is permissible
+  * Cultural or contextual exceptions
+- **edge_case_notes**: At least 3 detailed notes addressing:
+  * Cultural and regional variations
+  * Context-dependent interpretation
+  * Special considerations for different user groups
+  * Handling of satire, parody, and artistic expression
+- **severity**: One of: \"low\", \"medium\", \"high\", \"critical\" with:
+  * Clear justification for the severity level
+  * Specific enforcement actions for each severity
+  * Escalation paths and thresholds
+
+Tone: Professional, precise, and operationally focused.
+Audience: Moderators, trust analysts, and enforcement teams.
+""",
+    inputs=("Here is the machine-readable policy that defines the core rules and logic:",),
+)
+
+PUBLIC = PromptTemplate(
+    name="public",
+    system=POLICY_EXPERT_SYSTEM,
+    instructions="""
+You're a Trust & Safety policy expert drafting a **public-facing policy** for a digital platform.
+
+Based on the machine-readable policy at the end of this message, which defines the core rules and logic, please write a
+comprehensive user-facing policy that helps end users understand what this rule is about, why it matters,
+where it applies, and what content is allowed or disallowed. This policy should be accessible while maintaining
+professional standards.
+
+Return a JSON object using the following schema:
+
+- **name**: Clear, user-friendly title (2-5 words)
+- **summary**: A detailed, in-depth explanation of the policy that explains the rule in plain, clear language for end users (400-500 words) covering:
+  * What the policy means in plain language
+  * Why it matters to users
+  * How it affects the community
+  * What users can expect
+- **rationale**: Comprehensive explanation of:
+  * Safety and security considerations
+  * Legal and regulatory requirements
+  * Community standards and values
+  * Platform integrity needs
+- **scope**: Clear definition of:
+  * Where and when the policy applies
+  * Types of content covered
+  * Platform features affected
+  * Geographic considerations
+- **violation_examples**: At least 5 examples covering:
+  * Common violations
+  * Subtle violations
+  * Context-dependent cases
+- **non_violation_examples**: At least 3 examples showing:
+  * Permissible content
+  * Edge cases that are allowed
+  * Cultural exceptions
+- **faq**: At least 5 Q&A entries addressing:
+  * Common misunderstandings
+  * Edge cases and exceptions
+  * Appeal processes
+  * Cultural considerations
+  * Enforcement procedures
+
+Tone: Empathetic, professional, and accessible to global users.
+Audience: Diverse global user base with varying levels of technical expertise.
+""",
+    inputs=("Here is the machine-readable policy that defines the core rules and logic:",),
+)
+
+EXAMPLES = PromptTemplate(
+    name="examples",
+    system=(
+        "You are a senior trust and safety expert with extensive experience in content moderation and policy enforcement. "
+        "Your expertise includes analyzing user-generated content across various platforms and understanding how policies "
+        "are applied in real-world scenarios. You excel at identifying subtle policy violations, edge cases, and "
+        "culturally contextual content. Your examples should reflect the diversity of real user behavior, including "
+        "different communication styles, cultural contexts, and platform-specific patterns."
+    ),
+    instructions="""
+Based on the policy at the end of this message, generate exactly 8 high-quality examples of user content that would be
+encountered on a modern social platform. These examples should test the policy's boundaries and effectiveness across
+different scenarios.
+
+Distribution of examples:
+- 4 clear **violations** (including both obvious and subtle cases)
+- 3 clear **non-violations** (including edge cases that should be allowed)
+- 1 **borderline case** that tests policy boundaries
+
+For each example, provide:
+- `text`: Realistic user-generated content (1-3 sentences)
+- `label`: One of `"violation"`, `"non-violation"`, or `"borderline"`
+- `context`: Brief explanation of why this example was classified as such
+- `variation_type`: One of:
+  * "explicit" - Direct, obvious policy violation/non-violation
+  * "implicit" - Indirect or subtle policy violation/non-violation
+  * "contextual" - Depends heavily on surrounding context
+  * "cultural" - Involves cultural or regional considerations
+  * "satirical" - Uses humor, parody, or satire
+  * "technical" - Involves technical or platform-specific elements
+
+Ensure diversity across:
+- Communication styles (formal, casual, slang, emoji usage)
+- Cultural contexts and regional variations
+- Platform-specific patterns (hashtags, mentions, etc.)
+- Content types (text, links, references to media)
+- User intentions (malicious, accidental, satirical)
+- Language complexity and sophistication
+
+Return only a JSON object with a field `"examples"` containing a list of 8 example objects.
+
+Note: Examples should be realistic but avoid extreme or harmful content. Focus on testing policy boundaries while maintaining
+platform-appropriate content standards.
+""",
+    inputs=("Here is the policy:",),
+)
+
+# Same prefix as EXAMPLES up to the inputs, so top-up calls share its cache
+EXAMPLES_AVOIDING = PromptTemplate(
+    name="examples_avoiding",
+    system=EXAMPLES.system,
+    instructions=EXAMPLES.instructions
+    + "\nThe examples listed after the policy have already been generated. Do not repeat or paraphrase any of them.\n",
+    inputs=("Here is the policy:", "Existing examples:"),
+)
+
+REFINE = PromptTemplate(
+    name="refine",
+    system=(
+        "You are a senior trust and safety policy expert with extensive experience in content moderation and policy enforcement. "
+        "Your expertise includes analyzing user-generated content across various platforms and understanding how policies "
+        "are applied in real-world scenarios. You excel at identifying subtle policy violations, edge cases, and "
+        "culturally contextual content. Your task is to refine the machine policy based on reviewed examples to ensure "
+        "it captures all edge cases and nuances correctly."
+    ),
+    instructions="""
+You will be given the current machine policy and reviewed examples with their labels, at the end of this message.
+
+Please refine the machine policy to better handle the edge cases and nuances revealed by the reviewed examples.
+Focus on making the policy more precise and comprehensive while maintaining its machine-readable nature.
+
+Return a JSON object using the same schema as the input machine policy.
+""",
+    inputs=(
+        "Here is the current machine policy:",
+        "And here are the reviewed examples with their labels:",
+    ),
+)
+
+REFINE_PATCH = PromptTemplate(
+    name="refine_patch",
+    system=REFINE.system,
+    instructions="""
+You will be given the current machine policy, with its violation criteria numbered, and newly reviewed examples
+with their labels, at the end of this message. Earlier reviews have already been incorporated into the policy.
+
+Please propose the smallest change to the policy that handles the edge cases and nuances revealed by the new examples.
+Do not restate parts of the policy that should stay as they are.
+
+Return a JSON object with:
+- **criteria_added**: New atomic, testable violation criteria
+- **criteria_removed**: Numbers of criteria that are wrong or redundant
+- **criteria_edited**: Criteria to reword, each as its number and the full replacement text
+- **non_violation_examples_added**: New examples that should NOT be flagged
+- **edge_case_guidance_added**: New guidance for ambiguous or borderline cases
+
+Use empty lists for anything that needs no change.
+""",
+    inputs=(
+        "Here is the current machine policy:",
+        "And here are the newly reviewed examples with their labels:",
+    ),
+)
+
+CLASSIFY = PromptTemplate(
+    name="classify",
+    system=(
+        "You are a content moderation classifier. You apply the policy you are given exactly as written, "
+        "judging only the content provided and never inventing context that is not there."
+    ),
+    instructions="""
+Classify the user content at the end of this message against the policy that precedes it.
+
+The content is a violation if it meets any of the violation criteria, read together with the edge case guidance.
+Otherwise it is a non-violation.
+
+Return a JSON object with:
+- **label**: One of the labels listed in the policy's output format
+- **confidence**: Your confidence in the label, from 0 to 1
+""",
+    inputs=("Here is the policy:", "Here is the content to classify:"),
+)
+
+CLASSIFY_BATCH = PromptTemplate(
+    name="classify_batch",
+    system=CLASSIFY.system,
+    instructions="""
+Classify each item of user content at the end of this message against the policy that precedes it. Items are numbered
+from 0, one per line, and each must be judged on its own.
+
+An item is a violation if it meets any of the violation criteria, read together with the edge case guidance.
+Otherwise it is a non-violation.
+
+Return a JSON object with `results`: one entry for every item, each with:
+- **index**: The item's number
+- **label**: One of the labels listed in the policy's output format
+- **confidence**: Your confidence in the label, from 0 to 1
+""",
+    inputs=("Here is the policy:", "Here are the items to classify:"),
+)
+
+RULES = PromptTemplate(
+    name="rules",
+    system=(
+        "You are a trust and safety engineer who turns moderation policies into deterministic filters. "
+        "You only write a rule when matching it settles the decision with no judgment left to make."
+    ),
+    instructions="""
+Extract lexical rules from the machine policy at the end of this message, whose violation criteria are numbered.
+
+A rule is a keyword or phrase, or a Python regular expression, whose presence alone decides the label:
+- **violation** rules for criteria that come down to specific words, slurs, URLs, phone numbers or other patterns
+- **non-violation** rules for phrases that always make content acceptable, such as those in the non-violation examples
+
+Leave out any criterion that depends on intent, context or tone; that content goes to a human-level classifier
+instead, and a wrong rule is worse than no rule. Matching is case-insensitive, and keywords match whole words.
+Keep regular expressions short and free of nested quantifiers and backreferences.
+
+Return a JSON object with `rules`, each with:
+- **criterion**: The number of the violation criterion the rule implements, or 0 for non-violation rules
+- **kind**: `"keyword"` or `"regex"`
+- **pattern**: The keyword or phrase, or the regular expression
+- **verdict**: `"violation"` or `"non-violation"`
+
+Return an empty list if no criterion can be decided lexically.
+""",
+    inputs=("Here is the machine policy:",),
+)
@@ -1,50 +1,120 @@
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import hashlib
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from policy_forge import llm, metrics, prompts
 from policy_forge.schema import (
     MachinePolicy,
+    PolicyPatch,
 )
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+@metrics.timed("refine_machine_policy")
+async def refine_machine_policy_async(
+    machine_policy: MachinePolicy, reviewed_examples: dict
+) -> MachinePolicy:
+    messages = prompts.REFINE.messages(machine_policy, reviewed_examples)
+    return await llm.parse(messages, MachinePolicy)
 
 
 def refine_machine_policy(
     machine_policy: MachinePolicy, reviewed_examples: dict
 ) -> MachinePolicy:
-    system_msg = {
-        "role": "system",
-        "content": (
-            "You are a senior trust and safety policy expert with extensive experience in content moderation and policy enforcement. "
-            "Your expertise includes analyzing user-generated content across various platforms and understanding how policies "
-            "are applied in real-world scenarios. You excel at identifying subtle policy violations, edge cases, and "
-            "culturally contextual content. Your task is to refine the machine policy based on reviewed examples to ensure "
-            "it captures all edge cases and nuances correctly."
-        ),
-    }
-
-    user_msg = {
-        "role": "user",
-        "content": f"""
-Here is the current machine policy:
-
-\"\"\"{machine_policy}\"\"\"
-
-And here are the reviewed examples with their labels:
-
-\"\"\"{reviewed_examples}\"\"\"
-
-Please refine the machine policy to better handle the edge cases and nuances revealed by the reviewed examples. 
-Focus on making the policy more precise and comprehensive while maintaining its machine-readable nature.
-
-Return a JSON object using the same schema as the input machine policy.
-""",
-    }
-
-    refined_policy = client.beta.chat.completions.parse(
-        model="gpt-4o",
-        messages=[system_msg, user_msg],
-        response_format=MachinePolicy,
+    return llm.run(refine_machine_policy_async, machine_policy, reviewed_examples)
+
+
+class PolicyVersion(BaseModel):
+    version: int
+    policy: MachinePolicy
+    patch: Optional[PolicyPatch] = Field(default=None, description="Patch that produced this version from the previous one")
+    examples_incorporated: int = 0
+
+
+class RefinementHistory(BaseModel):
+    """Every version of a policy across incremental refinement rounds.
+
+    Versions are never rewritten, and `incorporated` records which reviewed examples
+    have already been folded in, so each round only sends what is new.
+    """
+
+    versions: List[PolicyVersion]
+    incorporated: List[str] = Field(default_factory=list, description="Fingerprints of incorporated examples")
+
+    @classmethod
+    def start(cls, machine_policy: MachinePolicy) -> "RefinementHistory":
+        return cls(versions=[PolicyVersion(version=1, policy=machine_policy)])
+
+    @property
+    def latest(self) -> PolicyVersion:
+        return self.versions[-1]
+
+    def pending(self, reviewed_examples: list) -> list:
+        seen = set(self.incorporated)
+        pending = []
+        for example in reviewed_examples:
+            key = example_fingerprint(example)
+            if key not in seen:
+                seen.add(key)
+                pending.append(example)
+        return pending
+
+
+def example_fingerprint(example) -> str:
+    # Includes the label and any review fields, so a relabelled example counts as new
+    fields = example.model_dump(mode="json") if isinstance(example, BaseModel) else dict(example)
+    fields["text"] = " ".join(str(fields.get("text", "")).split())
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _append_new(items: List[str], additions: List[str]) -> List[str]:
+    return items + [item for item in dict.fromkeys(additions) if item not in items]
+
+
+def apply_patch(machine_policy: MachinePolicy, patch: PolicyPatch) -> MachinePolicy:
+    """Apply a patch locally. Criterion numbers refer to the policy the patch was generated against."""
+    criteria = list(machine_policy.violation_criteria)
+    for edit in patch.criteria_edited:
+        if 1 <= edit.number <= len(criteria):
+            criteria[edit.number - 1] = edit.text
+    removed = set(patch.criteria_removed)
+    criteria = [criterion for number, criterion in enumerate(criteria, 1) if number not in removed]
+    return machine_policy.model_copy(
+        update={
+            "violation_criteria": _append_new(criteria, patch.criteria_added),
+            "non_violation_examples": _append_new(
+                machine_policy.non_violation_examples, patch.non_violation_examples_added
+            ),
+            "edge_case_guidance": _append_new(machine_policy.edge_case_guidance, patch.edge_case_guidance_added),
+        },
+        deep=True,
+    )
+
+
+@metrics.timed("refine_incremental")
+async def refine_incremental_async(history: RefinementHistory, reviewed_examples: list) -> PolicyVersion:
+    """Fold reviewed examples not yet incorporated into `history` as a new version.
+
+    Only the new examples and the latest policy are sent, and the model returns a patch
+    rather than a whole policy. Returns the latest version, unchanged when nothing is new.
+    """
+    pending = history.pending(reviewed_examples)
+    if not pending:
+        return history.latest
+    current = history.latest
+    messages = prompts.REFINE_PATCH.messages(prompts.render(current.policy, numbered=True), pending)
+    patch = await llm.parse(messages, PolicyPatch)
+    version = PolicyVersion(
+        version=current.version + 1,
+        policy=apply_patch(current.policy, patch),
+        patch=patch,
+        examples_incorporated=len(pending),
     )
+    history.versions.append(version)
+    history.incorporated.extend(example_fingerprint(example) for example in pending)
+    return version
+
 
-    return refined_policy.choices[0].message.parsed
+def refine_incremental(history: RefinementHistory, reviewed_examples: list) -> PolicyVersion:
+    return llm.run(refine_incremental_async, history, reviewed_examples)
@@ -0,0 +1,322 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Protocol, Sequence
+
+from pydantic import BaseModel
+
+from policy_forge import shared
+from policy_forge.refiner import example_fingerprint
+from policy_forge.schema import ReviewedExample
+
+
+class StoredReview(ReviewedExample):
+    id: int
+    policy_id: str
+    policy_version: int
+    created_at: float
+    incorporated_in: Optional[int] = None
+
+    def example(self) -> ReviewedExample:
+        # What refinement sees; the storage fields would change the example's fingerprint
+        return ReviewedExample.model_validate(self.model_dump(include=set(ReviewedExample.model_fields)))
+
+
+class LabelAgreement(BaseModel):
+    label: str
+    reviewed: int
+    approved: int
+    agreement: float
+
+
+class ReviewStore(Protocol):
+    async def add(self, policy_id: str, policy_version: int, examples: Sequence[ReviewedExample]) -> int: ...
+
+    async def pending(self, policy_id: str, limit: Optional[int] = None) -> List[StoredReview]: ...
+
+    async def count_pending(self, policy_id: str) -> int: ...
+
+    async def mark_incorporated(self, review_ids: Sequence[int], version: int) -> int: ...
+
+    async def stats(self, policy_id: str, version: Optional[int] = None) -> List[LabelAgreement]: ...
+
+    def close(self) -> None: ...
+
+
+class SQLiteReviewStore:
+    """Reviewed examples, each tied to the policy version it was generated against.
+
+    Per-label agreement counts are updated in the same transaction as each batch, and a
+    partial index over unincorporated rows keeps the refinement queue as cheap to read as
+    it is long, however much history has built up.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                policy_id TEXT NOT NULL,
+                policy_version INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                label TEXT NOT NULL,
+                is_approved INTEGER NOT NULL,
+                feedback TEXT,
+                fingerprint TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                incorporated_in INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS reviews_policy ON reviews (policy_id, policy_version);
+            CREATE INDEX IF NOT EXISTS reviews_pending ON reviews (policy_id, id) WHERE incorporated_in IS NULL;
+            CREATE TABLE IF NOT EXISTS review_stats (
+                policy_id TEXT NOT NULL,
+                policy_version INTEGER NOT NULL,
+                label TEXT NOT NULL,
+                reviewed INTEGER NOT NULL,
+                approved INTEGER NOT NULL,
+                PRIMARY KEY (policy_id, policy_version, label)
+            );
+            """
+        )
+        self._lock = threading.Lock()
+
+    def _add(self, policy_id: str, policy_version: int, examples: Sequence[ReviewedExample]) -> int:
+        now = time.time()
+        rows = [
+            (
+                policy_id,
+                policy_version,
+                example.text,
+                example.label,
+                int(example.is_approved),
+                example.feedback,
+                example_fingerprint(example),
+                now,
+            )
+            for example in examples
+        ]
+        reviewed, approved = Counter(), Counter()
+        for example in examples:
+            reviewed[example.label] += 1
+            approved[example.label] += example.is_approved
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO reviews (policy_id, policy_version, text, label, is_approved, feedback, fingerprint, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                self._conn.executemany(
+                    """
+                    INSERT INTO review_stats (policy_id, policy_version, label, reviewed, approved) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (policy_id, policy_version, label) DO UPDATE SET
+                        reviewed = reviewed + excluded.reviewed, approved = approved + excluded.approved
+                    """,
+                    [(policy_id, policy_version, label, count, approved[label]) for label, count in reviewed.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _pending(self, policy_id: str, limit: Optional[int]) -> List[StoredReview]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT id, policy_id, policy_version, text, label, is_approved, feedback, created_at FROM reviews
+                WHERE policy_id = ? AND incorporated_in IS NULL ORDER BY id LIMIT ?
+                """,
+                (policy_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [
+            StoredReview(
+                id=review_id,
+                policy_id=policy_id,
+                policy_version=policy_version,
+                text=text,
+                label=label,
+                is_approved=bool(is_approved),
+                feedback=feedback,
+                created_at=created_at,
+            )
+            for review_id, policy_id, policy_version, text, label, is_approved, feedback, created_at in rows
+        ]
+
+    def _count_pending(self, policy_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM reviews WHERE policy_id = ? AND incorporated_in IS NULL", (policy_id,)
+            ).fetchone()[0]
+
+    def _mark_incorporated(self, review_ids: Sequence[int], version: int) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.executemany(
+                    "UPDATE reviews SET incorporated_in = ? WHERE id = ? AND incorporated_in IS NULL",
+                    [(version, review_id) for review_id in review_ids],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def _stats(self, policy_id: str, version: Optional[int]) -> List[LabelAgreement]:
+        clause, params = ("AND policy_version = ?", (policy_id, version)) if version is not None else ("", (policy_id,))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT label, SUM(reviewed), SUM(approved) FROM review_stats
+                WHERE policy_id = ? {clause} GROUP BY label ORDER BY label
+                """,
+                params,
+            ).fetchall()
+        return [
+            LabelAgreement(label=label, reviewed=reviewed, approved=approved, agreement=approved / reviewed)
+            for label, reviewed, approved in rows
+        ]
+
+    async def add(self, policy_id: str, policy_version: int, examples: Sequence[ReviewedExample]) -> int:
+        return await asyncio.to_thread(self._add, policy_id, policy_version, examples)
+
+    async def pending(self, policy_id: str, limit: Optional[int] = None) -> List[StoredReview]:
+        return await asyncio.to_thread(self._pending, policy_id, limit)
+
+    async def count_pending(self, policy_id: str) -> int:
+        return await asyncio.to_thread(self._count_pending, policy_id)
+
+    async def mark_incorporated(self, review_ids: Sequence[int], version: int) -> int:
+        return await asyncio.to_thread(self._mark_incorporated, review_ids, version)
+
+    async def stats(self, policy_id: str, version: Optional[int] = None) -> List[LabelAgreement]:
+        return await asyncio.to_thread(self._stats, policy_id, version)
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisReviewStore:
+    """Reviewed examples shared by every worker and node using the same Redis.
+
+    Each review is a JSON string under an ID from a shared counter. A sorted set per policy
+    holds its refinement queue, and a hash per policy keeps the per-version, per-label
+    counts, updated in the same transaction as each batch.
+    """
+
+    def __init__(self, client, prefix: str = shared.DEFAULT_REDIS_PREFIX):
+        self._client = client
+        self._prefix = f"{prefix}reviews:"
+
+    def _key(self, review_id: int) -> str:
+        return f"{self._prefix}{review_id}"
+
+    def _pending_key(self, policy_id: str) -> str:
+        return f"{self._prefix}pending:{policy_id}"
+
+    def _stats_key(self, policy_id: str) -> str:
+        return f"{self._prefix}stats:{policy_id}"
+
+    def _add(self, policy_id: str, policy_version: int, examples: Sequence[ReviewedExample]) -> int:
+        if not examples:
+            return 0
+        last = self._client.incrby(f"{self._prefix}next_id", len(examples))
+        now = time.time()
+        with self._client.pipeline() as pipe:
+            for review_id, example in enumerate(examples, start=last - len(examples) + 1):
+                review = StoredReview(
+                    **example.model_dump(include=set(ReviewedExample.model_fields)),
+                    id=review_id, policy_id=policy_id, policy_version=policy_version, created_at=now
+                )
+                pipe.set(self._key(review_id), review.model_dump_json())
+                pipe.zadd(self._pending_key(policy_id), {review_id: review_id})
+                pipe.hincrby(self._stats_key(policy_id), f"{policy_version}:reviewed:{example.label}", 1)
+                pipe.hincrby(self._stats_key(policy_id), f"{policy_version}:approved:{example.label}", int(example.is_approved))
+            pipe.execute()
+        return len(examples)
+
+    def _load(self, review_ids: Sequence) -> List[StoredReview]:
+        if not review_ids:
+            return []
+        rows = self._client.mget([self._key(int(review_id)) for review_id in review_ids])
+        return [StoredReview.model_validate_json(row) for row in rows if row is not None]
+
+    def _pending(self, policy_id: str, limit: Optional[int]) -> List[StoredReview]:
+        return self._load(self._client.zrange(self._pending_key(policy_id), 0, -1 if limit is None else limit - 1))
+
+    def _count_pending(self, policy_id: str) -> int:
+        return self._client.zcard(self._pending_key(policy_id))
+
+    def _mark_incorporated(self, review_ids: Sequence[int], version: int) -> int:
+        keys = [self._key(review_id) for review_id in review_ids]
+        if not keys:
+            return 0
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    # Watched, so a review two refinements claim at once is counted by one of them
+                    pipe.watch(*keys)
+                    reviews = [
+                        StoredReview.model_validate_json(row) for row in pipe.mget(keys) if row is not None
+                    ]
+                    reviews = [review for review in reviews if review.incorporated_in is None]
+                    pipe.multi()
+                    for review in reviews:
+                        review.incorporated_in = version
+                        pipe.set(self._key(review.id), review.model_dump_json())
+                        pipe.zrem(self._pending_key(review.policy_id), review.id)
+                    pipe.execute()
+                    return len(reviews)
+                except shared.redis.WatchError:
+                    continue
+
+    def _stats(self, policy_id: str, version: Optional[int]) -> List[LabelAgreement]:
+        reviewed, approved = Counter(), Counter()
+        for field, count in self._client.hgetall(self._stats_key(policy_id)).items():
+            field_version, kind, label = field.decode("utf-8").split(":", 2)
+            if version is None or int(field_version) == version:
+                (reviewed if kind == "reviewed" else approved)[label] += int(count)
+        return [
+            LabelAgreement(label=label, reviewed=count, approved=approved[label], agreement=approved[label] / count)
+            for label, count in sorted(reviewed.items())
+            if count
+        ]
+
+    async def add(self, policy_id: str, policy_version: int, examples: Sequence[ReviewedExample]) -> int:
+        return await asyncio.to_thread(self._add, policy_id, policy_version, examples)
+
+    async def pending(self, policy_id: str, limit: Optional[int] = None) -> List[StoredReview]:
+        return await asyncio.to_thread(self._pending, policy_id, limit)
+
+    async def count_pending(self, policy_id: str) -> int:
+        return await asyncio.to_thread(self._count_pending, policy_id)
+
+    async def mark_incorporated(self, review_ids: Sequence[int], version: int) -> int:
+        return await asyncio.to_thread(self._mark_incorporated, review_ids, version)
+
+    async def stats(self, policy_id: str, version: Optional[int] = None) -> List[LabelAgreement]:
+        return await asyncio.to_thread(self._stats, policy_id, version)
+
+    def close(self):
+        # The client is shared with the rest of the process
+        pass
+
+
+def reviews_from_env() -> ReviewStore:
+    client = shared.redis_from_env()
+    if client is not None:
+        return RedisReviewStore(client)
+    # Kept beside the policies they refer to
+    return SQLiteReviewStore(os.getenv("POLICY_FORGE_STORE_DB", "data/policies.db"))
@@ -0,0 +1,226 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+import openai
+
+from policy_forge import metrics
+
+try:
+    import tiktoken
+except ImportError:  # optional: falls back to a character-based estimate
+    tiktoken = None
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BATCH = 10
+
+_priority: ContextVar[int] = ContextVar("policy_forge_llm_priority", default=INTERACTIVE)
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+@contextmanager
+def priority(level: int):
+    """Run LLM calls made inside this block at the given priority (lower runs first)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def estimate_prompt_tokens(messages: list) -> int:
+    # ~4 tokens of framing per message on top of the content itself
+    return sum(count_tokens(str(message.get("content", ""))) + 4 for message in messages) + 3
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class _Bucket:
+    # Token bucket refilled continuously at `per_minute / 60` units per second
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        self.refill()
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class SchedulerSettings:
+    requests_per_minute: int = 500
+    tokens_per_minute: int = 30_000
+    # Completion tokens reserved up front; the difference is refunded once usage is known
+    expected_output_tokens: int = 1_500
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "SchedulerSettings":
+        defaults = cls()
+        return cls(
+            requests_per_minute=int(os.getenv("POLICY_FORGE_LLM_RPM", defaults.requests_per_minute)),
+            tokens_per_minute=int(os.getenv("POLICY_FORGE_LLM_TPM", defaults.tokens_per_minute)),
+            expected_output_tokens=int(
+                os.getenv("POLICY_FORGE_LLM_EXPECTED_OUTPUT_TOKENS", defaults.expected_output_tokens)
+            ),
+            max_retries=int(os.getenv("POLICY_FORGE_LLM_MAX_RETRIES", defaults.max_retries)),
+            base_delay=float(os.getenv("POLICY_FORGE_LLM_RETRY_BASE_DELAY", defaults.base_delay)),
+            max_delay=float(os.getenv("POLICY_FORGE_LLM_RETRY_MAX_DELAY", defaults.max_delay)),
+        )
+
+
+class RateLimitScheduler:
+    """Admits LLM calls within RPM/TPM budgets, highest priority first, and retries rate-limited calls.
+
+    Must be used inside a single event loop.
+    """
+
+    def __init__(self, settings: Optional[SchedulerSettings] = None):
+        self.settings = settings or SchedulerSettings.from_env()
+        self.requests = _Bucket(self.settings.requests_per_minute)
+        self.tokens = _Bucket(self.settings.tokens_per_minute)
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def acquire(self, tokens: int, level: Optional[int] = None):
+        level = current_priority() if level is None else level
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), tokens, future))
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        with metrics.LLM_QUEUED.track():
+            await future
+
+    def reservation(self, messages: list) -> int:
+        return estimate_prompt_tokens(messages) + self.settings.expected_output_tokens
+
+    def refund(self, tokens: int):
+        self.tokens.give(tokens)
+
+    async def _dispatch(self):
+        while self._waiters:
+            level, seq, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait <= 0:
+                heapq.heappop(self._waiters)
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                future.set_result(None)
+                continue
+            # Sleep until the budget refills, or until a new (possibly higher-priority) caller arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.settings.max_delay, self.settings.base_delay * 2**attempt)
+        delay = random.uniform(delay / 2, delay)
+        hinted = retry_after(error)
+        if hinted is not None:
+            delay = max(delay, hinted)
+        return delay
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        messages: list,
+        used_tokens: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        estimate = self.reservation(messages)
+        attempt = 0
+        while True:
+            await self.acquire(estimate)
+            try:
+                result = await call()
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.settings.max_retries:
+                    raise
+                metrics.LLM_RETRIES.inc(error=type(e).__name__)
+                await asyncio.sleep(self.backoff(attempt, e))
+                attempt += 1
+                continue
+            if used_tokens is not None:
+                actual = used_tokens(result)
+                if actual is not None:
+                    self.refund(estimate - actual)
+            return result
@@ -2,11 +2,25 @@ from pydantic import BaseModel, Field
 from typing import Literal, List, Optional
 
 
+class InitialIntent(BaseModel):
+    platform_type: str
+    industry: str
+    user_behavior: str
+    real_world_concerns: str
+    moderation_style: str
+    additional_context: Optional[str] = None
+
+
 class SyntheticExample(BaseModel):
     text: str
     label: Literal["violation", "non-violation", "borderline"]
 
 
+class ReviewedExample(SyntheticExample):
+    is_approved: bool
+    feedback: Optional[str] = None
+
+
 class ExampleListResponse(BaseModel):
     examples: List[SyntheticExample]
 
@@ -60,3 +74,16 @@ class PublicPolicy(BaseModel):
     violation_examples: List[str] = Field(..., description="User-facing examples of violations")
     non_violation_examples: List[str] = Field(..., description="User-facing examples of acceptable content")
     faq: List[str] = Field(default_factory=list, description="Optional Q&A to clarify edge cases or common questions")
+
+
+class CriterionEdit(BaseModel):
+    number: int = Field(..., description="1-based number of the violation criterion being replaced")
+    text: str = Field(..., description="Replacement text for the criterion")
+
+
+class PolicyPatch(BaseModel):
+    criteria_added: List[str] = Field(..., description="New violation criteria to append")
+    criteria_removed: List[int] = Field(..., description="Numbers of violation criteria to delete")
+    criteria_edited: List[CriterionEdit] = Field(..., description="Violation criteria to reword in place")
+    non_violation_examples_added: List[str] = Field(..., description="New examples that should NOT be flagged")
+    edge_case_guidance_added: List[str] = Field(..., description="New guidance for ambiguous or borderline cases")
@@ -0,0 +1,297 @@
+import asyncio
+import math
+import os
+import re
+import threading
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from pydantic import BaseModel
+
+from policy_forge import cache, metrics
+from policy_forge.cache import MemoryCache, ResponseCache
+from policy_forge.intent_builder import format_intent
+
+try:
+    import numpy
+except ImportError:  # optional: only the embedding-model index needs NumPy
+    numpy = None
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("POLICY_FORGE_SEMANTIC_CACHE_SIZE", "1000"))
+
+_WORD = re.compile(r"\w+")
+
+# What every intent built by `format_intent` shares, whatever the answers
+INTENT_TEMPLATE = format_intent(
+    dict.fromkeys(
+        ["platform_type", "industry", "user_behavior", "real_world_concerns", "moderation_style", "additional_context"],
+        "",
+    )
+)
+
+
+def features(text: str, size: int = 3, dim: int = 2**20) -> Counter:
+    """Hashed character n-grams of each word, padded so word starts and ends are features too.
+
+    Grams stay within words, so inflections and compounds ("hate"/"hateful", "game"/"gaming")
+    share most of their features while word order is ignored.
+    """
+    grams = Counter()
+    for word in _WORD.findall(text.lower()):
+        padded = f" {word} "
+        grams.update(padded[i : i + size] for i in range(max(1, len(padded) - size + 1)))
+    hashed = Counter()
+    for gram, count in grams.items():
+        hashed[zlib.crc32(gram.encode("utf-8")) & (dim - 1)] += count
+    return hashed
+
+
+class IntentIndex(Protocol):
+    default_threshold: float
+
+    def add(self, key: int, text: str) -> None: ...
+
+    def remove(self, key: int) -> None: ...
+
+    def search(self, text: str) -> List[Tuple[int, float]]: ...
+
+
+class TfidfIndex:
+    """Cosine similarity over hashed TF-IDF vectors, searched through an inverted index.
+
+    Features of `boilerplate` text are ignored outright: document frequencies only learn what
+    intents have in common once there are a few of them. Each vector keeps the weights it was
+    indexed with; they drift slowly as the index grows, which a threshold well below 1 absorbs.
+
+    Rewordings that keep the vocabulary ("hate speech in gaming chats", "spam links in
+    marketplace listing") mostly score above 0.8 against the original, and other concerns on
+    the same platform around 0.6. The default threshold errs toward misses, which only cost a
+    generation. Synonyms share no features; matching those takes `EmbeddingIndex`.
+    """
+
+    default_threshold = 0.8
+
+    def __init__(self, boilerplate: str = ""):
+        self._ignored = set(features(boilerplate)) if boilerplate else set()
+        self._df: Counter = Counter()
+        self._features: Dict[int, Counter] = {}
+        self._postings: Dict[int, Dict[int, float]] = {}
+
+    def _vector(self, counts: Counter) -> Dict[int, float]:
+        # Smoothed so that a feature in every intent tends to zero weight but never goes negative
+        total = len(self._features)
+        vector = {
+            feature: (1 + math.log(count)) * math.log((2 + total) / (1 + self._df[feature]))
+            for feature, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {feature: weight / norm for feature, weight in vector.items()}
+
+    def _counts(self, text: str) -> Counter:
+        return Counter({feature: count for feature, count in features(text).items() if feature not in self._ignored})
+
+    def add(self, key: int, text: str):
+        counts = self._counts(text)
+        self._features[key] = counts
+        self._df.update(counts.keys())
+        for feature, weight in self._vector(counts).items():
+            self._postings.setdefault(feature, {})[key] = weight
+
+    def remove(self, key: int):
+        counts = self._features.pop(key)
+        self._df.subtract(counts.keys())
+        for feature in counts:
+            postings = self._postings[feature]
+            del postings[key]
+            if not postings:
+                del self._postings[feature]
+                del self._df[feature]
+
+    def search(self, text: str) -> List[Tuple[int, float]]:
+        scores: Counter = Counter()
+        for feature, weight in self._vector(self._counts(text)).items():
+            for key, stored in self._postings.get(feature, {}).items():
+                scores[key] += weight * stored
+        return scores.most_common()
+
+
+class EmbeddingIndex:
+    """Brute-force cosine similarity over sentence embeddings from a local model."""
+
+    default_threshold = 0.85
+
+    def __init__(self, model_name: str):
+        if numpy is None:
+            raise RuntimeError("Embedding-model semantic caching requires NumPy (pip install numpy)")
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise RuntimeError(
+                "Embedding-model semantic caching requires sentence-transformers (pip install sentence-transformers)"
+            )
+        self._model = SentenceTransformer(model_name)
+        self._keys: List[int] = []
+        self._matrix = None
+
+    def _embed(self, text: str):
+        return self._model.encode([text], normalize_embeddings=True).astype(numpy.float32)
+
+    def add(self, key: int, text: str):
+        vector = self._embed(text)
+        self._matrix = vector if self._matrix is None else numpy.vstack([self._matrix, vector])
+        self._keys.append(key)
+
+    def remove(self, key: int):
+        row = self._keys.index(key)
+        del self._keys[row]
+        self._matrix = numpy.delete(self._matrix, row, axis=0) if self._keys else None
+
+    def search(self, text: str) -> List[Tuple[int, float]]:
+        if self._matrix is None:
+            return []
+        scores = self._matrix @ self._embed(text)[0]
+        return [(self._keys[row], float(scores[row])) for row in numpy.argsort(-scores)]
+
+
+class CachedIntent(BaseModel):
+    intent: str
+    policy_id: str
+    version: int
+    # Whether the stored version has public and moderator policies, which /policy/generate returns too
+    derived: bool
+
+
+class SemanticMatch(BaseModel):
+    id: str
+    similarity: float
+    intent: str
+    policy_id: str
+    version: int
+
+
+class SemanticCacheStats(BaseModel):
+    entries: int
+    threshold: float
+    lookups: int
+    hits: int
+    false_hits: int
+    hit_rate: float
+    false_hit_rate: float
+
+
+class SemanticCache:
+    """Maps intents to the stored policies generated from them, matching by meaning rather than exact text.
+
+    A lookup returns the most similar prior intent at or above `threshold`. Each hit gets an
+    ID that clients report back with `report_false_hit` when the served policy didn't fit;
+    the false-hit rate is the signal for tuning the threshold. The oldest intents are
+    evicted beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        index: IntentIndex,
+        threshold: Optional[float] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        served: Optional[ResponseCache] = None,
+    ):
+        self.threshold = index.default_threshold if threshold is None else threshold
+        self.max_entries = max_entries
+        self._index = index
+        self._entries: OrderedDict[int, CachedIntent] = OrderedDict()
+        self._keys: Dict[str, int] = {}
+        self._next_key = 0
+        # Hit ID -> intent served, for the false-hit reports that follow shortly after. Given the
+        # shared response cache, a report reaches whichever worker served the hit.
+        self._served = served or MemoryCache(max_entries=10_000)
+        self._lock = threading.Lock()
+        self._lookups = self._hits = self._false_hits = 0
+
+    def _lookup(self, intent: str, derived: bool) -> Optional[SemanticMatch]:
+        with self._lock:
+            self._lookups += 1
+            entry, best = None, 0.0
+            for key, similarity in self._index.search(intent):
+                if derived and not self._entries[key].derived:
+                    continue
+                entry, best = self._entries[key], similarity
+                break
+            metrics.SEMANTIC_CACHE_SIMILARITY.observe(best)
+            if entry is None or best < self.threshold:
+                metrics.SEMANTIC_CACHE.inc(result="miss")
+                return None
+            self._hits += 1
+        metrics.SEMANTIC_CACHE.inc(result="hit")
+        match = SemanticMatch(id=uuid.uuid4().hex, similarity=min(best, 1.0), **entry.model_dump(exclude={"derived"}))
+        self._served.set(f"semantic-hit:{match.id}", entry.intent)
+        return match
+
+    def _add(self, intent: str, policy_id: str, version: int, derived: bool):
+        with self._lock:
+            # A regenerated intent replaces the policy it mapped to before
+            previous = self._keys.pop(intent, None)
+            if previous is not None:
+                del self._entries[previous]
+                self._index.remove(previous)
+            key = self._next_key
+            self._next_key += 1
+            self._index.add(key, intent)
+            self._entries[key] = CachedIntent(intent=intent, policy_id=policy_id, version=version, derived=derived)
+            self._keys[intent] = key
+            while len(self._entries) > self.max_entries:
+                oldest, entry = self._entries.popitem(last=False)
+                del self._keys[entry.intent]
+                self._index.remove(oldest)
+
+    async def lookup(self, intent: str, derived: bool = False) -> Optional[SemanticMatch]:
+        """The stored policy for the closest prior intent, if close enough. `derived` requires public and moderator policies."""
+        if cache.is_bypassed():
+            metrics.SEMANTIC_CACHE.inc(result="bypass")
+            return None
+        return await asyncio.to_thread(self._lookup, intent, derived)
+
+    async def add(self, intent: str, policy_id: str, version: int, derived: bool = False):
+        await asyncio.to_thread(self._add, intent, policy_id, version, derived)
+
+    def _report_false_hit(self, match_id: str) -> bool:
+        key = f"semantic-hit:{match_id}"
+        if not self._served.get(key):
+            return False
+        # Each hit is counted once, however often it is reported
+        self._served.set(key, "")
+        with self._lock:
+            self._false_hits += 1
+        metrics.SEMANTIC_CACHE.inc(result="false_hit")
+        return True
+
+    async def report_false_hit(self, match_id: str) -> bool:
+        """Record that hit `match_id` served the wrong policy. Returns whether the ID was known."""
+        return await asyncio.to_thread(self._report_false_hit, match_id)
+
+    def stats(self) -> SemanticCacheStats:
+        with self._lock:
+            return SemanticCacheStats(
+                entries=len(self._entries),
+                threshold=self.threshold,
+                lookups=self._lookups,
+                hits=self._hits,
+                false_hits=self._false_hits,
+                hit_rate=self._hits / self._lookups if self._lookups else 0.0,
+                false_hit_rate=self._false_hits / self._hits if self._hits else 0.0,
+            )
+
+
+def semantic_cache_from_env() -> Optional[SemanticCache]:
+    if os.getenv("POLICY_FORGE_SEMANTIC_CACHE", "0").lower() in ("0", "false", "off", "no"):
+        return None
+    model = os.getenv("POLICY_FORGE_EMBEDDING_MODEL")
+    threshold = os.getenv("POLICY_FORGE_SEMANTIC_CACHE_THRESHOLD")
+    response_cache = cache.get_cache()
+    return SemanticCache(
+        EmbeddingIndex(model) if model else TfidfIndex(INTENT_TEMPLATE),
+        threshold=float(threshold) if threshold else None,
+        # Only a tiered response cache has a tier that other workers can see
+        served=response_cache if isinstance(response_cache, cache.TieredCache) else None,
+    )
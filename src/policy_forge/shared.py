@@ -0,0 +1,196 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Protocol, Tuple
+
+try:
+    import redis
+except ImportError:  # optional: only multi-node deployments need a Redis server
+    redis = None
+
+# A lock's owner renews it every third of this, so a crashed worker's locks free up within it
+DEFAULT_LOCK_TTL = float(os.getenv("POLICY_FORGE_LOCK_TTL", "30"))
+DEFAULT_REDIS_PREFIX = os.getenv("POLICY_FORGE_REDIS_PREFIX", "policy_forge:")
+
+_redis = None
+
+
+def redis_from_env():
+    """The process's Redis client when POLICY_FORGE_REDIS_URL is set, else None.
+
+    Any server speaking the Redis protocol will do; nothing here relies on Lua scripting.
+    """
+    global _redis
+    url = os.getenv("POLICY_FORGE_REDIS_URL")
+    if not url:
+        return None
+    if redis is None:
+        raise RuntimeError("POLICY_FORGE_REDIS_URL requires the redis client (pip install redis)")
+    if _redis is None:
+        _redis = redis.Redis.from_url(url)
+    return _redis
+
+
+class KeyLocks(Protocol):
+    def acquire(self, key: str, owner: str, ttl: float) -> bool: ...
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool: ...
+
+    def release(self, key: str, owner: str) -> None: ...
+
+
+class MemoryLocks:
+    """Leased locks within one process. Coalesces identical calls when nothing is shared between workers."""
+
+    def __init__(self):
+        self._held: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            held = self._held.get(key)
+            if held is not None and held[1] >= now:
+                return False
+            self._held[key] = (owner, now + ttl)
+            return True
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            held = self._held.get(key)
+            if held is None or held[0] != owner:
+                return False
+            self._held[key] = (owner, time.time() + ttl)
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            if self._held.get(key, (None,))[0] == owner:
+                del self._held[key]
+
+
+class SQLiteLocks:
+    """Leased locks shared by every process on the node that opens the same database file."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM locks WHERE key = ? AND expires_at < ?", (key, now))
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)", (key, owner, now + ttl)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE locks SET expires_at = ? WHERE key = ? AND owner = ?", (time.time() + ttl, key, owner)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisLocks:
+    """Leased locks shared by every worker and node using the same Redis.
+
+    Acquired with SET NX PX. Renewal and release check ownership inside a WATCH/MULTI
+    transaction, so a lock that expired and was taken over is never extended or deleted.
+    """
+
+    def __init__(self, client, prefix: str = DEFAULT_REDIS_PREFIX):
+        self._client = client
+        self._prefix = f"{prefix}lock:"
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._client.set(self._prefix + key, owner, nx=True, px=int(ttl * 1000)))
+
+    def _if_owner(self, key: str, owner: str, action) -> bool:
+        name = self._prefix + key
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(name)
+                if pipe.get(name) != owner.encode("utf-8"):
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                action(pipe, name)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        return self._if_owner(key, owner, lambda pipe, name: pipe.pexpire(name, int(ttl * 1000)))
+
+    def release(self, key: str, owner: str):
+        self._if_owner(key, owner, lambda pipe, name: pipe.delete(name))
+
+
+async def _call(locks: KeyLocks, fn, *args):
+    # Memory locks are cheap enough to take on the event loop
+    if isinstance(locks, MemoryLocks):
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+@asynccontextmanager
+async def hold(locks: KeyLocks, key: str, ttl: float = DEFAULT_LOCK_TTL, poll: float = 0.05) -> AsyncIterator[None]:
+    """Hold the lock on `key` for the duration of the block, waiting for it if another worker has it.
+
+    The lease is renewed in the background while the block runs, however long that takes; if
+    the holder dies, the lease lapses within `ttl` and a waiter takes over.
+    """
+    owner = uuid.uuid4().hex
+    delay = poll
+    while not await _call(locks, locks.acquire, key, owner, ttl):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+    async def renew():
+        while True:
+            await asyncio.sleep(ttl / 3)
+            await _call(locks, locks.renew, key, owner, ttl)
+
+    renewal = asyncio.create_task(renew())
+    try:
+        yield
+    finally:
+        renewal.cancel()
+        await asyncio.gather(renewal, return_exceptions=True)
+        await _call(locks, locks.release, key, owner)
+
+
+def locks_from_env() -> KeyLocks:
+    # Locks only prevent duplicate work where the result is shared, so they follow the shared cache tier
+    client = redis_from_env()
+    if client is not None:
+        return RedisLocks(client)
+    path = os.getenv("POLICY_FORGE_CACHE_PATH")
+    return SQLiteLocks(path) if path else MemoryLocks()
@@ -0,0 +1,484 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Literal, Optional, Protocol
+
+from pydantic import BaseModel, Field
+from slugify import slugify
+
+from policy_forge import shared
+from policy_forge.schema import MachinePolicy, ModeratorPolicy, PublicPolicy
+
+Severity = Literal["low", "medium", "high", "critical"]
+
+
+class StoredPolicy(BaseModel):
+    id: str
+    version: int
+    name: str
+    slug: str
+    severity: Optional[Severity] = None
+    source: str = Field(default="create", description="What produced this version, e.g. generate, refine, derive")
+    created_at: float
+    machine: MachinePolicy
+    public: Optional[PublicPolicy] = None
+    moderator: Optional[ModeratorPolicy] = None
+    derived_from: Optional[int] = Field(
+        default=None,
+        description="Version whose machine policy the public and moderator policies were written from. "
+        "Older than `version` when they were carried over a later machine-policy change, and are stale.",
+    )
+
+
+class PolicySummary(BaseModel):
+    id: str
+    name: str
+    slug: str
+    severity: Optional[Severity] = None
+    latest_version: int
+    created_at: float
+    updated_at: float
+
+
+class VersionInfo(BaseModel):
+    version: int
+    source: str
+    created_at: float
+
+
+class PolicyStore(Protocol):
+    async def create(
+        self,
+        machine: MachinePolicy,
+        public: Optional[PublicPolicy] = None,
+        moderator: Optional[ModeratorPolicy] = None,
+        source: str = "create",
+    ) -> StoredPolicy: ...
+
+    async def add_version(
+        self,
+        policy_id: str,
+        machine: Optional[MachinePolicy] = None,
+        public: Optional[PublicPolicy] = None,
+        moderator: Optional[ModeratorPolicy] = None,
+        source: str = "update",
+    ) -> Optional[StoredPolicy]: ...
+
+    async def get(self, policy_id: str, version: Optional[int] = None) -> Optional[StoredPolicy]: ...
+
+    async def versions(self, policy_id: str) -> List[VersionInfo]: ...
+
+    async def find(
+        self,
+        slug: Optional[str] = None,
+        severity: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[PolicySummary]: ...
+
+    def close(self) -> None: ...
+
+
+class SQLitePolicyStore:
+    """Policies with immutable, numbered versions.
+
+    Every change adds a version; the `policies` row tracks the latest one and carries the
+    indexed lookup columns (slug, severity, creation time).
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS policies (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                slug TEXT NOT NULL,
+                severity TEXT,
+                latest_version INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS policies_slug ON policies (slug);
+            CREATE INDEX IF NOT EXISTS policies_severity_created_at ON policies (severity, created_at);
+            CREATE INDEX IF NOT EXISTS policies_created_at ON policies (created_at);
+            CREATE TABLE IF NOT EXISTS policy_versions (
+                policy_id TEXT NOT NULL REFERENCES policies (id),
+                version INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (policy_id, version)
+            );
+            """
+        )
+        self._lock = threading.Lock()
+
+    def _insert_version(self, policy: StoredPolicy):
+        self._conn.execute(
+            "INSERT INTO policy_versions (policy_id, version, source, created_at, data) VALUES (?, ?, ?, ?, ?)",
+            (policy.id, policy.version, policy.source, policy.created_at, policy.model_dump_json()),
+        )
+
+    def _create(self, policy: StoredPolicy) -> StoredPolicy:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    """
+                    INSERT INTO policies (id, name, slug, severity, latest_version, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (policy.id, policy.name, policy.slug, policy.severity, policy.version, policy.created_at, policy.created_at),
+                )
+                self._insert_version(policy)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return policy
+
+    def _add_version(self, policy_id: str, changes: dict, source: str) -> Optional[StoredPolicy]:
+        with self._lock:
+            # The write lock is taken before reading the latest version so concurrent writers get distinct numbers
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self._read(policy_id, None)
+                if latest is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                policy = _revise(latest, changes, source)
+                self._insert_version(policy)
+                self._conn.execute(
+                    "UPDATE policies SET name = ?, slug = ?, severity = ?, latest_version = ?, updated_at = ? WHERE id = ?",
+                    (policy.name, policy.slug, policy.severity, policy.version, policy.created_at, policy_id),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return policy
+
+    def _read(self, policy_id: str, version: Optional[int]) -> Optional[StoredPolicy]:
+        if version is None:
+            row = self._conn.execute(
+                """
+                SELECT v.data FROM policies p
+                JOIN policy_versions v ON v.policy_id = p.id AND v.version = p.latest_version
+                WHERE p.id = ?
+                """,
+                (policy_id,),
+            ).fetchone()
+        else:
+            row = self._conn.execute(
+                "SELECT data FROM policy_versions WHERE policy_id = ? AND version = ?", (policy_id, version)
+            ).fetchone()
+        return StoredPolicy.model_validate_json(row[0]) if row else None
+
+    def _get(self, policy_id: str, version: Optional[int]) -> Optional[StoredPolicy]:
+        with self._lock:
+            return self._read(policy_id, version)
+
+    def _versions(self, policy_id: str) -> List[VersionInfo]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, source, created_at FROM policy_versions WHERE policy_id = ? ORDER BY version",
+                (policy_id,),
+            ).fetchall()
+        return [VersionInfo(version=version, source=source, created_at=created_at) for version, source, created_at in rows]
+
+    def _find(self, slug, severity, created_after, created_before, limit, offset) -> List[PolicySummary]:
+        clauses, params = [], []
+        for column, op, value in (
+            ("slug", "=", slug),
+            ("severity", "=", severity),
+            ("created_at", ">=", created_after),
+            ("created_at", "<", created_before),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT id, name, slug, severity, latest_version, created_at, updated_at FROM policies
+                {where} ORDER BY created_at DESC LIMIT ? OFFSET ?
+                """,
+                (*params, limit, offset),
+            ).fetchall()
+        return [PolicySummary(**dict(zip(PolicySummary.model_fields, row))) for row in rows]
+
+    async def create(
+        self,
+        machine: MachinePolicy,
+        public: Optional[PublicPolicy] = None,
+        moderator: Optional[ModeratorPolicy] = None,
+        source: str = "create",
+    ) -> StoredPolicy:
+        policy = _build(uuid.uuid4().hex, 1, source, machine=machine, public=public, moderator=moderator)
+        return await asyncio.to_thread(self._create, policy)
+
+    async def add_version(
+        self,
+        policy_id: str,
+        machine: Optional[MachinePolicy] = None,
+        public: Optional[PublicPolicy] = None,
+        moderator: Optional[ModeratorPolicy] = None,
+        source: str = "update",
+    ) -> Optional[StoredPolicy]:
+        changes = {"machine": machine, "public": public, "moderator": moderator}
+        return await asyncio.to_thread(self._add_version, policy_id, changes, source)
+
+    async def get(self, policy_id: str, version: Optional[int] = None) -> Optional[StoredPolicy]:
+        return await asyncio.to_thread(self._get, policy_id, version)
+
+    async def versions(self, policy_id: str) -> List[VersionInfo]:
+        return await asyncio.to_thread(self._versions, policy_id)
+
+    async def find(
+        self,
+        slug: Optional[str] = None,
+        severity: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[PolicySummary]:
+        return await asyncio.to_thread(self._find, slug, severity, created_after, created_before, limit, offset)
+
+    def close(self):
+        self._conn.close()
+
+
+class RedisPolicyStore:
+    """Policies with immutable, numbered versions, shared by every worker and node using the same Redis.
+
+    Each policy is a hash of its lookup fields plus a list of its versions. Sorted sets index
+    creation time, overall and per severity, and a set per slug. New versions are numbered
+    inside a WATCH/MULTI transaction on the policy hash, so concurrent writers never reuse one.
+    """
+
+    def __init__(self, client, prefix: str = shared.DEFAULT_REDIS_PREFIX):
+        self._client = client
+        self._prefix = f"{prefix}policies:"
+        self._created = f"{self._prefix}created"
+
+    def _key(self, policy_id: str) -> str:
+        return f"{self._prefix}{policy_id}"
+
+    def _versions_key(self, policy_id: str) -> str:
+        return f"{self._prefix}{policy_id}:versions"
+
+    def _severity_key(self, severity: str) -> str:
+        return f"{self._prefix}severity:{severity}"
+
+    def _slug_key(self, slug: str) -> str:
+        return f"{self._prefix}slug:{slug}"
+
+    def _index(self, pipe, policy: StoredPolicy, created_at: float):
+        pipe.sadd(self._slug_key(policy.slug), policy.id)
+        if policy.severity is not None:
+            pipe.zadd(self._severity_key(policy.severity), {policy.id: created_at})
+
+    def _create(self, policy: StoredPolicy) -> StoredPolicy:
+        with self._client.pipeline() as pipe:
+            pipe.hset(
+                self._key(policy.id),
+                mapping={
+                    "name": policy.name,
+                    "slug": policy.slug,
+                    "severity": policy.severity or "",
+                    "latest_version": policy.version,
+                    "created_at": policy.created_at,
+                    "updated_at": policy.created_at,
+                },
+            )
+            pipe.rpush(self._versions_key(policy.id), policy.model_dump_json())
+            pipe.zadd(self._created, {policy.id: policy.created_at})
+            self._index(pipe, policy, policy.created_at)
+            pipe.execute()
+        return policy
+
+    def _add_version(self, policy_id: str, changes: dict, source: str) -> Optional[StoredPolicy]:
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._key(policy_id))
+                    created_at = pipe.hget(self._key(policy_id), "created_at")
+                    data = pipe.lindex(self._versions_key(policy_id), -1)
+                    if created_at is None or data is None:
+                        pipe.unwatch()
+                        return None
+                    latest = StoredPolicy.model_validate_json(data)
+                    policy = _revise(latest, changes, source)
+                    pipe.multi()
+                    pipe.rpush(self._versions_key(policy_id), policy.model_dump_json())
+                    pipe.hset(
+                        self._key(policy_id),
+                        mapping={
+                            "name": policy.name,
+                            "slug": policy.slug,
+                            "severity": policy.severity or "",
+                            "latest_version": policy.version,
+                            "updated_at": policy.created_at,
+                        },
+                    )
+                    pipe.srem(self._slug_key(latest.slug), policy_id)
+                    if latest.severity is not None:
+                        pipe.zrem(self._severity_key(latest.severity), policy_id)
+                    self._index(pipe, policy, float(created_at))
+                    pipe.execute()
+                    return policy
+                except shared.redis.WatchError:
+                    # Another writer added a version first; number this one after it
+                    continue
+
+    def _get(self, policy_id: str, version: Optional[int]) -> Optional[StoredPolicy]:
+        if version is not None and version < 1:
+            return None
+        data = self._client.lindex(self._versions_key(policy_id), -1 if version is None else version - 1)
+        return StoredPolicy.model_validate_json(data) if data is not None else None
+
+    def _versions(self, policy_id: str) -> List[VersionInfo]:
+        return [
+            VersionInfo(**StoredPolicy.model_validate_json(data).model_dump(include={"version", "source", "created_at"}))
+            for data in self._client.lrange(self._versions_key(policy_id), 0, -1)
+        ]
+
+    def _summaries(self, policy_ids: List[bytes]) -> List[PolicySummary]:
+        with self._client.pipeline(transaction=False) as pipe:
+            for policy_id in policy_ids:
+                pipe.hgetall(self._key(policy_id.decode("utf-8")))
+            rows = pipe.execute()
+        return [
+            PolicySummary(
+                id=policy_id.decode("utf-8"),
+                name=row[b"name"].decode("utf-8"),
+                slug=row[b"slug"].decode("utf-8"),
+                severity=row[b"severity"].decode("utf-8") or None,
+                latest_version=int(row[b"latest_version"]),
+                created_at=float(row[b"created_at"]),
+                updated_at=float(row[b"updated_at"]),
+            )
+            for policy_id, row in zip(policy_ids, rows)
+            if row
+        ]
+
+    def _find(self, slug, severity, created_after, created_before, limit, offset) -> List[PolicySummary]:
+        if slug is not None:
+            # Few policies share a slug, so the rest of the filtering happens here
+            summaries = [
+                summary
+                for summary in self._summaries(list(self._client.smembers(self._slug_key(slug))))
+                if (severity is None or summary.severity == severity)
+                and (created_after is None or summary.created_at >= created_after)
+                and (created_before is None or summary.created_at < created_before)
+            ]
+            summaries.sort(key=lambda summary: summary.created_at, reverse=True)
+            return summaries[offset : offset + limit]
+        index = self._severity_key(severity) if severity is not None else self._created
+        policy_ids = self._client.zrevrangebyscore(
+            index,
+            f"({created_before}" if created_before is not None else "+inf",
+            created_after if created_after is not None else "-inf",
+            start=offset,
+            num=limit,
+        )
+        return self._summaries(policy_ids)
+
+    async def create(
+        self,
+        machine: MachinePolicy,
+        public: Optional[PublicPolicy] = None,
+        moderator: Optional[ModeratorPolicy] = None,
+        source: str = "create",
+    ) -> StoredPolicy:
+        policy = _build(uuid.uuid4().hex, 1, source, machine=machine, public=public, moderator=moderator)
+        return await asyncio.to_thread(self._create, policy)
+
+    async def add_version(
+        self,
+        policy_id: str,
+        machine: Optional[MachinePolicy] = None,
+        public: Optional[PublicPolicy] = None,
+        moderator: Optional[ModeratorPolicy] = None,
+        source: str = "update",
+    ) -> Optional[StoredPolicy]:
+        changes = {"machine": machine, "public": public, "moderator": moderator}
+        return await asyncio.to_thread(self._add_version, policy_id, changes, source)
+
+    async def get(self, policy_id: str, version: Optional[int] = None) -> Optional[StoredPolicy]:
+        return await asyncio.to_thread(self._get, policy_id, version)
+
+    async def versions(self, policy_id: str) -> List[VersionInfo]:
+        return await asyncio.to_thread(self._versions, policy_id)
+
+    async def find(
+        self,
+        slug: Optional[str] = None,
+        severity: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[PolicySummary]:
+        return await asyncio.to_thread(self._find, slug, severity, created_after, created_before, limit, offset)
+
+    def close(self):
+        # The client is shared with the rest of the process
+        pass
+
+
+def _revise(latest: StoredPolicy, changes: dict, source: str) -> StoredPolicy:
+    fields = {"machine": latest.machine, "public": latest.public, "moderator": latest.moderator}
+    # Derived policies carry over a machine-policy change, still marked with the version they were written from
+    derived_from = None
+    if changes.get("public") is None and changes.get("moderator") is None and (latest.public or latest.moderator):
+        derived_from = latest.derived_from or latest.version
+    fields.update({key: value for key, value in changes.items() if value is not None})
+    return _build(latest.id, latest.version + 1, source, derived_from=derived_from, **fields)
+
+
+def _build(
+    policy_id: str,
+    version: int,
+    source: str,
+    machine: MachinePolicy,
+    public: Optional[PublicPolicy] = None,
+    moderator: Optional[ModeratorPolicy] = None,
+    derived_from: Optional[int] = None,
+) -> StoredPolicy:
+    if derived_from is None and (public is not None or moderator is not None):
+        derived_from = version
+    # Named like the Markdown export, which slugs the moderator-facing title
+    name = moderator.name if moderator is not None else machine.name
+    return StoredPolicy(
+        id=policy_id,
+        version=version,
+        name=name,
+        slug=slugify(name),
+        severity=moderator.severity if moderator is not None else None,
+        source=source,
+        created_at=time.time(),
+        machine=machine,
+        public=public,
+        moderator=moderator,
+        derived_from=derived_from,
+    )
+
+
+def store_from_env() -> PolicyStore:
+    client = shared.redis_from_env()
+    if client is not None:
+        return RedisPolicyStore(client)
+    return SQLitePolicyStore(os.getenv("POLICY_FORGE_STORE_DB", "data/policies.db"))
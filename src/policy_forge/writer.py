@@ -1,26 +1,14 @@
-import os
-from slugify import slugify
+from pathlib import Path
+from typing import List, Union
 from policy_forge.schema import PublicPolicy, ModeratorPolicy, MachinePolicy
-from policy_forge.formatters import (
-    format_public_policy_to_md,
-    format_moderator_policy_to_md,
-    format_machine_policy_to_md,
-)
+from policy_forge.export import DEFAULT_OUTPUT_DIR, Exporter, PolicySet
 
 
 def save_policies_to_markdown(
     public: PublicPolicy,
     moderator: ModeratorPolicy,
     machine: MachinePolicy,
-):
-    name_slug = slugify(moderator.name)
-    os.makedirs("output", exist_ok=True)
-
-    with open(f"output/{name_slug}_public.md", "w") as f:
-        f.write(format_public_policy_to_md(public))
-
-    with open(f"output/{name_slug}_moderator.md", "w") as f:
-        f.write(format_moderator_policy_to_md(moderator))
-
-    with open(f"output/{name_slug}_machine_policy.md", "w") as f:
-        f.write(format_machine_policy_to_md(machine))
\ No newline at end of file
+    output_dir: Union[str, Path] = DEFAULT_OUTPUT_DIR,
+) -> List[Path]:
+    policies = PolicySet(name=moderator.name, public=public, moderator=moderator, machine=machine)
+    return Exporter(output_dir).write_policies(policies)
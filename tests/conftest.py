@@ -0,0 +1,64 @@
+from typing import Iterator, Type
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from policy_forge import cache, llm, shared
+from policy_forge.backends import Completion, StubBackend
+
+
+class CountingBackend(StubBackend):
+    """The stub backend, counting the calls that reach it."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    async def parse(self, model: str, messages: list, response_format: Type[BaseModel]) -> Completion:
+        self.calls += 1
+        return await super().parse(model, messages, response_format)
+
+    async def stream(self, model: str, messages: list, response_format: Type[BaseModel]):
+        self.calls += 1
+        async for item in super().stream(model, messages, response_format):
+            yield item
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    # Nothing reaches the network or a shared store unless a test sets it up
+    monkeypatch.setenv("POLICY_FORGE_LLM_BACKEND", "stub")
+    # Unlimited rate budgets, so only tests of the scheduler itself ever wait on one
+    monkeypatch.setenv("POLICY_FORGE_LLM_RPM", "0")
+    monkeypatch.setenv("POLICY_FORGE_LLM_TPM", "0")
+    for name in ("POLICY_FORGE_REDIS_URL", "POLICY_FORGE_CACHE_PATH", "POLICY_FORGE_JOBS_DB"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(cache, "_locks", shared.MemoryLocks())
+    monkeypatch.setattr(llm, "_default_pool", None)
+
+
+@pytest.fixture
+def backend(monkeypatch) -> CountingBackend:
+    """A counting stub behind the default pool. Tests using it must run in a single event loop."""
+    backend = CountingBackend()
+    monkeypatch.setattr(llm, "_default_pool", llm.LLMPool(backend=backend))
+    return backend
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path) -> Iterator[TestClient]:
+    """The API on the stub backend, with its policies and reviews stored under `tmp_path`."""
+    monkeypatch.setenv("POLICY_FORGE_STORE_DB", str(tmp_path / "policies.db"))
+    from backend.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def redis_client():
+    """A client of an in-process stand-in for a Redis server, empty for each test."""
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer())
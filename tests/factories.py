@@ -0,0 +1,12 @@
+from typing import Type, TypeVar
+
+from pydantic import BaseModel
+
+from policy_forge.backends import StubBackend
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def sample(response_format: Type[T], seed: str = "") -> T:
+    """A schema-valid object, the same for the same seed."""
+    return StubBackend().build("test", [{"role": "user", "content": seed}], response_format)
@@ -0,0 +1,82 @@
+import json
+
+from policy_forge import bulk
+from policy_forge.bulk import BulkError, LocalBatchClient
+from policy_forge.schema import ExampleListResponse, MachinePolicy
+
+INTENTS = ["Moderate spam in a marketplace", "Moderate quokka photos in a wildlife forum"]
+
+
+def test_build_request_uses_the_batch_file_format():
+    request = bulk.build_request("machine-0", [{"role": "user", "content": "hi"}], MachinePolicy, model="gpt-4o")
+    assert request["custom_id"] == "machine-0"
+    assert request["method"] == "POST" and request["url"] == bulk.BATCH_ENDPOINT
+    assert request["body"]["model"] == "gpt-4o"
+    response_format = request["body"]["response_format"]["json_schema"]
+    assert response_format["name"] == "MachinePolicy" and response_format["strict"]
+    assert response_format["schema"]["additionalProperties"] is False
+    assert set(response_format["schema"]["required"]) == set(MachinePolicy.model_fields)
+    json.dumps(request)
+
+
+def test_parse_results_reports_each_failure():
+    ok = ExampleListResponse(examples=[]).model_dump_json()
+
+    def line(custom_id, status_code=200, content=ok, error=None, refusal=None):
+        message = {"role": "assistant", "content": content, "refusal": refusal}
+        response = {"status_code": status_code, "body": {"choices": [{"message": message}]}}
+        return json.dumps({"custom_id": custom_id, "response": response, "error": error})
+
+    formats = {name: ExampleListResponse for name in ("ok", "http", "refused", "invalid", "errored", "missing")}
+    parsed = bulk.parse_results(
+        [
+            line("ok"),
+            line("http", status_code=500),
+            line("refused", refusal="no"),
+            line("invalid", content='{"examples": 1}'),
+            line("errored", error={"code": "x"}),
+            "",
+        ],
+        formats,
+    )
+    assert parsed["ok"] == ExampleListResponse(examples=[])
+    for custom_id in ("http", "refused", "invalid", "errored", "missing"):
+        assert isinstance(parsed[custom_id], BulkError), custom_id
+
+
+def test_run_bulk_generates_every_output(tmp_path):
+    client = LocalBatchClient(tmp_path / "batches", bulk.stub_responder())
+    results = bulk.run_bulk(INTENTS, client, tmp_path / "work", poll_interval=0)
+    assert [result.intent for result in results] == INTENTS
+    for result in results:
+        assert result.errors == {}
+        assert result.machine and result.examples and result.public and result.moderator
+
+
+def test_run_bulk_keeps_failures_per_intent(tmp_path):
+    respond = bulk.stub_responder()
+
+    def flaky(body: dict) -> str:
+        if "quokka" in json.dumps(body["messages"]):
+            raise RuntimeError("upstream refused")
+        return respond(body)
+
+    results = bulk.run_bulk(INTENTS, LocalBatchClient(tmp_path / "batches", flaky), tmp_path / "work", poll_interval=0)
+    assert results[0].errors == {} and results[0].moderator is not None
+    assert results[1].machine is None and "machine" in results[1].errors
+
+
+def test_run_bulk_resumes_submitted_batches(tmp_path):
+    submitted = []
+
+    class Recording(LocalBatchClient):
+        def submit(self, requests_path):
+            batch_id = super().submit(requests_path)
+            submitted.append(batch_id)
+            return batch_id
+
+    client = Recording(tmp_path / "batches", bulk.stub_responder())
+    first = bulk.run_bulk(INTENTS, client, tmp_path / "work", poll_interval=0)
+    second = bulk.run_bulk(INTENTS, client, tmp_path / "work", poll_interval=0)
+    assert len(submitted) == 2
+    assert first == second
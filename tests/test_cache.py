@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+from policy_forge import cache, llm, shared
+from policy_forge.cache import MemoryCache, RedisCache, SQLiteCache, TieredCache
+from policy_forge.schema import ExampleListResponse, MachinePolicy, SyntheticExample
+
+MESSAGES = [{"role": "user", "content": "Write a policy about spam"}]
+
+
+def test_cache_key_covers_namespace_model_messages_and_schema():
+    key = cache.cache_key("gpt-4o", MESSAGES, MachinePolicy)
+    assert key == cache.cache_key("gpt-4o", list(MESSAGES), MachinePolicy)
+    assert key != cache.cache_key("gpt-4o", MESSAGES, MachinePolicy, namespace="stub")
+    assert key != cache.cache_key("gpt-4o-mini", MESSAGES, MachinePolicy)
+    assert key != cache.cache_key("gpt-4o", [{"role": "user", "content": "Write a policy about scams"}], MachinePolicy)
+    assert key != cache.cache_key("gpt-4o", MESSAGES, ExampleListResponse)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    memory = MemoryCache(max_entries=2)
+    memory.set("a", 1)
+    memory.set("b", 2)
+    memory.get("a")
+    memory.set("c", 3)
+    assert memory.get("a") == 1
+    assert memory.get("b") is None
+    assert memory.get("c") == 3
+
+
+def test_memory_cache_expires_entries():
+    memory = MemoryCache(ttl=0.01)
+    memory.set("a", 1)
+    time.sleep(0.02)
+    assert memory.get("a") is None
+    assert len(memory) == 0
+
+
+def test_sqlite_cache_persists_and_evicts(tmp_path):
+    path = str(tmp_path / "cache.db")
+    disk = SQLiteCache(path, max_entries=2)
+    disk.set("a", SyntheticExample(text="buy now", label="violation"))
+    disk.set("b", 2)
+    disk.get("a")
+    time.sleep(0.01)
+    disk.set("c", 3)
+    disk.close()
+
+    reopened = SQLiteCache(path, max_entries=2)
+    assert reopened.get("a") == SyntheticExample(text="buy now", label="violation")
+    assert reopened.get("b") is None
+    assert reopened.get("c") == 3
+    reopened.close()
+
+
+def test_sqlite_cache_expires_entries(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.db"), ttl=0.01)
+    disk.set("a", 1)
+    time.sleep(0.02)
+    assert disk.get("a") is None
+    disk.close()
+
+
+def test_tiered_cache_backfills_faster_tiers(tmp_path):
+    memory = MemoryCache()
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    tiered = TieredCache([memory, disk])
+    disk.set("a", 1)
+    assert memory.get("a") is None
+    assert tiered.get("a") == 1
+    assert memory.get("a") == 1
+    tiered.set("b", 2)
+    assert memory.get("b") == 2 and disk.get("b") == 2
+    disk.close()
+
+
+def test_parse_serves_repeats_from_cache(backend, monkeypatch):
+    monkeypatch.setattr(cache, "_cache", MemoryCache())
+
+    async def scenario():
+        first = await llm.parse(MESSAGES, MachinePolicy)
+        # Callers may mutate what they get back without changing what is cached
+        first.name = "edited"
+        second = await llm.parse(MESSAGES, MachinePolicy)
+        with cache.bypass():
+            third = await llm.parse(MESSAGES, MachinePolicy)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert backend.calls == 2
+    assert second.name != "edited"
+    assert second == third
+
+
+def test_stream_replays_cached_fields(backend, monkeypatch):
+    monkeypatch.setattr(cache, "_cache", MemoryCache())
+
+    async def collect():
+        return [item async for item in llm.stream(MESSAGES, MachinePolicy)]
+
+    async def scenario():
+        return await collect(), await collect()
+
+    fresh, replayed = asyncio.run(scenario())
+    assert backend.calls == 1
+    assert [field for field, _ in fresh] == [field for field, _ in replayed]
+    assert fresh[-1][1] == replayed[-1][1]
+
+
+def test_redis_cache_stores_validated_json(redis_client):
+    redis_cache = RedisCache(redis_client, prefix="test:")
+    # Formats become known to a worker as it computes their keys
+    cache.cache_key("gpt-4o", MESSAGES, SyntheticExample)
+    example = SyntheticExample(text="buy now", label="violation")
+    redis_cache.set("a", example)
+    redis_cache.set("b", "an intent")
+    assert redis_client.get("test:cache:a").endswith(example.model_dump_json().encode("utf-8"))
+    assert redis_cache.get("a") == example and redis_cache.get("b") == "an intent"
+
+    # Entries of an unknown format, or that no longer fit theirs, are misses
+    redis_client.set("test:cache:c", 'os.system\n{"text": "x"}')
+    redis_client.set("test:cache:d", 'policy_forge.schema.SyntheticExample\n{"text": "x"}')
+    assert redis_cache.get("c") is None and redis_cache.get("d") is None and redis_cache.get("e") is None
+
+    redis_cache.clear()
+    assert redis_client.keys("test:cache:*") == []
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def shared_cache(request, tmp_path, monkeypatch):
+    if request.param == "redis":
+        client = request.getfixturevalue("redis_client")
+        response_cache, locks = RedisCache(client), shared.RedisLocks(client)
+    elif request.param == "sqlite":
+        path = str(tmp_path / "cache.db")
+        response_cache, locks = SQLiteCache(path), shared.SQLiteLocks(path)
+    else:
+        response_cache, locks = MemoryCache(), shared.MemoryLocks()
+    monkeypatch.setattr(cache, "_cache", response_cache)
+    monkeypatch.setattr(cache, "_locks", locks)
+    return response_cache
+
+
+def test_identical_concurrent_calls_make_one_upstream_call(backend, shared_cache):
+    async def scenario():
+        return await asyncio.gather(*(llm.parse(MESSAGES, MachinePolicy) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert backend.calls == 1
+    assert all(result == results[0] for result in results)
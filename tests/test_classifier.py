@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from policy_forge import classifier, metrics
+from policy_forge.classifier import BatchClassification, Classification
+
+TEXTS = ["zero", "one", "two", "three"]
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def single(policy_text, text):
+        calls.append([text])
+        return Classification(label="violation")
+
+    monkeypatch.setattr(classifier, "classify_async", single)
+    return calls
+
+
+def batch_answering(calls, answer):
+    async def classify_batch(policy_text, texts, labels):
+        calls.append(list(texts))
+        return answer(texts)
+
+    return classify_batch
+
+
+def test_only_missing_items_are_retried(monkeypatch, calls):
+    def answer(texts):
+        # Answers every other item of the first batch, then all of any retry
+        skip = texts == TEXTS
+        return {index: Classification(label="non-violation") for index in range(len(texts)) if not (skip and index % 2)}
+
+    monkeypatch.setattr(classifier, "_classify_batch", batch_answering(calls, answer))
+    outcomes = asyncio.run(classifier.classify_batch_async("policy", TEXTS))
+    assert calls == [TEXTS, ["one"], ["three"]]
+    assert [outcome.label for outcome in outcomes] == ["non-violation", "violation", "non-violation", "violation"]
+
+
+def test_malformed_batches_are_split(monkeypatch, calls):
+    def answer(texts):
+        if len(texts) > 2:
+            BatchClassification.model_validate_json('{"results": "not a list"}')
+        return {index: Classification(label="non-violation") for index in range(len(texts))}
+
+    monkeypatch.setattr(classifier, "_classify_batch", batch_answering(calls, answer))
+    outcomes = asyncio.run(classifier.classify_batch_async("policy", TEXTS))
+    assert calls == [TEXTS, ["zero", "one"], ["two", "three"]]
+    assert all(outcome.label == "non-violation" for outcome in outcomes)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        asyncio.TimeoutError(),
+        openai.APIConnectionError(request=httpx.Request("POST", "https://api.example/v1/chat/completions")),
+    ],
+)
+def test_upstream_errors_fail_the_batch_without_splitting(monkeypatch, calls, error):
+    def answer(texts):
+        raise error
+
+    monkeypatch.setattr(classifier, "_classify_batch", batch_answering(calls, answer))
+    outcomes = asyncio.run(classifier.classify_batch_async("policy", TEXTS))
+    assert calls == [TEXTS]
+    assert outcomes == [error] * len(TEXTS)
+
+
+def test_splits_run_one_at_a_time_and_count_items_once(monkeypatch):
+    in_flight, peak = 0, 0
+
+    async def tracked():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+
+    async def classify_batch(policy_text, texts, labels):
+        await tracked()
+        return {}
+
+    async def single(policy_text, text):
+        await tracked()
+        return Classification(label="violation")
+
+    monkeypatch.setattr(classifier, "_classify_batch", classify_batch)
+    monkeypatch.setattr(classifier, "classify_async", single)
+    before = metrics.CLASSIFY_ITEMS.value(result="retried")
+    outcomes = asyncio.run(classifier.classify_batch_async("policy", TEXTS))
+    assert [outcome.label for outcome in outcomes] == ["violation"] * len(TEXTS)
+    assert peak == 1
+    # Each item is counted when first retried, not again at every level it is re-split
+    assert metrics.CLASSIFY_ITEMS.value(result="retried") - before == len(TEXTS)
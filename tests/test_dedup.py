@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from policy_forge import example_gen
+from policy_forge.dedup import DedupRegistry, NearDuplicateIndex, jaccard, shingles
+from policy_forge.schema import SyntheticExample
+
+ORIGINAL = "Buy cheap followers now at cheap-likes dot example, limited offer for new accounts!"
+REWORDED = "buy CHEAP followers now at cheap likes dot example -- limited offer for new accounts"
+DIFFERENT = "Our bakery opens at nine on weekdays and ten on weekends; come by for fresh bread."
+
+
+def test_shingles_ignore_case_punctuation_and_spacing():
+    assert shingles(ORIGINAL) == shingles(REWORDED)
+    assert jaccard(shingles(ORIGINAL), shingles(DIFFERENT)) < 0.1
+    assert shingles("hi") and jaccard(frozenset(), frozenset()) == 1.0
+
+
+def test_index_drops_near_duplicates_only():
+    index = NearDuplicateIndex(threshold=0.7)
+    assert index.add(ORIGINAL)
+    assert not index.add(REWORDED + " Act fast.")
+    assert index.add(DIFFERENT)
+    assert index.find(REWORDED) == ORIGINAL
+    assert index.find("Something else entirely about gardening tools") is None
+    assert len(index) == 2
+    assert (index.stats.checked, index.stats.duplicates) == (3, 1)
+
+
+def test_filter_splits_examples():
+    examples = [SyntheticExample(text=text, label="violation") for text in (ORIGINAL, REWORDED, DIFFERENT)]
+    unique, duplicates = NearDuplicateIndex().filter(examples)
+    assert [example.text for example in unique] == [ORIGINAL, DIFFERENT]
+    assert [example.text for example in duplicates] == [REWORDED]
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=64, bands=10)
+
+
+def test_registry_keeps_one_index_per_policy():
+    registry = DedupRegistry(max_policies=1)
+    first = registry.index("a")
+    assert registry.index("a") is first
+    registry.index("b")
+    assert registry.index("a") is not first
+
+
+def test_unique_examples_skip_what_the_index_has_seen(backend):
+    async def scenario():
+        index = NearDuplicateIndex()
+        fresh = await example_gen.generate_unique_examples_async("policy", index, regenerations=0)
+        repeated = await example_gen.generate_unique_examples_async("policy", index, regenerations=0)
+        replaced = await example_gen.generate_unique_examples_async("policy", index, regenerations=3)
+        return fresh, repeated, replaced, index
+
+    fresh, repeated, replaced, index = asyncio.run(scenario())
+    assert len(fresh.examples) == fresh.generated == 5 and fresh.duplicates == 0
+    assert repeated.examples == [] and repeated.duplicates == 5 and repeated.dedup_rate == 1.0
+    assert replaced.regenerations >= 1 and replaced.examples
+    seen = {example.text for example in fresh.examples}
+    assert not seen & {example.text for example in replaced.examples}
+    assert len(index) == len(fresh.examples) + len(replaced.examples)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from policy_forge import evaluation
+from policy_forge.dedup import policy_key
+from policy_forge.evaluation import Checkpoint, ConfusionMatrix, Prediction
+from policy_forge.schema import MachinePolicy, OutputFormat
+from tests.factories import sample
+
+LABELS = ["violation", "non-violation"]
+
+
+@pytest.fixture
+def policy() -> MachinePolicy:
+    return sample(MachinePolicy).model_copy(update={"output_format": OutputFormat(type="classification", labels=LABELS)})
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    records = [{"text": f"message number {i}", "label": LABELS[i % 2]} for i in range(12)]
+    records.append({"text": "hard to say", "label": "borderline"})
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n\n")
+    return path
+
+
+def test_scores_skip_labels_the_policy_cannot_predict():
+    matrix = ConfusionMatrix(LABELS)
+    for expected, predicted in [
+        ("violation", "violation"),
+        ("violation", "violation"),
+        ("violation", "non-violation"),
+        ("non-violation", "violation"),
+        ("borderline", "violation"),
+    ]:
+        matrix.add(expected, predicted)
+    scores, accuracy = matrix.scores()
+    assert len(matrix) == 5
+    assert accuracy == 0.5
+    assert scores["violation"].precision == pytest.approx(2 / 3)
+    assert scores["violation"].recall == pytest.approx(2 / 3)
+    assert scores["violation"].support == 3
+    assert (scores["non-violation"].precision, scores["non-violation"].f1) == (0.0, 0.0)
+    assert ConfusionMatrix(LABELS).scores() == ({label: evaluation.LabelScores(precision=None, recall=None, f1=None, support=0) for label in LABELS}, None)
+
+
+def test_read_dataset_reports_the_bad_line(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"text": "ok", "label": "violation"}\n\n{"text": "no label"}\n')
+    with pytest.raises(ValueError, match="line 3"):
+        list(evaluation.read_dataset(path))
+
+
+def test_checkpoint_ignores_a_torn_last_line(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.jsonl")
+    assert list(checkpoint.load("key")) == []
+    checkpoint.append([Prediction(index=0, expected="violation", label="violation")])
+    with open(checkpoint.path, "a") as f:
+        f.write('{"index": 1, "expec')
+    assert [prediction.index for prediction in checkpoint.load("key")] == [0]
+
+    # The next append starts on a fresh line rather than extending the torn one
+    checkpoint.append([Prediction(index=2, expected="violation", label="violation")])
+    assert [prediction.index for prediction in checkpoint.load("key")] == [0, 2]
+    with pytest.raises(ValueError, match="different policy"):
+        list(checkpoint.load("other"))
+
+
+def test_checkpoint_with_a_torn_header_starts_over(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"poli')
+    assert list(Checkpoint(path).load("key")) == []
+    assert json.loads(path.read_text()) == {"policy": "key"}
+
+
+def test_evaluation_resumes_from_its_checkpoint(backend, policy, dataset, tmp_path):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    # An earlier run finished two records, then crashed mid-write
+    assert list(Checkpoint(checkpoint).load(policy_key(policy))) == []
+    Checkpoint(checkpoint).append(
+        [Prediction(index=0, expected="violation", label="violation"), Prediction(index=1, expected="non-violation", label="violation")]
+    )
+    with open(checkpoint, "a") as f:
+        f.write('{"index": 2')
+
+    async def scenario():
+        first = await evaluation.evaluate_async(policy, dataset, checkpoint=checkpoint, concurrency=2, checkpoint_every=3)
+        calls = backend.calls
+        second = await evaluation.evaluate_async(policy, dataset, checkpoint=checkpoint)
+        return first, second, calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert (first.total, first.resumed, first.evaluated, first.errors) == (13, 2, 11, 0)
+    assert first.confusion["borderline"] and "borderline" not in first.labels
+    assert (second.total, second.resumed, second.evaluated) == (13, 13, 0)
+    assert backend.calls == calls
+    indexes = [prediction.index for prediction in Checkpoint(checkpoint).load(policy_key(policy))]
+    assert sorted(indexes) == list(range(13))
@@ -0,0 +1,242 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from backend import jobs
+from backend.jobs import Job, JobWorkerPool, MemoryJobQueue, RedisJobQueue, SQLiteJobQueue
+from policy_forge.pipeline import PipelineResult
+
+
+async def fake_runner(intent: str, on_stage=None) -> PipelineResult:
+    await asyncio.sleep(0)
+    if on_stage is not None:
+        on_stage("machine", 0.01)
+    if intent == "fail":
+        raise RuntimeError("upstream refused")
+    return PipelineResult(intent=intent)
+
+
+@pytest.fixture(autouse=True)
+def runners(monkeypatch):
+    monkeypatch.setitem(jobs.RUNNERS, "generate", fake_runner)
+
+
+async def finished(queue, job_id: str, timeout: float = 5.0) -> Job:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await queue.get(job_id)
+        if job is not None and job.status in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_memory_queue_claims_in_order():
+    async def scenario():
+        queue = MemoryJobQueue()
+        first, second = Job(intent="a"), Job(intent="b")
+        await queue.put(first)
+        await queue.put(second)
+        claimed = [await queue.claim(), await queue.claim(), await queue.claim()]
+        return claimed, await queue.get(first.id)
+
+    claimed, stored = asyncio.run(scenario())
+    assert [job.intent for job in claimed[:2]] == ["a", "b"]
+    assert claimed[2] is None
+    assert stored.status == "running" and stored.attempts == 1 and stored.lease_until is not None
+
+
+def test_pool_runs_jobs_to_completion():
+    async def scenario():
+        pool = JobWorkerPool(MemoryJobQueue(), workers=2, poll_interval=0.01)
+        await pool.start()
+        try:
+            ok = await pool.submit("generate", "spam")
+            failing = await pool.submit("generate", "fail")
+            return await finished(pool.queue, ok.id), await finished(pool.queue, failing.id)
+        finally:
+            await pool.stop()
+
+    ok, failing = asyncio.run(scenario())
+    assert ok.status == "succeeded" and ok.result.intent == "spam"
+    assert ok.timings == {"machine": 0.01} and ok.lease_until is None and ok.finished_at is not None
+    assert failing.status == "failed" and failing.error == "upstream refused"
+
+
+def test_workers_survive_queue_errors(caplog):
+    class FlakyQueue(MemoryJobQueue):
+        failures = 3
+
+        async def claim(self, lease=jobs.DEFAULT_JOB_LEASE):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("queue unreachable")
+            return await super().claim(lease)
+
+    async def scenario():
+        pool = JobWorkerPool(FlakyQueue(), workers=1, poll_interval=0.01)
+        await pool.start()
+        try:
+            job = await pool.submit("generate", "spam")
+            return await finished(pool.queue, job.id)
+        finally:
+            await pool.stop()
+
+    assert asyncio.run(scenario()).status == "succeeded"
+    assert "Failed to claim a job" in caplog.text
+
+
+def test_memory_queue_drops_old_finished_jobs():
+    async def scenario():
+        queue = MemoryJobQueue(max_finished=2, finished_ttl=None)
+        saved = []
+        for intent in ("a", "b", "c"):
+            job = Job(intent=intent)
+            await queue.put(job)
+            job = await queue.claim()
+            job.status, job.finished_at = "succeeded", time.time()
+            await queue.save(job)
+            saved.append(job.id)
+        waiting = Job(intent="d")
+        await queue.put(waiting)
+        return [await queue.get(job_id) for job_id in [*saved, waiting.id]]
+
+    first, second, third, waiting = asyncio.run(scenario())
+    assert first is None
+    assert second.intent == "b" and third.intent == "c"
+    assert waiting.status == "queued"
+
+
+def test_memory_queue_expires_finished_jobs():
+    async def scenario():
+        queue = MemoryJobQueue(finished_ttl=0.01)
+        job = Job(intent="a")
+        await queue.put(job)
+        job = await queue.claim()
+        job.status, job.finished_at = "failed", time.time()
+        await queue.save(job)
+        before = await queue.get(job.id)
+        await asyncio.sleep(0.02)
+        return before, await queue.get(job.id)
+
+    before, after = asyncio.run(scenario())
+    assert before is not None and after is None
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def shared_queue(request, tmp_path):
+    if request.param == "redis":
+        yield RedisJobQueue(request.getfixturevalue("redis_client"))
+        return
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    yield queue
+    queue.close()
+
+
+def test_shared_queue_claims_each_job_once(shared_queue):
+    async def scenario():
+        for intent in "abc":
+            await shared_queue.put(Job(intent=intent, created_at=time.time()))
+        return await asyncio.gather(*(shared_queue.claim() for _ in range(4)))
+
+    claimed = asyncio.run(scenario())
+    assert sorted(job.intent for job in claimed if job is not None) == ["a", "b", "c"]
+    assert len({job.owner for job in claimed if job is not None}) == 3
+
+
+def test_lapsed_jobs_are_requeued_and_fenced_off(shared_queue):
+    async def scenario():
+        await shared_queue.put(Job(intent="a"))
+        stalled = await shared_queue.claim(lease=0.01)
+        await asyncio.sleep(0.02)
+        recovered = await shared_queue.recover()
+        # Nothing else has lapsed, so a second pass requeues nothing
+        again = await shared_queue.recover()
+        requeued = await shared_queue.get(stalled.id)
+        takeover = await shared_queue.claim()
+        stalled.status = "failed"
+        takeover.status = "succeeded"
+        return stalled, recovered, again, requeued, takeover, [await shared_queue.save(job) for job in (stalled, takeover)]
+
+    stalled, recovered, again, requeued, takeover, saves = asyncio.run(scenario())
+    assert (recovered, again) == (1, 0)
+    assert requeued.status == "queued" and requeued.owner is None
+    assert takeover.id == stalled.id and takeover.attempts == 2 and takeover.owner != stalled.owner
+    assert saves == [False, True]
+    assert asyncio.run(shared_queue.get(stalled.id)).status == "succeeded"
+
+
+def test_running_jobs_keep_their_lease(shared_queue):
+    async def scenario():
+        await shared_queue.put(Job(intent="a"))
+        job = await shared_queue.claim(lease=0.05)
+        await asyncio.sleep(0.03)
+        job.lease_until = time.time() + 0.05
+        renewed = await shared_queue.save(job)
+        await asyncio.sleep(0.03)
+        return renewed, await shared_queue.recover()
+
+    assert asyncio.run(scenario()) == (True, 0)
+
+
+def test_sqlite_queue_adds_owners_to_older_databases(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, data TEXT NOT NULL)")
+    job = Job(intent="a")
+    conn.execute("INSERT INTO jobs VALUES (?, ?, ?, ?)", (job.id, job.status, job.created_at, job.model_dump_json()))
+    conn.commit()
+    conn.close()
+
+    queue = SQLiteJobQueue(path)
+    claimed = asyncio.run(queue.claim())
+    claimed.status = "succeeded"
+    assert asyncio.run(queue.save(claimed))
+    queue.close()
+
+
+def test_workers_abandon_jobs_claimed_elsewhere(monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def slow_runner(intent: str, on_stage=None) -> PipelineResult:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return PipelineResult(intent=intent)
+
+    monkeypatch.setitem(jobs.RUNNERS, "generate", slow_runner)
+
+    async def scenario():
+        queue = MemoryJobQueue()
+        pool = JobWorkerPool(queue, workers=1, poll_interval=0.01, lease=0.06)
+        await pool.start()
+        try:
+            job = await pool.submit("generate", "spam")
+            while (await queue.get(job.id)).status != "running":
+                await asyncio.sleep(0.01)
+            # As if the lease had lapsed and another worker had claimed the job
+            queue._jobs[job.id].owner = "another worker"
+            await asyncio.wait_for(cancelled.wait(), 1)
+            await asyncio.sleep(0.05)
+            return await queue.get(job.id), pool._tasks[0].done()
+        finally:
+            await pool.stop()
+
+    stolen, worker_done = asyncio.run(scenario())
+    assert stolen.status == "running" and stolen.owner == "another worker"
+    assert not worker_done
+
+
+def test_job_route_hides_the_lease(client):
+    job_id = client.post("/api/jobs", json={"intent": "spam"}).json()["id"]
+    deadline = time.monotonic() + 5
+    while (polled := client.get(f"/api/jobs/{job_id}").json())["status"] not in ("succeeded", "failed"):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert polled["status"] == "succeeded" and polled["result"]["intent"] == "spam"
+    assert "owner" not in polled and "lease_until" not in polled
+    assert client.get("/api/jobs/missing").status_code == 404
@@ -0,0 +1,52 @@
+import json
+
+INTENT = "Moderate spam links in a marketplace"
+
+EXAMPLES = [{"text": "buy followers at cheap-likes.example", "label": "violation"}]
+
+
+def sse_events(body: str) -> list:
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_generate_stores_the_policy(client):
+    response = client.post("/api/policy/generate", json={"intent": INTENT}).json()
+    stored = client.get(f"/api/policies/{response['policy_id']}").json()
+    assert response["version"] == stored["version"] == 1
+    assert stored["machine"] == response["machine"] and stored["public"] == response["public"]
+
+
+def test_streamed_generation_is_stored_like_the_plain_one(client):
+    response = client.post("/api/policy/generate/stream", json={"intent": INTENT})
+    events = sse_events(response.text)
+    name, final = events[-1]
+    assert name == "policy"
+    assert final["version"] == 1
+    stored = client.get(f"/api/policies/{final['policy_id']}").json()
+    assert stored["moderator"] == final["moderator"]
+
+    negotiated = client.post(
+        "/api/policy/generate", json={"intent": INTENT}, headers={"Accept": "text/event-stream"}
+    )
+    assert sse_events(negotiated.text)[-1][1]["policy_id"] not in (None, final["policy_id"])
+
+
+def test_refined_versions_keep_stale_derived_policies(client):
+    generated = client.post("/api/policy/generate", json={"intent": INTENT}).json()
+    policy_id = generated["policy_id"]
+    refined = client.post("/api/policy/refine", json={"policy_id": policy_id, "reviewed_examples": EXAMPLES}).json()
+    assert refined["version"] == 2
+
+    latest = client.get(f"/api/policies/{policy_id}").json()
+    assert latest["public"] == generated["public"] and latest["derived_from"] == 1
+    assert client.get("/api/policy/preview", params={"policy_id": policy_id, "policy_type": "public"}).status_code == 200
+    download = client.get(f"/api/policies/{policy_id}/download", params={"policy_type": "moderator"})
+    assert download.status_code == 200
+
+    derived = client.post("/api/policy/generate/derived", json={"policy_id": policy_id}).json()
+    assert client.get(f"/api/policies/{policy_id}").json()["derived_from"] == derived["version"] == 3
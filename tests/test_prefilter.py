@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+from policy_forge import prefilter
+from policy_forge.prefilter import LexicalRule, Prefilter
+from policy_forge.schema import MachinePolicy
+from tests.factories import sample
+
+
+def rule(pattern: str, verdict: str = "violation", kind: str = "regex") -> LexicalRule:
+    return LexicalRule(criterion=0 if verdict == "non-violation" else 1, kind=kind, pattern=pattern, verdict=verdict)
+
+
+def test_keywords_match_whole_words_including_symbols():
+    rules = Prefilter([rule("buy followers", kind="keyword"), rule("$$$", kind="keyword"), rule("cash", kind="keyword")])
+    assert rules.check("BUY   followers today") == "violation"
+    assert rules.check("easy $$$ from home") == "violation"
+    assert rules.check("cashier wanted") is None
+    assert [matched.pattern for matched in rules.match("cash, then $$$")] == ["cash", "$$$"]
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        r"(free)\s+\1",  # backreference
+        r"(?P<word>x)",  # named group
+        r"(a)?(?(1)b|c)",  # conditional
+        r"(a+)+b",
+        r"(\w+\s?)*$",
+        r"(?:x{2,})+",
+        r"a*",  # matches everything
+        r"(unclosed",
+        "x" * (prefilter.MAX_PATTERN_LENGTH + 1),
+    ],
+)
+def test_unsafe_regexes_are_dropped(pattern):
+    rules = Prefilter([rule(pattern), rule("spam")])
+    assert rules.dropped == 1 and [kept.pattern for kept in rules.rules] == ["spam"]
+    assert rules.check("free free spam") == "violation"
+
+
+def test_safe_regexes_are_kept():
+    patterns = [r"(?:https?://)?bit\.ly/\w+", r"(a|b)+c", r"\d{3}-\d{4}", r"[(\\1]+x", r"(ab{2,5}){3}"]
+    assert Prefilter([rule(pattern) for pattern in patterns]).dropped == 0
+
+
+def test_overlapping_verdicts_escalate():
+    rules = Prefilter([rule("kill (the|this) process", "non-violation"), rule("process server")])
+    assert rules.check("kill the process server") is None
+    assert rules.check("kill this process") == "non-violation"
+    assert rules.check("the process server") == "violation"
+    assert rules.check("nothing relevant") is None
+
+
+def test_long_texts_escalate_without_scanning():
+    rules = Prefilter([rule(r"(?:a|a)*b")])
+    start = time.perf_counter()
+    assert rules.check("a" * (prefilter.MAX_TEXT_LENGTH + 1)) is None
+    assert time.perf_counter() - start < 0.1
+
+
+def test_routed_classification_records_each_path(backend):
+    rules = Prefilter([rule("buy followers", kind="keyword"), rule("bake sale", "non-violation", kind="keyword")])
+    texts = ["buy followers now", "bake sale on friday", "something else"]
+    outcomes = asyncio.run(prefilter.classify_routed_async(sample(MachinePolicy), texts, rules))
+    assert [outcome.path for outcome in outcomes] == ["rule", "rule", "llm"]
+    assert [outcome.label for outcome in outcomes[:2]] == ["violation", "non-violation"]
+    assert rules.routes == {"rule": 2, "llm": 1}
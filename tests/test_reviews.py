@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from policy_forge.reviews import RedisReviewStore, SQLiteReviewStore
+from policy_forge.schema import ReviewedExample
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def reviews(request, tmp_path):
+    if request.param == "redis":
+        store = RedisReviewStore(request.getfixturevalue("redis_client"))
+    else:
+        store = SQLiteReviewStore(str(tmp_path / "policies.db"))
+    yield store
+    store.close()
+
+
+def reviewed(text: str, label: str, approved: bool) -> ReviewedExample:
+    return ReviewedExample(text=text, label=label, is_approved=approved)
+
+
+def test_agreement_per_label_and_version(reviews):
+    async def scenario():
+        await reviews.add("p", 1, [reviewed("a", "violation", True), reviewed("b", "violation", False)])
+        await reviews.add("p", 2, [reviewed("c", "violation", True), reviewed("d", "non-violation", True)])
+        await reviews.add("other", 1, [reviewed("e", "violation", False)])
+        return await reviews.stats("p", 1), await reviews.stats("p")
+
+    first, overall = asyncio.run(scenario())
+    assert [(row.label, row.reviewed, row.approved, row.agreement) for row in first] == [("violation", 2, 1, 0.5)]
+    assert [(row.label, row.reviewed, row.approved) for row in overall] == [("non-violation", 1, 1), ("violation", 3, 2)]
+
+
+def test_pending_queue_drains_as_reviews_are_incorporated(reviews):
+    async def scenario():
+        stored = await reviews.add("p", 1, [reviewed(text, "violation", True) for text in "abc"])
+        queued = await reviews.pending("p")
+        first_two = await reviews.pending("p", limit=2)
+        marked = await reviews.mark_incorporated([review.id for review in first_two], 2)
+        # Reviews already incorporated are never counted twice
+        remarked = await reviews.mark_incorporated([review.id for review in first_two], 3)
+        return stored, queued, marked, remarked, await reviews.pending("p"), await reviews.count_pending("p")
+
+    stored, queued, marked, remarked, left, count = asyncio.run(scenario())
+    assert stored == 3
+    assert [review.text for review in queued] == ["a", "b", "c"]
+    assert all(review.policy_version == 1 and review.incorporated_in is None for review in queued)
+    assert (marked, remarked) == (2, 0)
+    assert [review.text for review in left] == ["c"] and count == 1
+
+
+def test_stored_reviews_refine_stored_policies(client):
+    generated = client.post("/api/policy/generate", json={"intent": "Moderate spam"}).json()
+    policy_id = generated["policy_id"]
+    examples = [
+        {"text": "cheap followers here", "label": "violation", "is_approved": True},
+        {"text": "my shop opens at nine", "label": "violation", "is_approved": False},
+    ]
+    review = client.post("/api/examples/review", json={"policy_id": policy_id, "examples": examples}).json()
+    assert review["stored"] == 2 and review["pending"] == 2
+    assert review["agreement"][0]["agreement"] == 0.5
+
+    refined = client.post(
+        "/api/policy/refine/incremental",
+        json={"policy_id": policy_id, "reviewed_examples": [], "from_review_queue": True},
+    ).json()
+    assert client.get("/api/examples/review/pending", params={"policy_id": policy_id}).json() == []
+    assert refined["version"] == 2
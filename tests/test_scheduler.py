@@ -0,0 +1,199 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from policy_forge import cache, llm, metrics, scheduler
+from policy_forge.backends import StubBackend
+from policy_forge.cache import MemoryCache
+from policy_forge.scheduler import RateLimitScheduler, SchedulerSettings, _Bucket
+from policy_forge.schema import MachinePolicy
+
+MESSAGES = [{"role": "user", "content": "Write a policy about spam"}]
+
+
+def rate_limit_error(**headers) -> openai.RateLimitError:
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com/v1"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def fast_settings(**overrides) -> SchedulerSettings:
+    defaults = dict(requests_per_minute=0, tokens_per_minute=0, max_retries=3, base_delay=0.001, max_delay=0.01)
+    return SchedulerSettings(**{**defaults, **overrides})
+
+
+def test_bucket_waits_for_refill_and_caps_refunds():
+    bucket = _Bucket(per_minute=60)
+    assert bucket.wait_time(10) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+    # Requests bigger than the whole budget wait for a full bucket rather than forever
+    assert bucket.wait_time(1000) == pytest.approx(60.0, abs=0.5)
+    bucket.give(1000)
+    assert bucket.level == bucket.capacity
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = _Bucket(per_minute=0)
+    bucket.take(10**9)
+    assert bucket.wait_time(10**9) == 0
+
+
+def test_retry_after_headers():
+    assert scheduler.retry_after(rate_limit_error(**{"retry-after-ms": "250"})) == 0.25
+    assert scheduler.retry_after(rate_limit_error(**{"retry-after": "3"})) == 3.0
+    assert scheduler.retry_after(rate_limit_error(**{"retry-after": "soon"})) is None
+    assert scheduler.retry_after(ValueError()) is None
+
+
+def test_higher_priority_callers_are_admitted_first():
+    async def scenario():
+        limiter = RateLimitScheduler(fast_settings(requests_per_minute=6000))
+        limiter.requests.level = 0
+        order = []
+
+        async def caller(name, level):
+            await limiter.acquire(1, level=level)
+            order.append(name)
+
+        await asyncio.gather(
+            caller("batch", scheduler.BATCH), caller("interactive", scheduler.INTERACTIVE), caller("batch-2", scheduler.BATCH)
+        )
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch", "batch-2"]
+
+
+def test_retries_retryable_errors_then_succeeds():
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise rate_limit_error(**{"retry-after-ms": "1"})
+        return "ok"
+
+    async def scenario():
+        return await RateLimitScheduler(fast_settings()).run(call, MESSAGES)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert len(attempts) == 3
+
+
+def test_gives_up_after_max_retries():
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise rate_limit_error()
+
+    async def scenario():
+        await RateLimitScheduler(fast_settings(max_retries=2)).run(call, MESSAGES)
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(scenario())
+    assert len(attempts) == 3
+
+
+def test_other_errors_are_not_retried():
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    async def scenario():
+        await RateLimitScheduler(fast_settings()).run(call, MESSAGES)
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert len(attempts) == 1
+
+
+def test_unused_token_reservations_are_refunded():
+    async def scenario():
+        limiter = RateLimitScheduler(fast_settings(tokens_per_minute=100_000))
+        reserved = limiter.reservation(MESSAGES)
+
+        async def call():
+            # The whole reservation is taken while the call runs
+            return limiter.tokens.level
+
+        during = await limiter.run(call, MESSAGES, used_tokens=lambda _: 100)
+        return reserved, during, limiter.tokens.level
+
+    reserved, during, after = asyncio.run(scenario())
+    assert during == pytest.approx(100_000 - reserved, abs=5)
+    assert after == pytest.approx(100_000 - 100, abs=5)
+
+
+def test_throttled_streams_hold_no_concurrency_slot():
+    async def scenario():
+        pool = llm.LLMPool(
+            llm.LLMSettings(max_concurrency=1), fast_settings(requests_per_minute=600), backend=StubBackend()
+        )
+        pool.scheduler.requests.level = 0
+
+        async def consume():
+            return [item async for item in pool.stream(MESSAGES, MachinePolicy)]
+
+        streaming = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        throttled = pool.scheduler.queued == 1 and not pool.semaphore.locked()
+        items = await streaming
+        return throttled, items, pool.semaphore.locked()
+
+    throttled, items, locked_after = asyncio.run(scenario())
+    assert throttled
+    assert items[-1][0] is None
+    assert not locked_after
+
+
+async def collect(items) -> list:
+    return [item async for item in items]
+
+
+class FailingStubBackend(StubBackend):
+    name = "failing-stub"
+
+    async def stream(self, model, messages, response_format):
+        sent = 0
+        async for item in super().stream(model, messages, response_format):
+            if sent == 2:
+                raise ConnectionError("stream dropped")
+            sent += 1
+            yield item
+
+
+def test_streams_failing_midway_are_recorded_and_refunded():
+    async def scenario():
+        pool = llm.LLMPool(llm.LLMSettings(), fast_settings(tokens_per_minute=100_000), backend=FailingStubBackend())
+        reserved = pool.scheduler.reservation(MESSAGES)
+        with pytest.raises(ConnectionError):
+            async for _ in pool.stream(MESSAGES, MachinePolicy):
+                pass
+        return pool, reserved
+
+    labels = dict(backend="failing-stub", model=llm.LLMSettings().model, response_format="MachinePolicy")
+    before = metrics.LLM_REQUEST_SECONDS.count(**labels, outcome="error")
+    pool, reserved = asyncio.run(scenario())
+    assert metrics.LLM_REQUEST_SECONDS.count(**labels, outcome="error") == before + 1
+    assert not pool.semaphore.locked()
+    expected = 100_000 - reserved + pool.scheduler.settings.expected_output_tokens
+    assert pool.scheduler.tokens.level == pytest.approx(expected, abs=5)
+
+
+def test_a_stalled_stream_reader_holds_up_no_identical_call(backend, monkeypatch):
+    monkeypatch.setattr(cache, "_cache", MemoryCache())
+
+    async def scenario():
+        stalled = llm.stream(MESSAGES, MachinePolicy)
+        await stalled.__anext__()
+        # The first reader stops reading; an identical stream still runs to completion
+        items = await asyncio.wait_for(collect(llm.stream(MESSAGES, MachinePolicy)), 1)
+        await stalled.aclose()
+        return items
+
+    assert asyncio.run(scenario())[-1][0] is None
+    assert backend.calls == 2
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from policy_forge import cache
+from policy_forge.intent_builder import format_intent
+from policy_forge.semantic_cache import INTENT_TEMPLATE, SemanticCache, TfidfIndex, features
+
+HATE = "Moderate hate speech in gaming chats"
+HATE_REWORDED = "hate speech in gaming chats"
+SPAM = "Remove spam links from marketplace listings"
+
+
+def intent(concern: str) -> str:
+    return format_intent(
+        {
+            "platform_type": "online game",
+            "industry": "gaming",
+            "user_behavior": concern,
+            "real_world_concerns": concern,
+            "moderation_style": "strict",
+            "additional_context": "",
+        }
+    )
+
+
+@pytest.fixture
+def semantic() -> SemanticCache:
+    return SemanticCache(TfidfIndex(INTENT_TEMPLATE))
+
+
+def test_inflections_share_features():
+    assert set(features("hateful gaming")) & set(features("hate game"))
+    assert not set(features("cats")) & set(features("xyz"))
+
+
+def test_index_ranks_rewordings_above_other_concerns():
+    index = TfidfIndex()
+    index.add(1, HATE)
+    index.add(2, SPAM)
+    ranked = index.search(HATE_REWORDED)
+    assert ranked[0][0] == 1 and ranked[0][1] > dict(ranked).get(2, 0.0)
+    index.remove(1)
+    assert 1 not in dict(index.search(HATE_REWORDED))
+
+
+def test_template_text_is_ignored():
+    index = TfidfIndex(INTENT_TEMPLATE)
+    index.add(1, intent("hate speech and slurs in voice chat"))
+    (_, same), = index.search(intent("hate speech and slurs in voice chat"))
+    assert same == pytest.approx(1.0)
+    # The two intents share the whole template; only the concerns count
+    assert all(score < 0.5 for _, score in index.search(intent("cheating with aimbots")))
+
+
+def test_lookups_hit_above_the_threshold(semantic):
+    async def scenario():
+        await semantic.add(HATE, "p1", 1)
+        return (
+            await semantic.lookup(HATE),
+            await semantic.lookup("Recipes for sourdough bread"),
+            await semantic.lookup(HATE, derived=True),
+        )
+
+    exact, unrelated, needs_derived = asyncio.run(scenario())
+    assert (exact.policy_id, exact.version, exact.intent) == ("p1", 1, HATE)
+    assert exact.similarity == pytest.approx(1.0)
+    assert unrelated is None
+    # The only match has no public or moderator policy
+    assert needs_derived is None
+    stats = semantic.stats()
+    assert (stats.entries, stats.lookups, stats.hits) == (1, 3, 1)
+
+
+def test_regenerated_intents_replace_their_policy_and_old_ones_are_evicted():
+    semantic = SemanticCache(TfidfIndex(), max_entries=2)
+
+    async def scenario():
+        await semantic.add(HATE, "p1", 1)
+        await semantic.add(HATE, "p2", 1, derived=True)
+        replaced = await semantic.lookup(HATE, derived=True)
+        await semantic.add(SPAM, "p3", 1)
+        await semantic.add("Block phishing messages asking for passwords", "p4", 1)
+        return replaced, await semantic.lookup(HATE), await semantic.lookup(SPAM)
+
+    replaced, evicted, kept = asyncio.run(scenario())
+    assert replaced.policy_id == "p2"
+    assert evicted is None and kept.policy_id == "p3"
+    assert semantic.stats().entries == 2
+
+
+def test_false_hits_are_counted_once(semantic):
+    async def scenario():
+        await semantic.add(HATE, "p1", 1)
+        match = await semantic.lookup(HATE)
+        return match, [await semantic.report_false_hit(match.id) for _ in range(2)], await semantic.report_false_hit("nope")
+
+    match, reports, unknown = asyncio.run(scenario())
+    assert reports == [True, False] and not unknown
+    stats = semantic.stats()
+    assert (stats.hits, stats.false_hits, stats.false_hit_rate) == (1, 1, 1.0)
+
+
+def test_bypass_skips_lookups(semantic):
+    async def scenario():
+        await semantic.add(HATE, "p1", 1)
+        with cache.bypass():
+            return await semantic.lookup(HATE)
+
+    assert asyncio.run(scenario()) is None
+    assert semantic.stats().lookups == 0
+
+
+def test_cache_routes_are_missing_when_off(client):
+    assert client.get("/api/intent/cache/stats").status_code == 404
+
+
+@pytest.fixture
+def semantic_client(monkeypatch, request):
+    monkeypatch.setenv("POLICY_FORGE_SEMANTIC_CACHE", "1")
+    return request.getfixturevalue("client")
+
+
+def test_generation_is_served_from_a_reworded_intent(semantic_client):
+    generated = semantic_client.post("/api/policy/generate", json={"intent": HATE}).json()
+    assert generated["semantic_match"] is None
+    served = semantic_client.post("/api/policy/generate", json={"intent": HATE_REWORDED}).json()
+    match = served["semantic_match"]
+    assert (match["policy_id"], served["policy_id"]) == (generated["policy_id"], generated["policy_id"])
+    assert served["machine"] == generated["machine"]
+
+    reported = semantic_client.post("/api/intent/cache/false-hit", json={"match_id": match["id"]})
+    assert reported.json()["false_hits"] == 1
+    assert semantic_client.post("/api/intent/cache/false-hit", json={"match_id": match["id"]}).status_code == 404
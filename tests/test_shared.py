@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+from policy_forge import shared
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def locks(request, tmp_path):
+    if request.param == "redis":
+        return shared.RedisLocks(request.getfixturevalue("redis_client"))
+    if request.param == "sqlite":
+        return shared.SQLiteLocks(str(tmp_path / "locks.db"))
+    return shared.MemoryLocks()
+
+
+def test_leases_exclude_other_owners(locks):
+    assert locks.acquire("key", "a", 10)
+    assert not locks.acquire("key", "b", 10)
+    assert locks.renew("key", "a", 10) and not locks.renew("key", "b", 10)
+    # Only the owner can release
+    locks.release("key", "b")
+    assert not locks.acquire("key", "b", 10)
+    locks.release("key", "a")
+    assert locks.acquire("key", "b", 10)
+
+
+def test_lapsed_leases_are_taken_over(locks):
+    assert locks.acquire("key", "a", 0.05)
+    time.sleep(0.1)
+    assert locks.acquire("key", "b", 10)
+    # The first owner can neither extend nor free what it lost
+    assert not locks.renew("key", "a", 10)
+    locks.release("key", "a")
+    assert not locks.acquire("key", "c", 10)
+
+
+def test_hold_serializes_blocks_and_renews_long_ones(locks):
+    order = []
+
+    async def block(name: str, seconds: float):
+        async with shared.hold(locks, "key", ttl=0.1, poll=0.01):
+            order.append(f"{name} in")
+            await asyncio.sleep(seconds)
+            order.append(f"{name} out")
+
+    async def scenario():
+        # The first block outlives its lease several times over; renewal keeps the second waiting
+        await asyncio.gather(block("first", 0.35), block("second", 0))
+
+    asyncio.run(scenario())
+    assert order == ["first in", "first out", "second in", "second out"]
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from policy_forge.schema import MachinePolicy, ModeratorPolicy, PublicPolicy
+from policy_forge.store import RedisPolicyStore, SQLitePolicyStore
+from tests.factories import sample
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "redis":
+        store = RedisPolicyStore(request.getfixturevalue("redis_client"))
+    else:
+        store = SQLitePolicyStore(str(tmp_path / "policies.db"))
+    yield store
+    store.close()
+
+
+def moderator(name: str, severity: str) -> ModeratorPolicy:
+    return sample(ModeratorPolicy, name).model_copy(update={"name": name, "severity": severity})
+
+
+def test_versions_are_numbered_and_immutable(store):
+    async def scenario():
+        created = await store.create(sample(MachinePolicy, "v1"), source="generate")
+        revised = await store.add_version(created.id, machine=sample(MachinePolicy, "v2"), source="refine")
+        return created, revised, await store.get(created.id), await store.get(created.id, 1), await store.versions(created.id)
+
+    created, revised, latest, first, versions = asyncio.run(scenario())
+    assert (created.version, revised.version, latest.version) == (1, 2, 2)
+    assert first == created
+    assert latest.machine == sample(MachinePolicy, "v2")
+    assert [(info.version, info.source) for info in versions] == [(1, "generate"), (2, "refine")]
+
+
+def test_missing_policies_and_versions(store):
+    async def scenario():
+        created = await store.create(sample(MachinePolicy))
+        return (
+            await store.get("missing"),
+            await store.get(created.id, 7),
+            await store.add_version("missing", machine=sample(MachinePolicy)),
+        )
+
+    assert asyncio.run(scenario()) == (None, None, None)
+
+
+def test_concurrent_writers_get_distinct_versions(store):
+    async def scenario():
+        created = await store.create(sample(MachinePolicy))
+        added = await asyncio.gather(
+            *(store.add_version(created.id, machine=sample(MachinePolicy, str(i))) for i in range(10))
+        )
+        return added, await store.versions(created.id)
+
+    added, versions = asyncio.run(scenario())
+    assert sorted(policy.version for policy in added) == list(range(2, 12))
+    assert [info.version for info in versions] == list(range(1, 12))
+
+
+def test_refinement_carries_derived_policies_marked_stale(store):
+    async def scenario():
+        public, mod = sample(PublicPolicy), moderator("Spam", "medium")
+        created = await store.create(sample(MachinePolicy, "v1"), public, mod, source="generate")
+        refined = await store.add_version(created.id, machine=sample(MachinePolicy, "v2"), source="refine")
+        refined_again = await store.add_version(created.id, machine=sample(MachinePolicy, "v3"), source="refine")
+        derived = await store.add_version(
+            created.id, machine=refined_again.machine, public=public, moderator=mod, source="derive"
+        )
+        return created, refined, refined_again, derived
+
+    created, refined, refined_again, derived = asyncio.run(scenario())
+    assert created.derived_from == 1
+    assert refined.public == created.public and refined.moderator == created.moderator
+    assert refined.derived_from == 1 and refined_again.derived_from == 1
+    assert derived.derived_from == derived.version == 4
+
+
+def test_machine_only_versions_have_no_derived_marker(store):
+    async def scenario():
+        created = await store.create(sample(MachinePolicy))
+        return created, await store.add_version(created.id, machine=sample(MachinePolicy, "v2"))
+
+    created, revised = asyncio.run(scenario())
+    assert created.derived_from is None and revised.derived_from is None
+
+
+def test_find_filters_on_indexed_columns(store):
+    async def scenario():
+        spam = await store.create(sample(MachinePolicy), moderator=moderator("Spam", "low"))
+        start = time.time()
+        scams = await store.create(sample(MachinePolicy), moderator=moderator("Scams", "high"))
+        fraud = await store.create(sample(MachinePolicy), moderator=moderator("Fraud", "high"))
+        # The latest version's name and severity are what searches see
+        await store.add_version(fraud.id, moderator=moderator("Fraud", "critical"))
+        return (
+            spam,
+            scams,
+            fraud,
+            await store.find(slug="spam"),
+            await store.find(severity="high"),
+            await store.find(severity="critical"),
+            await store.find(created_after=start),
+            await store.find(limit=1, offset=1),
+        )
+
+    spam, scams, fraud, by_slug, high, critical, recent, page = asyncio.run(scenario())
+    assert [summary.id for summary in by_slug] == [spam.id]
+    assert [summary.id for summary in high] == [scams.id]
+    assert [(summary.id, summary.latest_version) for summary in critical] == [(fraud.id, 2)]
+    assert [summary.id for summary in recent] == [fraud.id, scams.id]
+    assert [summary.id for summary in page] == [scams.id]